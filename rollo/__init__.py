@@ -1,9 +1,19 @@
 from rollo.algorithm import *
+from rollo.archive import *
+from rollo.artifact_store import *
+from rollo.async_evaluation import *
 from rollo.backend import *
+from rollo.cache import *
 from rollo.constraints import *
+from rollo.coordinator import *
+from rollo.distributed import *
+from rollo.errors import *
 from rollo.evaluation import *
 from rollo.executor import *
 from rollo.input_validation import *
+from rollo.job_control import *
+from rollo.scheduler import *
 from rollo.toolbox_generator import *
+from rollo.warm_workers import *
 
 __version__ = "0.1.1"
@@ -1,6 +1,9 @@
 from .backend import BackEnd
+from .spatial_index import SpatialIndex
+from .resource_pool import pin_process
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import random
-import sys
+import os
 import logging
 import time
 
@@ -30,6 +33,21 @@ class Algorithm(object):
         solver and number of variables as each value
     output_dict : OrderedDict
         Ordered dict of output variables as keys and solvers as values
+    evaluation_cache : rollo.cache.EvaluationCache, optional
+        persistent cache of evaluated individuals' output values, whose
+        hits are recorded in the logbook
+    overprovision : int, optional
+        number of extra offspring bred and evaluated in each generation;
+        only the first pop_size offspring to finish are kept
+    processes : int, optional
+        number of processes for parallel_method=multiprocessing, defaults to
+        the number of CPUs
+    cpu_slots : list, optional
+        disjoint lists of CPU ids that parallel_method=multiprocessing's
+        worker processes are pinned to, one per process
+    fidelity_levels : int, optional
+        number of fidelity levels of the evaluators, see
+        `rollo.evaluation.Evaluation.add_evaluator`
 
     Attributes
     ----------
@@ -42,8 +60,41 @@ class Algorithm(object):
         Name of checkpoint file
     backend : rollo.backend.Backend
         Contains and manipulates the output backend
-    parallel_method : {'none', 'multiprocessing', 'job_control'}
+    parallel_method : {'none', 'multiprocessing', 'threads', 'job_control',
+                       'asyncio', 'scheduler', 'distributed'}
         parallelization method
+    max_concurrent_evaluations : int or None
+        maximum number of individuals evaluated at the same time for
+        parallel_method=threads, job_control, or asyncio, defaults to the
+        number of CPUs
+    spatial_index : rollo.spatial_index.SpatialIndex or None
+        evaluated individuals' output values, searched for a new individual
+        within the control variables' tolerances (only if a tolerance is
+        defined)
+    overprovision : int
+        number of extra offspring bred and evaluated in each generation;
+        only the first pop_size offspring to finish are kept
+    thread_pool : concurrent.futures.ThreadPoolExecutor or None
+        pool that evaluates individuals for parallel_method=threads
+    processes : int or None
+        number of processes for parallel_method=multiprocessing, defaults to
+        the number of CPUs
+    cpu_slots : list or None
+        disjoint lists of CPU ids that parallel_method=multiprocessing's
+        worker processes are pinned to, one per process (not pinned if None)
+    failures : list of dict
+        failed solver runs of the individuals evaluated in the current
+        generation
+    evaluated : list
+        [control variable values, output values] of every individual
+        evaluated in the current generation at the highest fidelity level
+        without penalty output values, recorded in the backend so the
+        spatial_index is rebuilt from them on restart (only if a tolerance
+        is defined)
+    fidelity_levels : int
+        number of fidelity levels of the evaluators. If more than 1,
+        offspring are evaluated at the lowest level and promoted one level
+        at a time while they are selected, see `promote_inds`
 
     """
 
@@ -58,6 +109,12 @@ class Algorithm(object):
         input_dict,
         start_time,
         parallel_method,
+        max_concurrent_evaluations=None,
+        evaluation_cache=None,
+        overprovision=0,
+        processes=None,
+        cpu_slots=None,
+        fidelity_levels=1,
     ):
         self.toolbox = deap_toolbox
         self.constraint_obj = constraint_obj
@@ -69,8 +126,27 @@ class Algorithm(object):
             output_dict,
             input_dict,
             start_time,
+            evaluation_cache,
         )
         self.parallel_method = parallel_method
+        self.max_concurrent_evaluations = max_concurrent_evaluations
+        self.spatial_index = None
+        tolerance_list = getattr(self.toolbox, "tolerance_list", [])
+        if any(tolerance > 0 for tolerance in tolerance_list):
+            self.spatial_index = SpatialIndex(tolerance_list)
+        self.overprovision = overprovision
+        self.processes = processes
+        self.cpu_slots = cpu_slots
+        self.failures = []
+        self.evaluated = []
+        self.fidelity_levels = fidelity_levels
+        self.thread_pool = None
+        if overprovision and parallel_method in [
+                "none", "multiprocessing", "scheduler", "distributed"]:
+            logging.warning(
+                " overprovision only shortens generations for parallel " +
+                "method = threads, job_control, or asyncio; every offspring " +
+                "will be evaluated")
 
     def generate(self):
         """Executes the genetic algorithm and outputs the summarized results
@@ -88,7 +164,14 @@ class Algorithm(object):
             try:
                 import multiprocessing_on_dill as multiprocessing
 
-                pool = multiprocessing.Pool()
+                if self.cpu_slots:
+                    slots = multiprocessing.Queue()
+                    for cpus in self.cpu_slots:
+                        slots.put(cpus)
+                    pool = multiprocessing.Pool(
+                        len(self.cpu_slots), pin_process, (slots,))
+                else:
+                    pool = multiprocessing.Pool(self.processes)
                 self.toolbox.register("map", pool.map)
             except BaseException:
                 logging.warning(
@@ -96,20 +179,34 @@ class Algorithm(object):
                     " run serially. parallel method = none"
                 )
                 pass
-        if self.cp_file:
-            self.backend.initialize_checkpoint_backend()
-            pop = self.backend.results["population"]
-            random.setstate(self.backend.results["rndstate"])
-        else:
-            self.backend.initialize_new_backend()
-            pop = self.initialize_pop(pop)
-            self.cp_file = "checkpoint.pkl"
-        print(self.backend.results["logbook"])
-        for gen in range(
-                self.backend.results["start_gen"] + 1,
-                self.toolbox.ngen):
-            pop = self.apply_algorithm_ngen(pop, gen)
+        elif self.parallel_method == "threads":
+            # evaluation function never changes the working directory and
+            # solvers run as external processes, so threads are sufficient
+            self.thread_pool = ThreadPoolExecutor(
+                max_workers=self.max_concurrent_evaluations or os.cpu_count())
+            self.toolbox.register("map", self.thread_pool.map)
+        try:
+            if self.cp_file:
+                self.backend.initialize_checkpoint_backend()
+                pop = self.backend.results["population"]
+                random.setstate(self.backend.results["rndstate"])
+                if self.spatial_index is not None:
+                    self.rebuild_spatial_index()
+            else:
+                self.backend.initialize_new_backend()
+                pop = self.initialize_pop(pop)
+                self.cp_file = "checkpoint.pkl"
             print(self.backend.results["logbook"])
+            for gen in range(
+                    self.backend.results["start_gen"] + 1,
+                    self.toolbox.ngen):
+                pop = self.apply_algorithm_ngen(pop, gen)
+                print(self.backend.results["logbook"])
+        finally:
+            if self.thread_pool is not None:
+                # waits for individuals left running by map_first_completed,
+                # so they finish before their directories are cleaned up
+                self.thread_pool.shutdown(wait=True)
         print("rollo Simulation Completed!")
         return pop
 
@@ -132,32 +229,16 @@ class Algorithm(object):
         for i, ind in enumerate(pop):
             ind.gen = 0
             ind.num = i
+            # the whole initial population is kept, so promoting it from the
+            # lowest fidelity level would only add evaluations
+            ind.fidelity = self.fidelity_levels - 1
         # evaluate fitness values of initial pop
         invalids = [ind for ind in pop if not ind.fitness.valid]
         copy_invalids = [self.toolbox.clone(ind) for ind in invalids]
-        if self.parallel_method == "job_control":
-            logging.warning(" parallel method = job_control")
-            fitnesses = self.toolbox.evaluate(pop)
-        else:
-            logging.warning(" parallel method = none")
-            start_time = time.time()
-            fitnesses = list(self.toolbox.map(self.toolbox.evaluate, pop))
-            end_time = time.time()
-            logging.info(" Generation: " +
-                         str(0) +
-                         ", Evaluation Total Runtime: " +
-                         str(round(end_time -
-                                   start_time, 2)) +
-                         " seconds")
-        # assign fitness values to individuals
-        for ind, fitness in zip(pop, fitnesses):
-            fitness_vals = []
-            for i in range(self.toolbox.objs):
-                fitness_vals.append(fitness[i])
-            ind.fitness.values = tuple(fitness_vals)
-            ind.output = fitness
+        logging.warning(" parallel method = " + self.parallel_method)
+        self.evaluate_inds(pop, 0)
         pop = self.constraint_obj.apply_constraints(pop)
-        self.backend.update_backend(pop, 0, copy_invalids, random.getstate())
+        self.update_backend(pop, 0, copy_invalids)
         return pop
 
     def apply_algorithm_ngen(self, pop, gen):
@@ -177,7 +258,13 @@ class Algorithm(object):
 
         """
         print("Entering generation " + str(gen) + "...")
-        offspring = self.apply_mating_operator(pop)
+        parents = pop
+        if self.overprovision:
+            # parents mate in pairs, so an odd one out would be dropped
+            extra = self.overprovision + \
+                (len(pop) + self.overprovision) % 2
+            parents = pop + [random.choice(pop) for i in range(extra)]
+        offspring = self.apply_mating_operator(parents)
         offspring = self.apply_mutation_operator(offspring)
         # define offspring's gen, ind num
         for i, ind in enumerate(offspring):
@@ -185,15 +272,99 @@ class Algorithm(object):
             ind.num = i
         # evaluate fitness of newly created inds in offspring
         invalids = [ind for ind in offspring if not ind.fitness.valid]
+        for ind in invalids:
+            ind.fidelity = 0
         copy_invalids = [self.toolbox.clone(ind) for ind in invalids]
-        if self.parallel_method == "job_control":
-            fitnesses = self.toolbox.evaluate(list(invalids))
+        if self.overprovision:
+            # offspring that were neither mated nor mutated are finished
+            required = self.toolbox.pop_size - (len(offspring) - len(invalids))
+            self.evaluate_inds(invalids, gen, max(required, 0))
+            copy_invalids = [copy_ind for copy_ind, ind in
+                             zip(copy_invalids, invalids) if ind.fitness.valid]
+            # keep the offspring that finished first, those that were not
+            # evaluated finished before any
+            offspring = sorted(
+                [ind for ind in offspring if ind.fitness.valid],
+                key=lambda ind: getattr(ind, "finish_time", None) or 0)
+            offspring = offspring[:self.toolbox.pop_size]
+        else:
+            self.evaluate_inds(invalids, gen)
+        # expand population before applying selection operator
+        if self.fidelity_levels > 1:
+            pop = self.promote_inds(pop + offspring, gen)
+        else:
+            pop = self.apply_selection_operator(pop + offspring)
+        pop = self.constraint_obj.apply_constraints(pop)
+        self.update_backend(pop, gen, copy_invalids)
+        return pop
+
+    def evaluate_inds(self, inds, gen, required=None, reuse=True):
+        """Evaluates individuals with the toolbox's evaluation function and
+        assigns their fitness and output values. If control variable
+        tolerances are defined, an individual within tolerance of an
+        already evaluated individual (from a previous generation or earlier
+        in inds) reuses its output values instead of being evaluated. Only
+        individuals evaluated at the highest fidelity level, and not given
+        penalty output values, are reused in later generations.
+
+        If required is set, evaluation stops as soon as that many individuals
+        are finished (for parallel_method=threads, job_control, or asyncio).
+        The other individuals are cancelled and keep an invalid fitness.
+
+        Parameters
+        ----------
+        inds : list
+            list of deap.creator.Ind to evaluate
+        gen : int
+            generation number
+        required : int, optional
+            number of individuals that must finish, defaults to all of inds
+        reuse : bool, optional
+            if False, individuals within tolerance of evaluated individuals
+            are evaluated too
+
+        """
+        to_evaluate = list(inds)
+        reused = []
+        self.failures = []
+        if self.spatial_index is not None and reuse:
+            to_evaluate = []
+            pending = SpatialIndex(self.spatial_index.tolerances)
+            for ind in inds:
+                output = self.spatial_index.query(ind)
+                if output is not None:
+                    self.assign_output(ind, output)
+                    # only highest fidelity level output values are indexed
+                    ind.fidelity = self.fidelity_levels - 1
+                    continue
+                j = pending.query(ind)
+                if j is None:
+                    pending.add(ind, len(to_evaluate))
+                    to_evaluate.append(ind)
+                else:
+                    reused.append((ind, j))
+            logging.info(" Generation: " + str(gen) + ", " +
+                         str(len(inds) - len(to_evaluate)) +
+                         " individuals within tolerance of evaluated " +
+                         "individuals were not evaluated")
+            if required is not None:
+                required = max(
+                    required - (len(inds) - len(to_evaluate) - len(reused)),
+                    0)
+        if len(to_evaluate) == 0:
+            return
+        if self.parallel_method in [
+                "job_control", "asyncio", "scheduler", "distributed"]:
+            if required is None:
+                fitnesses = self.toolbox.evaluate(to_evaluate)
+            else:
+                fitnesses = self.toolbox.evaluate(to_evaluate, required)
+        elif self.parallel_method == "threads" and required is not None:
+            fitnesses = self.map_first_completed(to_evaluate, required)
         else:
             start_time = time.time()
-            fitnesses = list(
-                self.toolbox.map(
-                    self.toolbox.evaluate,
-                    list(invalids)))
+            fitnesses = list(self.toolbox.map(
+                self.toolbox.evaluate, to_evaluate))
             end_time = time.time()
             logging.info(" Generation: " +
                          str(gen) +
@@ -201,19 +372,194 @@ class Algorithm(object):
                          str(round(end_time -
                                    start_time, 2)) +
                          " seconds")
-        # assign fitness values to individuals
-        for ind, fitness in zip(invalids, fitnesses):
-            fitness_vals = []
-            for i in range(self.toolbox.objs):
-                fitness_vals.append(fitness[i])
-            ind.fitness.values = tuple(fitness_vals)
-            ind.output = fitness
-        # expand population before applying selection operator
-        pop = self.apply_selection_operator(pop + offspring)
-        pop = self.constraint_obj.apply_constraints(pop)
-        self.backend.update_backend(pop, gen, copy_invalids, random.getstate())
+        for ind, fitness in zip(to_evaluate, fitnesses):
+            if fitness is None:
+                # cancelled after enough individuals finished
+                continue
+            self.assign_output(ind, fitness)
+            self.failures += getattr(fitness, "failures", [])
+            if self.spatial_index is not None and self.reusable(ind):
+                self.spatial_index.add(ind, ind.output)
+                self.evaluated.append([list(ind), ind.output])
+        for ind, j in reused:
+            if fitnesses[j] is not None:
+                self.assign_output(ind, tuple(fitnesses[j]))
+                ind.penalized = getattr(fitnesses[j], "penalized", False)
+                ind.finish_time = getattr(fitnesses[j], "finish_time", None)
+        return
+
+    def promote_inds(self, inds, gen):
+        """Applies the selection operator to individuals, and evaluates the
+        selected individuals below the highest fidelity level again one
+        level higher, until every selected individual is at the highest
+        fidelity level. Promotion changes output values, and so the
+        selection, so the selection operator is applied again after each
+        promotion.
+
+        Parameters
+        ----------
+        inds : list
+            list of evaluated deap.creator.Ind, the previous population and
+            its offspring
+        gen : int
+            generation number
+
+        Returns
+        -------
+        list
+            new list of deap.creator.Ind after selection operator application,
+            all evaluated at the highest fidelity level
+
+        """
+        failures = self.failures
+        while True:
+            pop = self.apply_selection_operator(inds)
+            promoted = []
+            for ind in pop:
+                # selection operators may select an individual several times
+                if getattr(ind, "fidelity", self.fidelity_levels - 1) < \
+                        self.fidelity_levels - 1 and \
+                        not any(ind is other for other in promoted):
+                    promoted.append(ind)
+            if len(promoted) == 0:
+                break
+            logging.info(" Generation: " + str(gen) + ", " +
+                         str(len(promoted)) + " selected individuals " +
+                         "promoted one fidelity level")
+            for ind in promoted:
+                ind.fidelity += 1
+            self.evaluate_inds(promoted, gen, reuse=False)
+            failures = failures + self.failures
+        self.failures = failures
         return pop
 
+    def reusable(self, ind):
+        """Returns True if other individuals within tolerance of an
+        evaluated individual may reuse its output values: it was evaluated
+        at the highest fidelity level and not given penalty output values
+
+        Parameters
+        ----------
+        ind : deap.creator.Ind
+            evaluated individual
+
+        Returns
+        -------
+        bool
+
+        """
+        if getattr(ind, "penalized", False):
+            return False
+        return getattr(ind, "fidelity", self.fidelity_levels - 1) == \
+            self.fidelity_levels - 1
+
+    def rebuild_spatial_index(self):
+        """Adds every individual evaluated before a restart to the
+        spatial_index, from the backend's record of evaluated individuals,
+        or from the populations of checkpoint files that have none
+
+        """
+        all_results = self.backend.results["all"]
+        if "evaluated" in all_results:
+            for gen_evaluated in all_results["evaluated"]:
+                for vals, output in gen_evaluated:
+                    self.spatial_index.add(vals, output)
+            return
+        for prev_pop in all_results["populations"]:
+            for ind in prev_pop:
+                if self.reusable(ind):
+                    self.spatial_index.add(ind, ind.output)
+        return
+
+    def update_backend(self, pop, gen, copy_invalids):
+        """Updates the backend with a generation's population and the
+        individuals evaluated in it
+
+        Parameters
+        ----------
+        pop : list
+            list of deap.creator.Ind for that generation
+        gen : int
+            generation number
+        copy_invalids : list
+            copies of the deap.creator.Ind whose fitnesses had to be
+            evaluated
+
+        """
+        self.backend.update_backend(
+            pop, gen, copy_invalids, random.getstate(), self.failures,
+            self.evaluated)
+        self.evaluated = []
+        return
+
+    def map_first_completed(self, inds, required):
+        """Evaluates individuals on the thread pool and returns as soon as
+        required individuals are finished. Individuals that have not started
+        are cancelled; those already running finish in the background, so
+        their output values still reach the evaluation cache, and `generate`
+        waits for them before it returns.
+
+        Parameters
+        ----------
+        inds : list
+            list of deap.creator.Ind to evaluate
+        required : int
+            number of individuals that must finish
+
+        Returns
+        -------
+        list
+            output values of each individual, None if it was not finished
+
+        """
+        start_time = time.time()
+        futures = {}
+        for i, ind in enumerate(inds):
+            futures[self.thread_pool.submit(self.toolbox.evaluate, ind)] = i
+        fitnesses = [None] * len(inds)
+        finished = 0
+        if required > 0:
+            for future in as_completed(futures):
+                fitnesses[futures[future]] = future.result()
+                finished += 1
+                if finished >= required:
+                    break
+        for future in futures:
+            future.cancel()
+        logging.info(" Generation: " + str(inds[0].gen) + ", " +
+                     str(finished) + " of " + str(len(inds)) +
+                     " individuals kept, Evaluation Total Runtime: " +
+                     str(round(time.time() - start_time, 2)) + " seconds")
+        return fitnesses
+
+    def assign_output(self, ind, output):
+        """Assigns an individual's fitness and output values, the
+        resources its evaluation used, whether it was given penalty output
+        values, and when its evaluation finished
+
+        Parameters
+        ----------
+        ind : deap.creator.Ind
+            Created in `rollo.toolbox_generator.ToolboxGenerator`. It is
+            a list with special attributes.
+        output : tuple
+            output values ordered by output_dict, a
+            `rollo.evaluation.EvaluationOutput` if the individual was
+            evaluated
+
+        """
+        fitness_vals = []
+        for i in range(self.toolbox.objs):
+            fitness_vals.append(output[i])
+        ind.fitness.values = tuple(fitness_vals)
+        ind.output = tuple(output)
+        # individuals that reuse another's output values used nothing
+        ind.resources = getattr(output, "resources", [])
+        ind.penalized = getattr(output, "penalized", False)
+        # reused output values are available at once
+        ind.finish_time = getattr(output, "finish_time", None)
+        return
+
     def apply_selection_operator(self, pop):
         """Applies selection operator to population
 
@@ -251,6 +597,8 @@ class Algorithm(object):
         for child1, child2 in zip(pop[::2], pop[1::2]):
             new_child1 = self.toolbox.clone(child1)
             new_child2 = self.toolbox.clone(child2)
+            new_child1.parent = self.parent_info(child1)
+            new_child2.parent = self.parent_info(child2)
             if random.random() < self.toolbox.cxpb:
                 outside_bounds = True
                 while outside_bounds:
@@ -271,6 +619,33 @@ class Algorithm(object):
             final_pop.append(new_child2)
         return final_pop
 
+    def parent_info(self, ind):
+        """Returns the information about a parent that its offspring keep,
+        so solvers whose control variables did not change can reuse the
+        parent's results
+
+        Parameters
+        ----------
+        ind : deap.creator.Ind
+            evaluated parent individual
+
+        Returns
+        -------
+        dict or None
+            path: parent's directory name, vals: parent's control variable
+            values, output: parent's output values. None if the parent was
+            never evaluated
+
+        """
+        try:
+            return {
+                "path": str(ind.gen) + "_" + str(ind.num),
+                "vals": list(ind),
+                "output": ind.output,
+            }
+        except AttributeError:
+            return None
+
     def apply_mutation_operator(self, pop):
         """Applies mutation operator to population
 
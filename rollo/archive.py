@@ -0,0 +1,331 @@
+import tarfile
+import shutil
+import io
+import fcntl
+import lzma
+import json
+import stat
+import os
+
+
+def archive_extension():
+    """Returns the extension of new archives: zstd compression if the
+    zstandard package is installed, else xz
+
+    Returns
+    -------
+    str
+        ``.tar.zst`` or ``.tar.xz``
+
+    """
+    try:
+        import zstandard  # noqa: F401
+    except ImportError:
+        return ".tar.xz"
+    return ".tar.zst"
+
+
+def index_path(archive):
+    """Returns the name of an archive's index file
+
+    Parameters
+    ----------
+    archive : str
+        archive file name, e.g. ``archive_3.tar.zst``
+
+    Returns
+    -------
+    str
+        e.g. ``archive_3.index.json``
+
+    """
+    return archive.rsplit(".tar", 1)[0] + ".index.json"
+
+
+def read_index(archive):
+    """Returns an archive's index
+
+    Parameters
+    ----------
+    archive : str
+        archive file name
+
+    Returns
+    -------
+    dict
+        key is directory name, value is [offset, length] in bytes of the
+        directory's compressed tar in the archive, empty if the archive does
+        not exist
+
+    """
+    try:
+        with open(index_path(archive)) as fp:
+            return json.load(fp)
+    except FileNotFoundError:
+        return {}
+
+
+def compressed_writer(fp, archive):
+    """Returns a file object that compresses what is written to it into
+    fp, with the archive's compression
+
+    Parameters
+    ----------
+    fp : file object
+        opened for writing in binary mode
+    archive : str
+        archive file name, its extension gives the compression
+
+    Returns
+    -------
+    file object
+        closing it does not close fp
+
+    """
+    if archive.endswith(".zst"):
+        import zstandard
+        return zstandard.ZstdCompressor().stream_writer(fp, closefd=False)
+    return lzma.LZMAFile(fp, "w")
+
+
+def decompressed_reader(fp, archive):
+    """Returns a file object that reads fp decompressed with the archive's
+    compression
+
+    Parameters
+    ----------
+    fp : file object
+        opened for reading in binary mode
+    archive : str
+        archive file name, its extension gives the compression
+
+    Returns
+    -------
+    file object
+
+    """
+    if archive.endswith(".zst"):
+        import zstandard
+        return zstandard.ZstdDecompressor().stream_reader(fp)
+    return lzma.LZMAFile(fp, "r")
+
+
+def append_directory(archive, path, name, shared=()):
+    """Appends a directory to an archive as its own compressed tar, named
+    name inside the tar, and records its position in the archive's index.
+    The archive is locked while it is written, so processes can append to
+    it at the same time.
+
+    The archive is a series of independently compressed tars, so one
+    directory is extracted by decompressing only its own tar, see
+    `extract_individual`, and the whole archive is unpacked with
+    ``tar --ignore-zeros -xf``. Files hard-linked into the directory from
+    shared (e.g. static_files or the artifact store) are shared with other
+    directories and are not archived.
+
+    Parameters
+    ----------
+    archive : str
+        archive file name
+    path : str
+        path name of the directory
+    name : str
+        directory name inside the archive, e.g. gen_ind
+    shared : set of tuple, optional
+        (st_dev, st_ino) of the files that are not archived
+
+    Returns
+    -------
+    None
+
+    """
+    with open(archive, "ab") as fp:
+        fcntl.flock(fp, fcntl.LOCK_EX)
+        try:
+            offset = fp.seek(0, os.SEEK_END)
+            with compressed_writer(fp, archive) as writer:
+                with tarfile.open(fileobj=writer, mode="w|") as tar:
+                    add_unshared_files(tar, path, name, shared)
+            fp.flush()
+            index = read_index(archive)
+            index[name] = [offset, fp.tell() - offset]
+            # written to a temporary file and renamed into place, so readers
+            # never see a partially written index
+            temporary_index = index_path(archive) + ".tmp"
+            with open(temporary_index, "w") as index_fp:
+                json.dump(index, index_fp)
+            os.replace(temporary_index, index_path(archive))
+        finally:
+            fcntl.flock(fp, fcntl.LOCK_UN)
+    return
+
+
+def add_unshared_files(tar, path, name, shared=()):
+    """Adds a directory to a tar, without the regular files that are hard
+    links of shared files. Other hard-linked files, e.g. ones a solver
+    linked itself, are added.
+
+    Parameters
+    ----------
+    tar : tarfile.TarFile
+        opened for writing
+    path : str
+        path name of the directory
+    name : str
+        directory name inside the tar
+    shared : set of tuple, optional
+        (st_dev, st_ino) of the files that are not added
+
+    Returns
+    -------
+    None
+
+    """
+    for directory, directories, files in os.walk(path):
+        arcname = os.path.normpath(
+            os.path.join(name, os.path.relpath(directory, path)))
+        tar.add(directory, arcname=arcname, recursive=False)
+        # symlinks to directories are listed, but not walked
+        for file in files + [d for d in directories if
+                             os.path.islink(os.path.join(directory, d))]:
+            file_path = os.path.join(directory, file)
+            file_stat = os.lstat(file_path)
+            if stat.S_ISREG(file_stat.st_mode) and \
+                    file_stat.st_nlink > 1 and \
+                    (file_stat.st_dev, file_stat.st_ino) in shared:
+                continue
+            tar.add(file_path, arcname=os.path.join(arcname, file),
+                    recursive=False)
+    return
+
+
+def iter_directory(archive, name):
+    """Yields the members of one directory in an archive, without
+    decompressing the others
+
+    Parameters
+    ----------
+    archive : str
+        archive file name
+    name : str
+        directory name, e.g. ``3_12``
+
+    Yields
+    ------
+    tar : tarfile.TarFile
+        the directory's tar, opened for streamed reading
+    tarinfo : tarfile.TarInfo
+        a member of the directory's tar, named relative to the archive
+
+    """
+    index = read_index(archive)
+    if name not in index:
+        return
+    offset, length = index[name]
+    with open(archive, "rb") as fp:
+        fp.seek(offset)
+        compressed = io.BytesIO(fp.read(length))
+    with decompressed_reader(compressed, archive) as reader:
+        with tarfile.open(fileobj=reader, mode="r|") as tar:
+            for tarinfo in tar:
+                yield tar, tarinfo
+
+
+def extract_files(archive, name, files, destination):
+    """Extracts some of the regular files of one directory in an archive
+
+    Parameters
+    ----------
+    archive : str
+        archive file name
+    name : str
+        directory name, e.g. ``3_12``
+    files : list of str
+        file names relative to the directory
+    destination : str
+        directory the files are extracted into, with the same relative
+        names
+
+    Returns
+    -------
+    list of str
+        files that were extracted
+
+    """
+    wanted = {os.path.normpath(os.path.join(name, file)): file
+              for file in files}
+    extracted = []
+    for tar, tarinfo in iter_directory(archive, name):
+        if tarinfo.name not in wanted or not tarinfo.isfile():
+            continue
+        target = os.path.join(destination, wanted[tarinfo.name])
+        os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
+        with open(target, "wb") as fp:
+            shutil.copyfileobj(tar.extractfile(tarinfo), fp)
+        extracted.append(wanted[tarinfo.name])
+    return extracted
+
+
+def read_file(archive, name, file):
+    """Returns the contents of a regular file of one directory in an
+    archive
+
+    Parameters
+    ----------
+    archive : str
+        archive file name
+    name : str
+        directory name, e.g. ``3_12``
+    file : str
+        file name relative to the directory
+
+    Returns
+    -------
+    bytes or None
+        None if the archive has no such file
+
+    """
+    member = os.path.normpath(os.path.join(name, file))
+    for tar, tarinfo in iter_directory(archive, name):
+        if tarinfo.name == member and tarinfo.isfile():
+            return tar.extractfile(tarinfo).read()
+    return None
+
+
+def extract_individual(archive, name, destination="."):
+    """Extracts one directory from an archive without decompressing the
+    others
+
+    Parameters
+    ----------
+    archive : str
+        archive file name, e.g. ``archive_3.tar.zst``
+    name : str
+        directory name, e.g. ``3_12``
+    destination : str, optional
+        directory the directory is extracted into
+
+    Returns
+    -------
+    str
+        path name of the extracted directory
+
+    """
+    index = read_index(archive)
+    if name not in index:
+        raise Exception(
+            "ROLLO archive " + archive + " has no directory named " + name)
+    offset, length = index[name]
+    with open(archive, "rb") as fp:
+        fp.seek(offset)
+        # only this directory's compressed tar is read
+        compressed = io.BytesIO(fp.read(length))
+        with decompressed_reader(compressed, archive) as reader:
+            with tarfile.open(fileobj=reader, mode="r|") as tar:
+                if hasattr(tarfile, "tar_filter"):
+                    # static_files symlinks point outside the directory
+                    tar.extractall(destination, filter="tar")
+                else:
+                    tar.extractall(destination)
+    return os.path.join(destination, name)
+
@@ -0,0 +1,193 @@
+import tempfile
+import hashlib
+import logging
+import shutil
+import stat
+import json
+import os
+
+
+class ArtifactStore(object):
+    """The ArtifactStore class holds a content-addressed store of files
+    produced by evaluators' execute steps (e.g. meshes or processed cross
+    sections). Each entry is a directory named by a hash of everything the
+    step depends on, so a step whose dependencies match an earlier
+    individual's runs once, and its files are hard-linked into later
+    individuals' directories.
+
+    Entries are written to a temporary directory and renamed into place, so
+    concurrent evaluations never see a partially written entry. Stored files
+    are made read-only, since every individual that reuses them shares the
+    same file.
+
+    Parameters
+    ----------
+    store_dir : str
+        directory that holds the store's entries
+
+    Attributes
+    ----------
+    store_dir : str
+        directory that holds the store's entries
+
+    """
+
+    def __init__(self, store_dir):
+        self.store_dir = store_dir
+        os.makedirs(store_dir, exist_ok=True)
+
+    def key(self, dependencies, files):
+        """Returns an entry's key
+
+        Parameters
+        ----------
+        dependencies : object
+            JSON-serializable values the step depends on, e.g. its command and
+            its control variables' values
+        files : list of str
+            files whose contents the step depends on, e.g. its script (files
+            that do not exist are skipped)
+
+        Returns
+        -------
+        str
+            sha256 hex digest
+
+        """
+        key = hashlib.sha256(
+            json.dumps(dependencies, sort_keys=True).encode())
+        for file in files:
+            if os.path.exists(file):
+                with open(file, "rb") as fp:
+                    key.update(fp.read())
+        return key.hexdigest()
+
+    def entry(self, key):
+        """Returns the directory of an entry
+
+        Parameters
+        ----------
+        key : str
+            entry key from `key`
+
+        Returns
+        -------
+        str
+            path name
+
+        """
+        return os.path.join(self.store_dir, key)
+
+    def files(self, key):
+        """Returns the files of an entry
+
+        Parameters
+        ----------
+        key : str
+            entry key from `key`
+
+        Returns
+        -------
+        list of str
+            file names relative to the entry, empty if the entry does not
+            exist
+
+        """
+        entry = self.entry(key)
+        files = []
+        for directory, directories, names in os.walk(entry):
+            for name in names:
+                files.append(os.path.relpath(
+                    os.path.join(directory, name), entry))
+        return sorted(files)
+
+    def inodes(self):
+        """Returns the inodes of the stored files, which are shared with
+        the directories they were restored into
+
+        Returns
+        -------
+        set of tuple
+            (st_dev, st_ino) of each stored file
+
+        """
+        inodes = set()
+        for directory, directories, names in os.walk(self.store_dir):
+            for name in names:
+                file_stat = os.stat(os.path.join(directory, name))
+                inodes.add((file_stat.st_dev, file_stat.st_ino))
+        return inodes
+
+    def restore(self, key, path, produces):
+        """Hard-links (or copies, if the store and path are on different
+        file systems) an entry's files into path
+
+        Parameters
+        ----------
+        key : str
+            entry key from `key`
+        path : str
+            path name of directory to restore the files into
+        produces : list of str
+            file names (relative to path) the step produces
+
+        Returns
+        -------
+        bool
+            True if the entry exists and its files were restored
+
+        """
+        entry = self.entry(key)
+        if not os.path.isdir(entry):
+            return False
+        for file in produces:
+            target = os.path.join(path, file)
+            os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
+            if os.path.lexists(target):
+                os.remove(target)
+            try:
+                os.link(os.path.join(entry, file), target)
+            except OSError:
+                shutil.copy2(os.path.join(entry, file), target)
+        return True
+
+    def save(self, key, path, produces):
+        """Copies the files a step produced in path into a new entry, unless
+        another evaluation already saved it
+
+        Parameters
+        ----------
+        key : str
+            entry key from `key`
+        path : str
+            path name of directory the step ran in
+        produces : list of str
+            file names (relative to path) the step produces
+
+        Returns
+        -------
+        bool
+            True if the entry exists after saving
+
+        """
+        entry = self.entry(key)
+        if os.path.isdir(entry):
+            return True
+        for file in produces:
+            if not os.path.isfile(os.path.join(path, file)):
+                logging.warning(" " + os.path.join(path, file) + " was not" +
+                                " produced, so it was not saved to the" +
+                                " artifact store")
+                return False
+        tmp_entry = tempfile.mkdtemp(dir=self.store_dir, prefix=key + ".tmp")
+        for file in produces:
+            stored_file = os.path.join(tmp_entry, file)
+            os.makedirs(os.path.dirname(stored_file), exist_ok=True)
+            shutil.copy2(os.path.join(path, file), stored_file)
+            os.chmod(stored_file, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+        try:
+            os.rename(tmp_entry, entry)
+        except OSError:
+            # another evaluation saved the same entry first
+            shutil.rmtree(tmp_entry)
+        return True
@@ -0,0 +1,483 @@
+import os
+import subprocess
+import asyncio
+import functools
+import logging
+import time
+from .errors import SolverError
+
+
+class AsyncEvaluation(object):
+    """The AsyncEvaluation class holds the `rollo.evaluation.Evaluation`
+    methods for parallel_method=asyncio: every individual of a population is
+    evaluated concurrently in one event loop, with solver commands run as
+    asyncio subprocesses and blocking calls run in the loop's default
+    executor.
+
+    """
+
+    async def acquire_resources_async(self, solver):
+        """Reserves a solver run's cores and memory without blocking the
+        event loop, waiting until a run releases enough of them with
+        `release_resources_async`
+
+        Parameters
+        ----------
+        solver : str
+            name of solver
+
+        Returns
+        -------
+        list of int
+            CPUs reserved for the run, empty if runs are not pinned
+
+        """
+        if self.resource_pool is None:
+            return []
+        async with self.resources_freed:
+            while True:
+                cpus = self.resource_pool.try_acquire(
+                    *self.solver_resources(solver))
+                if cpus is not None:
+                    return cpus
+                await self.resources_freed.wait()
+
+    async def release_resources_async(self, solver, cpus):
+        """Returns a solver run's cores, memory, and CPUs to the resource
+        pool and wakes the runs waiting in `acquire_resources_async`
+
+        Parameters
+        ----------
+        solver : str
+            name of solver
+        cpus : list of int
+            CPUs reserved for the run
+
+        Returns
+        -------
+        None
+
+        """
+        if self.resource_pool is None:
+            return
+        async with self.resources_freed:
+            self.resource_pool.release(*self.solver_resources(solver), cpus)
+            self.resources_freed.notify_all()
+        return
+
+    async def run_blocking(self, function, *args):
+        """Runs a call that blocks (file operations, template rendering,
+        reading outputs) in the event loop's default executor, so the other
+        individuals keep running meanwhile. If the calling task is cancelled,
+        the call is still waited for, so the individual's directory is not
+        cleaned up while the call works in it.
+
+        Parameters
+        ----------
+        function : callable
+            called with args
+        *args
+            arguments of function
+
+        Returns
+        -------
+        object
+            function's return value
+
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(None, functools.partial(function, *args))
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            await asyncio.wait([future])
+            raise
+
+    async def run_with_retries_async(
+            self, path, solver, run, output_vals=None):
+        """Coroutine version of `run_with_retries` for parallel_method=
+        asyncio, run returns a coroutine
+
+        Parameters
+        ----------
+        path : str
+            path name
+        solver : str
+            name of solver
+        run : function
+            returns a coroutine that runs the solver and returns the
+            individual's output values
+        output_vals : list, optional
+            the individual's output values before the solver runs, see
+            `solver_penalty_vals`
+
+        Returns
+        -------
+        list
+            output values from run, or the solver's penalty output values
+            once its retries are exhausted
+
+        """
+        attempt = 0
+        while True:
+            try:
+                return await run()
+            except SolverError as error:
+                delay = self.failed(path, solver, attempt, error)
+            if delay is None:
+                return self.solver_penalty_vals(solver, output_vals)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def evaluate_pop_async(
+            self,
+            pop,
+            control_dict,
+            output_dict,
+            input_evaluators,
+            max_concurrent_evaluations,
+            required=None,
+            batch_output_vals=None):
+        """Evaluates every individual in pop concurrently in the running
+        event loop for parallel_method=asyncio, and returns their output
+        values as soon as the last individual finishes. If required is set,
+        the remaining individuals are cancelled (and their processes killed)
+        as soon as that many have finished.
+
+        Parameters
+        ----------
+        pop : list
+            list of deap.creator.Ind
+        control_dict : OrderedDict
+            Ordered dict of control variables as keys and a list of their
+            solver and number of variables as each value
+        output_dict : OrderedDict
+            Ordered dict of output variables as keys and solvers as values
+        input_evaluators : dict
+            evaluators sub-dictionary from input file
+        max_concurrent_evaluations : int or None
+            maximum number of individuals evaluated at the same time,
+            defaults to the number of CPUs
+        required : int, optional
+            number of individuals that must finish, defaults to all of pop
+        batch_output_vals : dict, optional
+            key is gen_ind dir (str), value is the individual's output values
+            from `run_batch_solvers`
+
+        Returns
+        -------
+        list of tuple
+            each index of list contains a tuple of output values from
+            evaluators ordered by output_dict (None for cancelled
+            individuals)
+
+        """
+        semaphore = asyncio.Semaphore(
+            max_concurrent_evaluations or os.cpu_count())
+        # asyncio objects belong to the event loop they are created in
+        self.resources_freed = asyncio.Condition()
+        order_of_solvers = self.solver_order(input_evaluators)
+        if batch_output_vals is None:
+            batch_output_vals = {}
+        tasks = [asyncio.ensure_future(self.evaluate_ind_async(
+            ind,
+            semaphore,
+            order_of_solvers,
+            control_dict,
+            output_dict,
+            input_evaluators,
+            batch_output_vals.get(self.ind_path(ind)))) for ind in pop]
+        if required is None:
+            return list(await asyncio.gather(*tasks))
+        pending = set(tasks)
+        finished = 0
+        while finished < min(required, len(pop)):
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED)
+            finished += len(done)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        all_output_vals = []
+        for ind, task in zip(pop, tasks):
+            if task.cancelled():
+                self.finish_ind_directory(self.ind_path(ind), False)
+                all_output_vals.append(None)
+            else:
+                all_output_vals.append(task.result())
+        if pending:
+            logging.info(" Generation: " + str(pop[0].gen) + ", " +
+                         str(len(pending)) + " individuals still running" +
+                         " after " + str(required) + " finished were " +
+                         "cancelled")
+        return all_output_vals
+
+    async def evaluate_ind_async(
+            self,
+            ind,
+            semaphore,
+            order_of_solvers,
+            control_dict,
+            output_dict,
+            input_evaluators,
+            batch_output_vals=None):
+        """Runs each solver's input script, execute commands, and output
+        script for one individual for parallel_method=asyncio
+
+        Parameters
+        ----------
+        ind : deap.creator.Ind
+            Created in `rollo.toolbox_generator.ToolboxGenerator`. It is
+            a list with special attributes.
+        semaphore : asyncio.Semaphore
+            limits the number of individuals evaluated at the same time
+        order_of_solvers : list
+            list with solver name at its order index
+        control_dict : OrderedDict
+            Ordered dict of control variables as keys and a list of their
+            solver and number of variables as each value
+        output_dict : OrderedDict
+            Ordered dict of output variables as keys and solvers as values
+        input_evaluators : dict
+            evaluators sub-dictionary from input file
+        batch_output_vals : list, optional
+            the individual's output values from `run_batch_solvers`
+
+        Returns
+        -------
+        tuple
+            output values from evaluators ordered by output_dict
+
+        """
+        async with semaphore:
+            control_vars = self.name_ind(ind, control_dict, input_evaluators)
+            reused_solvers, output_vals = await self.run_blocking(
+                self.partial_results, ind, control_vars, order_of_solvers,
+                control_dict, output_dict, input_evaluators)
+            path = self.ind_path(ind)
+            if self.needs_directory():
+                await self.run_blocking(
+                    self.make_ind_directory, ind, path, order_of_solvers,
+                    reused_solvers, control_vars)
+            if batch_output_vals is not None:
+                self.merge_output_vals(output_vals, batch_output_vals)
+            try:
+                for solver in order_of_solvers:
+                    if self.is_penalized(path):
+                        break
+                    if solver in reused_solvers or \
+                            solver in self.batch_scripts:
+                        continue
+                    if solver in self.callables:
+                        output_vals = await self.run_blocking(
+                            self.run_callable, output_vals, solver,
+                            output_dict, control_vars)
+                        continue
+                    before = await self.run_blocking(
+                        self.list_solver_files, path)
+                    output_vals = await self.run_with_retries_async(
+                        path, solver, functools.partial(
+                            self.run_solver_async, ind, path, solver,
+                            output_vals, output_dict, control_vars,
+                            input_evaluators), output_vals)
+                    await self.run_blocking(
+                        self.record_solver_files, path, solver, before,
+                        control_vars, order_of_solvers)
+            except subprocess.TimeoutExpired as error:
+                output_vals = self.timed_out(
+                    path, solver, error, output_vals)
+        self.finish_times[path] = time.time()
+        return tuple(output_vals)
+
+    async def run_solver_async(
+            self,
+            ind,
+            path,
+            solver,
+            output_vals,
+            output_dict,
+            control_vars,
+            input_evaluators):
+        """Runs a solver's input script, execute steps, and output script in
+        an individual's directory for parallel_method=asyncio
+
+        Parameters
+        ----------
+        ind : deap.creator.Ind
+            Created in `rollo.toolbox_generator.ToolboxGenerator`. It is
+            a list with special attributes.
+        path : str
+            path name
+        solver : str
+            name of solver
+        output_vals : list
+            the individual's output values so far
+        output_dict : OrderedDict
+            Ordered dict of output variables as keys and solvers as values
+        control_vars : dict
+            multiple layers of dict, see `name_ind`
+        input_evaluators : dict
+            evaluators sub-dictionary from input file
+
+        Returns
+        -------
+        output_vals : list
+            output_vals populated with the solver's output values
+
+        """
+        cpus = await self.acquire_resources_async(solver)
+        try:
+            with self.pin_run(path, solver, cpus):
+                # run input script
+                await self.run_blocking(
+                    self.render_input_script, solver, control_vars[solver],
+                    ind, path)
+                await self.run_script_async(
+                    path,
+                    solver + "_input_script_out.txt",
+                    solver,
+                    self.input_scripts[solver])
+                # run execute if they exist
+                if "execute" in input_evaluators[solver]:
+                    executes = input_evaluators[solver]["execute"]
+                    await self.run_blocking(
+                        self.generate_execute_scripts, path, executes)
+                    execute_memoize = input_evaluators[solver].get(
+                        "execute_memoize")
+                    for i, executables in enumerate(executes):
+                        out_file = solver + "_execute_" + str(i) + \
+                            "_output.txt"
+                        key = self.execute_step_key(
+                            solver, i, executables, control_vars[solver],
+                            execute_memoize)
+                        if await self.run_blocking(
+                                self.restore_execute_step, path, out_file,
+                                key, i, execute_memoize):
+                            continue
+                        returncode = await self.subprocess_exec_async(
+                            path, out_file, executables,
+                            self.timeouts.get(solver),
+                            self.solver_env(solver), solver)
+                        await self.run_blocking(
+                            self.save_execute_step, path, key, i,
+                            execute_memoize, returncode)
+                        self.check_returncode(
+                            path, solver, " ".join(executables), returncode)
+                # get output values
+                if self.output_scripts[solver]:
+                    await self.run_blocking(
+                        self.generate_output_script, path, solver)
+                    await self.run_script_async(
+                        path,
+                        solver + "_output_script_out.txt",
+                        solver,
+                        self.output_scripts[solver])
+        finally:
+            await self.release_resources_async(solver, cpus)
+        output_vals = await self.run_blocking(
+            self.get_output_vals, output_vals, solver, path, output_dict,
+            control_vars)
+        return output_vals
+
+    async def run_script_async(self, path, out_file, solver, script):
+        """Runs an input or output script in an individual's directory
+        without blocking the event loop, in a warm worker process if the
+        solver preloads modules
+
+        Parameters
+        ----------
+        path : str
+            path name
+        out_file : str
+            txt file (relative to path) to output script's stderror and
+            stdoutput to
+        solver : str
+            name of solver
+        script : list of str
+            1st element: executable, 2nd element: script name
+
+        Returns
+        -------
+        None
+
+        """
+        if self.uses_warm_worker(solver, script):
+            self.start_warm_workers()
+            returncode = await asyncio.wrap_future(self.warm_workers.submit(
+                path, out_file, script[1], self.timeouts.get(solver),
+                self.pinned_cpus(), self.solver_env(solver)))
+        else:
+            returncode = await self.subprocess_exec_async(
+                path, out_file, script, self.timeouts.get(solver),
+                self.solver_env(solver), solver)
+        self.check_returncode(path, solver, " ".join(script), returncode)
+        return
+
+    async def subprocess_exec_async(
+            self, path, out_file, command, timeout=None, env=None,
+            solver=None):
+        """Launches command in bash with asyncio.create_subprocess_shell in
+        path, as the other parallel methods do, so pipes, redirects, and &&
+        work, and waits for it without blocking the event loop. If solver is
+        given, the command's wall time and directory growth are recorded for
+        the individual in path (the event loop reaps the process, so its CPU
+        time and memory are not known).
+
+        Parameters
+        ----------
+        path : str
+            path name
+        out_file : str
+            txt file (relative to path) to output command's stderror and
+            stdoutput to
+        command : list of str
+            executable and its arguments, e.g. ["python", "input.py"],
+            joined with spaces into a bash command
+        timeout : float, optional
+            seconds after which command and every process it started are
+            killed
+        env : dict, optional
+            command's environment, defaults to the current environment
+        solver : str, optional
+            name of the solver command belongs to
+
+        Returns
+        -------
+        int
+            exit code of command (127 if it was not found)
+
+        Raises
+        ------
+        subprocess.TimeoutExpired
+            if command was killed after timeout seconds
+
+        """
+        shell_command = self.numactl_command(" ".join(command))
+        start_time = time.time()
+        with open(os.path.join(path, out_file), "wb") as output:
+            try:
+                # a new session, so the command's children are killed with it
+                process = await asyncio.create_subprocess_shell(
+                    shell_command, stdout=output, stderr=output,
+                    cwd=path, env=env, executable="/bin/bash",
+                    start_new_session=True, preexec_fn=self.pin_child())
+            except OSError as error:
+                # mirror the shell's "command not found" message
+                output.write((str(error) + "\n").encode())
+                return 127
+            try:
+                returncode = await asyncio.wait_for(process.wait(), timeout)
+            except asyncio.TimeoutError:
+                self.kill_process_group(process.pid)
+                await process.wait()
+                raise subprocess.TimeoutExpired(" ".join(command), timeout)
+            except asyncio.CancelledError:
+                # the individual is no longer needed
+                self.kill_process_group(process.pid)
+                await process.wait()
+                raise
+        if solver is not None:
+            self.record_usage(
+                path, solver, " ".join(command), time.time() - start_time,
+                None)
+        return returncode
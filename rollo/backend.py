@@ -25,6 +25,9 @@ class BackEnd(object):
         input file contents
     start_time : float
         time the simulation began
+    evaluation_cache : rollo.cache.EvaluationCache, optional
+        persistent cache of evaluated individuals' output values, whose
+        hits are recorded in the logbook
 
     Attributes
     ----------
@@ -44,6 +47,9 @@ class BackEnd(object):
         input file contents
     start_time : float
         time the simulation began
+    evaluation_cache : rollo.cache.EvaluationCache or None
+        persistent cache of evaluated individuals' output values, whose
+        hits are recorded in the logbook
 
     """
 
@@ -55,6 +61,7 @@ class BackEnd(object):
         output_dict,
         input_file,
         start_time,
+        evaluation_cache=None,
     ):
         self.results = {}
         self.checkpoint_file = checkpoint_file
@@ -63,6 +70,7 @@ class BackEnd(object):
         self.output_dict = output_dict
         self.input_file = input_file
         self.start_time = start_time
+        self.evaluation_cache = evaluation_cache
         self.initialize_stats()
 
     def initialize_new_backend(self):
@@ -72,7 +80,13 @@ class BackEnd(object):
         self.results["start_gen"] = 0
         self.results["halloffame"] = tools.HallOfFame(maxsize=1)
         self.results["logbook"] = tools.Logbook()
-        self.results["logbook"].header = "time", "gen", "evals", "oup", "ind"
+        header = ["time", "gen", "evals"]
+        if self.evaluation_cache is not None:
+            self.evaluation_cache.clear_lookups()
+            header.append("cache_hits")
+        if self.records_failures():
+            header += ["failures", "retries"]
+        self.results["logbook"].header = header + ["oup", "ind"]
         self.results["logbook"].chapters["ind"].header = "avg", "min", "max"
         self.results["logbook"].chapters["oup"].header = "avg", "std", "min", "max"
         self.results["all"] = {}
@@ -80,9 +94,26 @@ class BackEnd(object):
         self.results["all"]["oup_naming"] = self.output_naming()
         self.results["all"]["populations"] = []
         self.results["all"]["outputs"] = []
+        self.results["all"]["resources"] = []
         self.checkpoint_file = "checkpoint.pkl"
         return
 
+    def records_failures(self):
+        """Returns True if any evaluator is defined with retries or penalty,
+        so failed evaluations are counted in the logbook
+
+        Returns
+        -------
+        bool
+
+        """
+        try:
+            evaluators = self.input_file["evaluators"].values()
+        except (KeyError, TypeError, AttributeError):
+            return False
+        return any("retries" in evaluator or "penalty" in evaluator
+                   for evaluator in evaluators)
+
     def ind_naming(self):
         """Returns a dict with control variable name as key and their ordered
         position in Ind as value
@@ -143,7 +174,14 @@ class BackEnd(object):
         self.mstats = tools.MultiStatistics(ind=stats_ind, oup=stats_oup)
         return
 
-    def update_backend(self, pop, gen, invalid_ind, rndstate):
+    def update_backend(
+            self,
+            pop,
+            gen,
+            invalid_ind,
+            rndstate,
+            failures=None,
+            evaluated=None):
         """Updates backend. Called after every generation
 
         Parameters
@@ -156,11 +194,30 @@ class BackEnd(object):
             list of deap.creator.Ind whose fitnesses had to be evaluated
         rndstate : tuple
             current state of the random number generator
+        failures : list of dict, optional
+            failed solver runs in this generation, see
+            `rollo.evaluation.Evaluation.failed`
+        evaluated : list, optional
+            [control variable values, output values] of the individuals
+            evaluated in this generation
 
         """
 
         self.results["halloffame"].update(pop)
         record = self.mstats.compile(pop)
+        if self.evaluation_cache is not None:
+            record["cache_hits"] = self.evaluation_cache.hits(gen)
+        if self.records_failures():
+            failures = failures or []
+            # individuals given penalty output values, and runs retried
+            record["failures"] = len(
+                [failure for failure in failures if not failure["retried"]])
+            record["retries"] = len(failures) - record["failures"]
+            record["failure_reasons"] = {}
+            for failure in failures:
+                reason = failure["solver"] + ": " + failure["reason"]
+                record["failure_reasons"][reason] = \
+                    record["failure_reasons"].get(reason, 0) + 1
         self.results["logbook"].record(
             time=time.time() - self.start_time,
             gen=gen,
@@ -172,9 +229,18 @@ class BackEnd(object):
         for ind in pop:
             pop_oup.append(ind.output)
         self.results["all"]["outputs"].append(pop_oup)
+        # resource usage of each command run to evaluate each individual,
+        # empty for individuals that were not evaluated
+        self.results["all"].setdefault("resources", []).append(
+            [getattr(ind, "resources", []) for ind in pop])
+        # every evaluated individual, selected or not
+        self.results["all"].setdefault("evaluated", []).append(
+            evaluated or [])
         evaluator_files = {}
         try:
             for solver in self.input_file["evaluators"]:
+                if "input_script" not in self.input_file["evaluators"][solver]:
+                    continue
                 with open(
                     self.input_file["evaluators"][solver]["input_script"], "r"
                 ) as file:
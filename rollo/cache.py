@@ -0,0 +1,230 @@
+import hashlib
+import sqlite3
+import json
+import os
+
+
+class EvaluationCache(object):
+    """The EvaluationCache class holds a persistent SQLite cache of evaluated
+    individuals' output values. An individual's key is a hash of its rounded
+    control variable values, the contents of every evaluator's template
+    scripts, and every evaluator's execute commands, so a cached result is
+    only reused for the same design evaluated the same way. The cache file
+    survives across ROLLO runs and restarts from a checkpoint file.
+
+    Every lookup is also recorded by generation and individual number, so the
+    number of cache hits in each generation can be added to the logbook.
+
+    Parameters
+    ----------
+    cache_file : str
+        name of SQLite cache file
+    input_evaluators : dict
+        evaluators sub-dictionary from input file
+    output_dict : OrderedDict
+        Ordered dict of output variables as keys and solvers as values
+    significant_digits : int, optional
+        number of significant digits control variable values are rounded to
+        before hashing
+
+    Attributes
+    ----------
+    cache_file : str
+        name of SQLite cache file
+    fingerprint : str
+        hash of the evaluators' template scripts, execute commands, and
+        output variables
+    significant_digits : int
+        number of significant digits control variable values are rounded to
+        before hashing
+
+    """
+
+    def __init__(
+            self,
+            cache_file,
+            input_evaluators,
+            output_dict,
+            significant_digits=12):
+        self.cache_file = cache_file
+        self.significant_digits = significant_digits
+        self.fingerprint = self.evaluators_fingerprint(
+            input_evaluators, output_dict)
+        with self.connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS results "
+                "(key TEXT PRIMARY KEY, output TEXT)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS lookups "
+                "(gen INTEGER, num INTEGER, hit INTEGER, "
+                "PRIMARY KEY (gen, num))")
+        conn.close()
+
+    def connect(self):
+        """Opens a new connection to the cache file. A connection is opened
+        for every operation so the cache can be used from threads and from
+        multiprocessing worker processes alike.
+
+        Returns
+        -------
+        sqlite3.Connection
+
+        """
+        return sqlite3.connect(self.cache_file, timeout=60)
+
+    def evaluators_fingerprint(self, input_evaluators, output_dict):
+        """Returns a hash of every evaluator's template scripts, execute
+        commands, and callable, and of the output variables' order
+
+        Parameters
+        ----------
+        input_evaluators : dict
+            evaluators sub-dictionary from input file
+        output_dict : OrderedDict
+            Ordered dict of output variables as keys and solvers as values
+
+        Returns
+        -------
+        str
+            sha256 hex digest
+
+        """
+        fingerprint = hashlib.sha256()
+        fingerprint.update(json.dumps(list(output_dict)).encode())
+        for solver in sorted(input_evaluators):
+            solver_dict = input_evaluators[solver]
+            fingerprint.update(solver.encode())
+            for key in ["callable", "input_script", "output_script", "execute"]:
+                if key in solver_dict:
+                    fingerprint.update(
+                        json.dumps(solver_dict[key]).encode())
+            scripts = []
+            for key in ["input_script", "output_script"]:
+                if key in solver_dict:
+                    scripts.append(solver_dict[key][1])
+            for executables in solver_dict.get("execute", []):
+                if len(executables) > 1:
+                    scripts.append(executables[1])
+            for script in scripts:
+                if os.path.exists(script):
+                    with open(script, "rb") as fp:
+                        fingerprint.update(fp.read())
+        return fingerprint.hexdigest()
+
+    def key(self, control_vars):
+        """Returns an individual's cache key
+
+        Parameters
+        ----------
+        control_vars : dict
+            multiple layers of dict, from `rollo.evaluation.Evaluation.name_ind`
+            layer 1: solver name
+            layer 2: control parameter str
+            layer 3: control parameter value
+
+        Returns
+        -------
+        str
+            sha256 hex digest
+
+        """
+        rounded = {}
+        for solver in control_vars:
+            rounded[solver] = {}
+            for var, val in control_vars[solver].items():
+                if isinstance(val, float):
+                    val = float("%.*g" % (self.significant_digits, val))
+                rounded[solver][var] = val
+        key = hashlib.sha256(self.fingerprint.encode())
+        key.update(json.dumps(rounded, sort_keys=True).encode())
+        return key.hexdigest()
+
+    def get(self, key):
+        """Returns the cached output values for key
+
+        Parameters
+        ----------
+        key : str
+            cache key from `key`
+
+        Returns
+        -------
+        tuple or None
+            output values ordered by output_dict, None if key is not cached
+
+        """
+        with self.connect() as conn:
+            row = conn.execute(
+                "SELECT output FROM results WHERE key = ?", (key,)).fetchone()
+        conn.close()
+        if row is None:
+            return None
+        return tuple(json.loads(row[0]))
+
+    def put(self, key, output_vals):
+        """Stores an individual's output values
+
+        Parameters
+        ----------
+        key : str
+            cache key from `key`
+        output_vals : tuple
+            output values ordered by output_dict
+
+        """
+        with self.connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO results (key, output) VALUES (?, ?)",
+                (key, json.dumps(
+                    list(output_vals), default=lambda val: val.tolist())))
+        conn.close()
+        return
+
+    def record_lookup(self, gen, num, hit):
+        """Records whether an individual's output values came from the cache
+
+        Parameters
+        ----------
+        gen : int
+            individual's generation
+        num : int
+            individual's number in its generation
+        hit : bool
+            True if the output values came from the cache
+
+        """
+        with self.connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO lookups (gen, num, hit) "
+                "VALUES (?, ?, ?)", (gen, num, int(hit)))
+        conn.close()
+        return
+
+    def clear_lookups(self):
+        """Forgets every recorded lookup, for a new ROLLO run that reuses the
+        cache file. Cached output values are kept."""
+        with self.connect() as conn:
+            conn.execute("DELETE FROM lookups")
+        conn.close()
+        return
+
+    def hits(self, gen):
+        """Returns the number of cache hits in a generation
+
+        Parameters
+        ----------
+        gen : int
+            generation number
+
+        Returns
+        -------
+        int
+            number of individuals whose output values came from the cache
+
+        """
+        with self.connect() as conn:
+            row = conn.execute(
+                "SELECT SUM(hit) FROM lookups WHERE gen = ?",
+                (gen,)).fetchone()
+        conn.close()
+        return int(row[0] or 0)
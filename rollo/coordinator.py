@@ -0,0 +1,170 @@
+from multiprocessing.connection import Listener
+from multiprocessing import AuthenticationError
+from concurrent.futures import Future
+import threading
+import logging
+import queue
+
+
+class Coordinator(object):
+    """The Coordinator class holds a queue of evaluation tasks that
+    `rollo.worker` agents, on this node or on other nodes, connect to over
+    TCP and pull work from. Each connection is authenticated with authkey.
+
+    A worker asks for a task, runs it, and sends its result back, with
+    heartbeats while the task runs. If a worker's connection breaks or it
+    sends nothing for heartbeat_timeout seconds, it is considered lost and
+    its task is put back in the queue for another worker.
+
+    Parameters
+    ----------
+    address : tuple
+        (host, port) to listen on, port 0 picks a free port
+    authkey : bytes
+        key workers must know to connect
+    heartbeat_timeout : float, optional
+        seconds without a message after which a busy worker is lost
+
+    Attributes
+    ----------
+    address : tuple
+        (host, port) the coordinator listens on
+    heartbeat_timeout : float
+        seconds without a message after which a busy worker is lost
+    tasks : queue.Queue
+        (task id, task) pairs waiting for a worker
+    futures : dict
+        key is task id, value is the concurrent.futures.Future of its result
+    workers : int
+        number of connected workers
+
+    """
+
+    def __init__(self, address, authkey, heartbeat_timeout=30):
+        self.listener = Listener(address, authkey=authkey)
+        self.address = self.listener.address
+        self.heartbeat_timeout = heartbeat_timeout
+        self.tasks = queue.Queue()
+        self.futures = {}
+        self.workers = 0
+        self.next_task_id = 0
+        self.closed = False
+        self.lock = threading.Lock()
+        threading.Thread(target=self.accept_workers, daemon=True).start()
+        logging.info(" Coordinator listening on " + str(self.address[0]) +
+                     ":" + str(self.address[1]))
+
+    def submit(self, task):
+        """Queues a task for the next worker that asks for work
+
+        Parameters
+        ----------
+        task : dict
+            evaluation task, see `rollo.worker.run_task`
+
+        Returns
+        -------
+        concurrent.futures.Future
+            resolves to the task's result
+
+        """
+        with self.lock:
+            task_id = self.next_task_id
+            self.next_task_id += 1
+            future = self.futures[task_id] = Future()
+        self.tasks.put((task_id, task))
+        return future
+
+    def accept_workers(self):
+        """Accepts workers' connections until the coordinator is closed,
+        serving each one in its own thread"""
+        while not self.closed:
+            try:
+                connection = self.listener.accept()
+            except (OSError, EOFError, AuthenticationError):
+                # closed, or a client failed authentication
+                continue
+            threading.Thread(
+                target=self.serve_worker, args=(connection,),
+                daemon=True).start()
+
+    def serve_worker(self, connection):
+        """Sends tasks to one worker each time it asks for work and
+        resolves their futures with its results. A task in progress when
+        the worker is lost is queued again.
+
+        Parameters
+        ----------
+        connection : multiprocessing.connection.Connection
+            worker's connection
+
+        """
+        with self.lock:
+            self.workers += 1
+        task_id = None
+        try:
+            while not self.closed:
+                message = connection.recv()
+                if message[0] != "ready":
+                    continue
+                task_id, task = self.next_task()
+                if task_id is None:
+                    break
+                connection.send(("task", task_id, task))
+                while True:
+                    if not connection.poll(self.heartbeat_timeout):
+                        raise ConnectionError(
+                            "no heartbeat for " +
+                            str(self.heartbeat_timeout) + " seconds")
+                    message = connection.recv()
+                    if message[0] == "result":
+                        self.resolve(task_id, message[2])
+                        task_id = None
+                        break
+        except (EOFError, OSError) as error:
+            if task_id is not None:
+                logging.warning(" Worker lost (" + str(error) + "), task " +
+                                str(task_id) + " is queued again")
+                self.tasks.put((task_id, task))
+        finally:
+            with self.lock:
+                self.workers -= 1
+            connection.close()
+
+    def next_task(self):
+        """Returns the next (task id, task) pair whose result is still
+        needed, or (None, None) once the coordinator is closed"""
+        while not self.closed:
+            try:
+                task_id, task = self.tasks.get(timeout=1)
+            except queue.Empty:
+                continue
+            future = self.futures.get(task_id)
+            if future is not None and not future.done():
+                return task_id, task
+            with self.lock:
+                # cancelled by the evaluation that submitted it
+                self.futures.pop(task_id, None)
+        return None, None
+
+    def resolve(self, task_id, result):
+        """Sets a task's result, unless another worker already finished it
+
+        Parameters
+        ----------
+        task_id : int
+            task id from `submit`
+        result : dict
+            task's result from `rollo.worker.run_task`
+
+        """
+        with self.lock:
+            future = self.futures.pop(task_id, None)
+        if future is not None and not future.done():
+            future.set_result(result)
+
+    def close(self):
+        """Stops accepting workers. Connected workers exit once they ask
+        for more work."""
+        self.closed = True
+        self.listener.close()
@@ -0,0 +1,171 @@
+from concurrent.futures import wait
+import subprocess
+import logging
+import time
+import os
+from .coordinator import Coordinator
+
+# files a rollo.worker sends back for parallel_method=distributed
+DISTRIBUTED_RETURN_FILES = [
+    "*_output.json", "*_out.txt", "rollo_job_returncodes.txt"]
+
+
+class DistributedEvaluation(object):
+    """The DistributedEvaluation class holds the `rollo.evaluation.Evaluation`
+    methods for parallel_method=distributed: each individual is a task of a
+    `rollo.coordinator.Coordinator` queue, run by whichever `rollo.worker`
+    asks for work.
+
+    """
+
+    def start_coordinator(self):
+        """Starts the coordinator that rollo.worker agents connect to, if it
+        is not running. It listens on the loopback interface unless the
+        distributed address says otherwise. Workers authenticate with the
+        distributed authkey, or with the ROLLO_AUTHKEY environment variable
+        if it is not defined, so the authkey must be kept secret.
+
+        Returns
+        -------
+        None
+
+        """
+        if self.coordinator is not None:
+            return
+        authkey = self.distributed.get(
+            "authkey", os.environ.get("ROLLO_AUTHKEY"))
+        if authkey is None:
+            raise Exception(
+                "parallel method = distributed needs an authkey in the " +
+                "algorithm's distributed settings or the ROLLO_AUTHKEY " +
+                "environment variable")
+        host, port = self.distributed.get(
+            "address", "127.0.0.1:6000").rsplit(":", 1)
+        self.coordinator = Coordinator(
+            (host, int(port)),
+            authkey.encode(),
+            self.distributed.get("heartbeat_timeout", 30))
+        return
+
+    def run_distributed_tasks(
+            self,
+            pop,
+            order_of_solvers,
+            control_vars_dict,
+            output_dict,
+            input_evaluators,
+            partial_results_dict):
+        """Evaluates every individual in pop as one task of the coordinator's
+        queue for parallel_method=distributed. Each task carries the
+        individual's directory (rendered scripts and ``rollo_job.sh``, but
+        not its static files) to whichever `rollo.worker` asks for work,
+        and the files the worker sends back are written to the individual's
+        directory before its output values are collected. Files named
+        outside the individual's directory are not written.
+
+        A generation waits for its tasks for at most the distributed
+        ``timeout`` (unbounded if it is not defined), then the individuals
+        whose tasks are unfinished are given penalty output values. While no
+        worker is connected, a warning is logged every heartbeat_timeout
+        seconds.
+
+        Parameters
+        ----------
+        pop : list
+            list of deap.creator.Ind
+        order_of_solvers : list
+            list with solver name at its order index
+        control_vars_dict: dict
+            multiple layers of dicts, see `run_job_control_queue`
+        output_dict : OrderedDict
+            Ordered dict of output variables as keys and solvers as values
+        input_evaluators : dict
+            evaluators sub-dictionary from input file
+        partial_results_dict : dict
+            key is gen_ind dir (str), value is the individual's reused
+            solvers and output values from `partial_results`
+
+        Returns
+        -------
+        all_output_vals : list
+            each index of list contains a tuple of output values from
+            evaluators ordered by output_dict
+
+        """
+        solvers = self.prepare_job_scripts(
+            pop,
+            order_of_solvers,
+            control_vars_dict,
+            output_dict,
+            input_evaluators,
+            partial_results_dict)
+        static_files = set()
+        for solver in self.static_files:
+            static_files.update(self.static_files[solver])
+        futures = {}
+        for path in solvers:
+            if not solvers[path]:
+                continue
+            files = {}
+            for directory, _, names in os.walk(path):
+                for name in names:
+                    file = os.path.join(directory, name)
+                    relative_name = os.path.relpath(file, path)
+                    if relative_name in static_files:
+                        continue
+                    with open(file, "rb") as fp:
+                        files[relative_name] = fp.read()
+            futures[path] = self.coordinator.submit({
+                "name": os.path.basename(path),
+                "files": files,
+                "static_files": sorted(static_files),
+                "command": "bash rollo_job.sh",
+                "return_files": self.distributed.get(
+                    "return_files", DISTRIBUTED_RETURN_FILES)})
+        timeout = self.distributed.get("timeout")
+        start_time = time.time()
+        pending = set(futures.values())
+        while pending:
+            wait_time = self.coordinator.heartbeat_timeout
+            if timeout is not None:
+                wait_time = min(
+                    wait_time, max(timeout - (time.time() - start_time), 0))
+            finished, pending = wait(pending, timeout=wait_time)
+            if not pending or (timeout is not None and
+                               time.time() - start_time >= timeout):
+                break
+            if self.coordinator.workers == 0:
+                logging.warning(" No worker is connected to the coordinator" +
+                                " at " + str(self.coordinator.address[0]) +
+                                ":" + str(self.coordinator.address[1]) +
+                                ", " + str(len(pending)) +
+                                " tasks are waiting")
+        for path, future in futures.items():
+            # unfinished tasks are cancelled, so no worker picks them up
+            if future.cancel():
+                partial_results_dict[path] = (
+                    partial_results_dict[path][0],
+                    self.timed_out(path, "distributed",
+                                   subprocess.TimeoutExpired(
+                                       "bash rollo_job.sh", timeout),
+                                   partial_results_dict[path][1]))
+                continue
+            result = future.result()
+            if "error" in result:
+                logging.warning(" Worker failed to run " + path + ":\n" +
+                                result["error"])
+            directory = os.path.realpath(path)
+            for name, content in result["files"].items():
+                file = os.path.join(path, name)
+                if os.path.commonpath(
+                        [directory, os.path.realpath(file)]) != directory:
+                    logging.warning(" Worker returned " + name + " for " +
+                                    path + ", outside its directory, it " +
+                                    "was not written")
+                    continue
+                os.makedirs(os.path.dirname(file), exist_ok=True)
+                with open(file, "wb") as fp:
+                    fp.write(content)
+        return self.collect_job_output_vals(
+            pop, solvers, control_vars_dict, output_dict,
+            partial_results_dict)
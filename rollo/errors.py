@@ -0,0 +1,4 @@
+class SolverError(Exception):
+    """Raised when a solver's command exits with a non-zero code (for
+    evaluators defined with retries or penalty) or its output values cannot
+    be read"""
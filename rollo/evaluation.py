@@ -1,14 +1,92 @@
 import os
+import sys
+import importlib
+import importlib.util
 import subprocess
+import asyncio
+import shlex
 import ast
+import json
 import shutil
 import time
+import signal
+import tempfile
+import threading
+import stat
+import functools
+import contextlib
+import contextvars
 import jinja2
-from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 import logging
+from .warm_workers import WarmWorkerPool
+from .resource_pool import ResourcePool, format_cpu_list, read_numa_nodes
+from .archive import append_directory, archive_extension, read_file, \
+    extract_files
+from .errors import SolverError
+from .job_control import JobControlEvaluation
+from .async_evaluation import AsyncEvaluation
+from .scheduler import SchedulerEvaluation
+from .distributed import DistributedEvaluation
 
+# (CPUs, NUMA node) the solver run of the current thread or asyncio task is
+# pinned to, see `Evaluation.pin_run`
+PINNED_CPUS = contextvars.ContextVar("pinned_cpus", default=None)
 
-class Evaluation:
+# record of the files each solver produced in an individual's directory,
+# written for reuse_partial_results
+SOLVER_FILES_RECORD = "rollo_solver_files.json"
+
+
+
+class EvaluationOutput(tuple):
+    """An individual's output values, ordered by output_dict, together with
+    the resources its solver runs used. It is a tuple, so it is used like
+    the output values themselves.
+
+    Parameters
+    ----------
+    output_vals : iterable
+        output values ordered by output_dict
+    resources : list of dict, optional
+        resource usage of each command run to evaluate the individual, see
+        `Evaluation.record_usage`
+    failures : list of dict, optional
+        failed solver runs of the individual, see `Evaluation.failed`
+    penalized : bool, optional
+        True if the individual's evaluation timed out or failed, so it was
+        given penalty output values
+    finish_time : float, optional
+        time the individual's evaluation finished, None if it is not known
+
+    Attributes
+    ----------
+    resources : list of dict
+        resource usage of each command run to evaluate the individual
+    failures : list of dict
+        failed solver runs of the individual
+    penalized : bool
+        True if the individual was given penalty output values
+    finish_time : float or None
+        time the individual's evaluation finished
+
+    """
+
+    def __new__(cls, output_vals, resources=None, failures=None,
+                penalized=False, finish_time=None):
+        output = super().__new__(cls, output_vals)
+        output.resources = resources or []
+        output.failures = failures or []
+        output.penalized = penalized
+        output.finish_time = finish_time
+        return output
+
+
+class Evaluation(
+        JobControlEvaluation,
+        AsyncEvaluation,
+        SchedulerEvaluation,
+        DistributedEvaluation):
     """Holds functions that generate and execute the evaluation solver's scripts.
 
     DEAP's (evolutionary algorithm package) fitness evaluator requires an
@@ -17,6 +95,11 @@ class Evaluation:
     runs the nuclear software and returns the required fitness values, defined
     in the input file.
 
+    The methods of the parallel methods that evaluate a whole population at
+    once are inherited from their modules: `rollo.job_control`,
+    `rollo.async_evaluation` (asyncio), `rollo.scheduler`, and
+    `rollo.distributed`.
+
     Attributes
     ----------
     input_scripts : dict
@@ -25,14 +108,247 @@ class Evaluation:
     output_scripts : dict
         key is evaluation software name, value is that evaluation software's
         template output script name
+    callables : dict
+        key is evaluation software name, value is the Python function that
+        evaluates it in-process (only for evaluators defined with callable)
+    batch_scripts : dict
+        key is evaluation software name, value is the script that evaluates
+        every pending individual at once (only for evaluators defined with
+        batch_script)
+    preloads : dict
+        key is evaluation software name, value is the list of modules its
+        warm worker processes preload (only for evaluators defined with
+        preload)
+    warm_workers : rollo.warm_workers.WarmWorkerPool or None
+        persistent Python worker processes that run the input and output
+        scripts of evaluators defined with preload
+    job_control_records : list of dict
+        exit code and runtime of every command run by parallel_method=
+        job_control in the current generation, see
+        `run_job_control_command` and `log_job_control_records`
+    template_cache_dir : str or None
+        directory for jinja2's on-disk template bytecode cache
+    templates : dict
+        key is template script name, value is its compiled jinja2.Template
+    evaluation_cache : rollo.cache.EvaluationCache or None
+        persistent cache of evaluated individuals' output values, consulted
+        before an individual's directory is created
+    reuse_partial_results : bool
+        if True, the leading solvers whose control variables did not change
+        from an individual's parent are not run again; their output values
+        and the files they produced are reused, see `partial_results`
+    artifact_store : rollo.artifact_store.ArtifactStore or None
+        store of files produced by memoized execute steps (evaluators defined
+        with execute_memoize)
+    timeouts : dict
+        key is evaluation software name, value is the seconds after which
+        each of its scripts and execute steps is killed (only for evaluators
+        defined with timeout)
+    penalty_vals : list or None
+        output values, ordered by output_dict, returned for an individual
+        whose evaluation timed out (nan for every output if None)
+    speculative_fraction : float or None
+        fraction of a generation that must finish before duplicates of the
+        slowest individuals still running are started on idle slots, for
+        parallel_method=job_control (no duplicates if None)
+    scratch_parent : str or None
+        the scratch_dir parameter, e.g. /dev/shm
+    scratch_dir : str or None
+        this run's directory (created inside scratch_parent by
+        `make_scratch_dir` when the first individual's directory is named)
+        that individuals' directories are evaluated in. Kept directories are
+        moved to the directory ROLLO runs in. If None, individuals are
+        evaluated in the directory ROLLO runs in.
+    file_operations : concurrent.futures.ThreadPoolExecutor or None
+        background thread that deletes and moves individuals' directories
+        after they are evaluated
+    static_files : dict
+        key is evaluation software name, value is the list of read-only
+        files (e.g. cross section libraries, meshes) linked into every
+        individual's directory (only for evaluators defined with
+        static_files)
+    staged_files : dict
+        key is a static file, execute script, output script, or batch
+        script name, value is the file that is linked into individuals'
+        directories: the file itself, or its read-only copy in static_dir
+        if it is on a different file system, see `stage_files`
+    static_dir : str or None
+        directory the files on a different file system than individuals'
+        directories are copied into: static inside scratch_dir, or a
+        rollo_static_ directory in the directory ROLLO runs in if
+        scratch_dir is None
+    scheduler : dict
+        job array settings for parallel_method=scheduler: ``submit``
+        (command that submits a job script), ``cancel`` (command that
+        cancels a submitted job), ``template`` (jinja2 job script template),
+        ``poll_interval`` and ``timeout`` (seconds)
+    distributed : dict
+        coordinator settings for parallel_method=distributed: ``address``
+        ("host:port"), ``authkey``, ``heartbeat_timeout`` and ``timeout``
+        (seconds), and ``return_files`` (glob patterns of files workers send
+        back)
+    coordinator : rollo.coordinator.Coordinator or None
+        queue of evaluation tasks that rollo.worker agents pull from, for
+        parallel_method=distributed
+    resources : dict
+        key is evaluation software name, value is the (cores, memory_gb)
+        each of its runs uses (only for evaluators defined with cores or
+        memory_gb)
+    node_cores : int
+        cores that concurrent solver runs are packed into
+    node_memory_gb : float
+        memory in GB that concurrent solver runs are packed into
+    resource_pool : rollo.resource_pool.ResourcePool or None
+        reserves each solver run's cores and memory while it runs, if any
+        evaluator is defined with cores or memory_gb or cpu_affinity is True
+    cpu_affinity : bool
+        if True, each solver run's processes are pinned to a disjoint set of
+        CPUs, within one NUMA node when possible
+    numa : bool
+        if True, solver runs pinned to one NUMA node also allocate their
+        memory on it, with numactl
+    affinity_records : list of dict
+        CPUs, NUMA node, and runtime of every pinned solver run, see
+        `pin_run`
+    usage_records : dict
+        key is path name, value is the resource usage of each command run
+        in it that the individual's evaluation has not returned yet, see
+        `record_usage`
+    finish_times : dict
+        key is path name, value is the time the individual's evaluation
+        finished, for parallel methods that evaluate a population, until it
+        is returned
+    retries : dict
+        key is evaluation software name, value is (number of times a failed
+        run is retried, seconds before the first retry) (only for evaluators
+        defined with retries or penalty)
+    penalties : dict
+        key is evaluation software name, value is a dict of output names and
+        the values given to them, instead of penalty_vals, when the solver
+        fails or times out (only for evaluators defined with penalty)
+    failure_records : dict
+        key is path name, value is the failed solver runs of the individual
+        that its evaluation has not returned yet, see `failed`
+    fidelities : dict
+        key is evaluation software name, value is a dict of template variable
+        names and their value at each fidelity level, lowest first (only for
+        evaluators defined with fidelity)
+    fidelity_levels : int
+        number of fidelity levels, 1 if no evaluator defines fidelity
 
     """
 
-    def __init__(self):
+    def __init__(
+            self,
+            template_cache_dir=None,
+            evaluation_cache=None,
+            reuse_partial_results=False,
+            artifact_store=None,
+            penalty_vals=None,
+            speculative_fraction=None,
+            scratch_dir=None,
+            scheduler=None,
+            distributed=None,
+            node_cores=None,
+            node_memory_gb=None,
+            cpu_affinity=False,
+            numa=False):
         self.input_scripts = {}
         self.output_scripts = {}
-
-    def add_evaluator(self, solver_name, input_script, output_script):
+        self.callables = {}
+        self.batch_scripts = {}
+        self.preloads = {}
+        self.warm_workers = None
+        self.job_control_records = []
+        self.template_cache_dir = template_cache_dir
+        self.templates = {}
+        self.jinja_environments = {}
+        self.evaluation_cache = evaluation_cache
+        self.reuse_partial_results = reuse_partial_results
+        self.artifact_store = artifact_store
+        self.timeouts = {}
+        self.penalty_vals = penalty_vals
+        self.speculative_fraction = speculative_fraction
+        self.job_control_processes = {}
+        self.cancellable = False
+        self.cancelled_paths = set()
+        self.timed_out_paths = set()
+        self.failed_paths = set()
+        # guards the per-generation process, cancel, timeout, and failure
+        # state
+        # shared by job_control threads
+        self.job_control_lock = threading.Lock()
+        self.generation = None
+        self.scratch_parent = scratch_dir
+        self.scratch_dir = None
+        self.file_operations = None
+        self.pending_file_operations = {}
+        self.file_operations_lock = threading.Lock()
+        self.pid = os.getpid()
+        self.static_files = {}
+        self.staged_files = {}
+        self.static_dir = None
+        self.scheduler = scheduler or {}
+        self.distributed = distributed or {}
+        self.coordinator = None
+        self.resources = {}
+        self.node_cores = node_cores or os.cpu_count()
+        if node_memory_gb is None:
+            node_memory_gb = os.sysconf("SC_PAGE_SIZE") * \
+                os.sysconf("SC_PHYS_PAGES") / 1024 ** 3
+        self.node_memory_gb = node_memory_gb
+        self.resource_pool = None
+        self.resources_freed = None
+        self.cpu_affinity = cpu_affinity
+        self.numa = numa
+        self.affinity_records = []
+        self.usage_records = {}
+        self.finish_times = {}
+        self.retries = {}
+        self.penalties = {}
+        self.failure_records = {}
+        self.output_names = []
+        self.output_solvers = []
+        self.fidelities = {}
+        self.fidelity_levels = 1
+
+    def __getstate__(self):
+        # compiled templates are recompiled in the process that unpickles
+        state = self.__dict__.copy()
+        state["templates"] = {}
+        state["jinja_environments"] = {}
+        # running processes and threads belong to the process that started
+        # them
+        state["job_control_processes"] = {}
+        state["file_operations"] = None
+        state["pending_file_operations"] = {}
+        state["file_operations_lock"] = None
+        state["job_control_lock"] = None
+        state["coordinator"] = None
+        state["resources_freed"] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.file_operations_lock = threading.Lock()
+        self.job_control_lock = threading.Lock()
+
+    def add_evaluator(
+            self,
+            solver_name,
+            input_script,
+            output_script,
+            evaluator_callable=None,
+            preload=None,
+            timeout=None,
+            static_files=None,
+            batch_script=None,
+            cores=None,
+            memory_gb=None,
+            retries=None,
+            retry_backoff=None,
+            penalty=None,
+            fidelity=None):
         """Adds information about an evaluator to the Evaluation class object
         for later use in eval_fn_generator.
 
@@ -44,6 +360,47 @@ class Evaluation:
             input script name
         output_script : str
             optional output script name
+        evaluator_callable : str, optional
+            "module:function" name of a Python function that accepts the
+            solver's control variable dict and returns its output dict. If
+            defined, the solver is evaluated in-process and input_script and
+            output_script are not used.
+        preload : list of str, optional
+            modules to import once in persistent warm worker processes. If
+            defined, the solver's Python input and output scripts run in
+            those workers instead of in a new interpreter each.
+        timeout : float, optional
+            seconds after which each of the solver's scripts and execute
+            steps is killed and the individual is given penalty_vals
+        static_files : list of str, optional
+            read-only files or directories linked (never copied) into every
+            individual's directory
+        batch_script : list of str, optional
+            1st element: executable, 2nd element: script name. If defined,
+            the script is run once for all the individuals being evaluated,
+            see `run_batch_solvers`, and input_script and output_script are
+            not used.
+        cores : int, optional
+            cores each of the solver's runs uses, exported to its commands
+            as OMP_NUM_THREADS and to its input script template as cores
+        memory_gb : float, optional
+            memory in GB each of the solver's runs uses
+        retries : int, optional
+            number of times a failed run of the solver (a command exits with
+            a non-zero code or the output values cannot be read) is run
+            again before the individual is given penalty output values. If
+            retries or penalty is defined, a failure no longer stops ROLLO.
+        retry_backoff : float, optional
+            seconds before the first retry, doubled for each next retry,
+            defaults to 1
+        penalty : dict, optional
+            output names and the values given to them when the solver fails
+            or times out, instead of penalty_vals
+        fidelity : dict, optional
+            template variable names (e.g. particles) and their value at each
+            fidelity level, lowest first. An individual is evaluated at the
+            level in its fidelity attribute, at the highest level if it has
+            none, see `name_ind`.
 
         """
         self.input_scripts[solver_name] = input_script
@@ -51,8 +408,621 @@ class Evaluation:
             self.output_scripts[solver_name] = output_script
         except BaseException:
             pass
+        # compile the input script template once for all individuals
+        if input_script and os.path.exists(input_script[1]):
+            self.get_template(input_script[1])
+        if evaluator_callable:
+            self.callables[solver_name] = self.load_callable(
+                evaluator_callable)
+        if preload:
+            self.preloads[solver_name] = list(preload)
+        if timeout:
+            self.timeouts[solver_name] = timeout
+        if static_files:
+            self.static_files[solver_name] = list(static_files)
+        if batch_script:
+            self.batch_scripts[solver_name] = list(batch_script)
+        if cores or memory_gb:
+            self.resources[solver_name] = (cores or 1, memory_gb or 0)
+        if retries is not None or penalty is not None:
+            self.retries[solver_name] = (
+                retries or 0, 1 if retry_backoff is None else retry_backoff)
+        if penalty:
+            self.penalties[solver_name] = dict(penalty)
+        if fidelity:
+            self.fidelities[solver_name] = {
+                var: list(values) for var, values in fidelity.items()}
+            self.fidelity_levels = max(
+                [self.fidelity_levels] +
+                [len(values) for values in fidelity.values()])
+        return
+
+    def load_callable(self, evaluator_callable):
+        """Imports and returns the Python function named by
+        evaluator_callable. A module whose file is in the directory ROLLO
+        runs from is imported from that file, without changing sys.path;
+        other modules are imported as installed.
+
+        Parameters
+        ----------
+        evaluator_callable : str
+            "module:function" name of a Python function
+
+        Returns
+        -------
+        function
+            function that accepts a control variable dict and returns an
+            output dict
+
+        """
+        module_name, function_name = evaluator_callable.split(":")
+        module_file = os.path.join(*module_name.split(".")) + ".py"
+        if module_name in sys.modules or not os.path.isfile(module_file):
+            function = importlib.import_module(module_name)
+        else:
+            spec = importlib.util.spec_from_file_location(
+                module_name, os.path.abspath(module_file))
+            function = importlib.util.module_from_spec(spec)
+            # registered, so the function can be pickled by reference
+            sys.modules[module_name] = function
+            try:
+                spec.loader.exec_module(function)
+            except BaseException:
+                del sys.modules[module_name]
+                raise
+        for attribute in function_name.split("."):
+            function = getattr(function, attribute)
+        return function
+
+    def run_callable(self, output_vals, solver, output_dict, control_vars):
+        """Evaluates a solver defined with a Python callable in-process and
+        returns a populated list with output values for that solver
+
+        Parameters
+        ----------
+        output_vals : list
+            list of Nones with length corresponding to number of output values
+        solver : str
+            name of solver
+        output_dict : OrderedDict
+            Ordered dict of output variables as keys and solvers as values
+        control_vars : dict
+            multiple layers of dict
+            layer 1: solver name
+            layer 2: control parameter str
+            layer 3: control parameter value
+
+        Returns
+        -------
+        output_vals : list
+            output values requested by rollo input file in correct order
+
+        """
+        oup_results = self.callables[solver](dict(control_vars[solver]))
+        return self.assign_output_vals(
+            output_vals, solver, output_dict, control_vars, oup_results)
+
+    def start_resource_pool(self):
+        """Creates the resource pool that packs concurrent solver runs into
+        node_cores and node_memory_gb, if any evaluator is defined with cores
+        or memory_gb or cpu_affinity is True. With cpu_affinity, the pool
+        hands out the first node_cores CPUs this process may run on.
+
+        Returns
+        -------
+        None
+
+        """
+        if self.resource_pool is not None or \
+                not (self.resources or self.cpu_affinity):
+            return
+        for solver, (cores, memory_gb) in self.resources.items():
+            if cores > self.node_cores or memory_gb > self.node_memory_gb:
+                logging.warning(
+                    " Solver: " + solver + " requests " + str(cores) +
+                    " cores and " + str(memory_gb) + " GB, more than the " +
+                    "node's " + str(self.node_cores) + " cores and " +
+                    str(round(self.node_memory_gb, 1)) + " GB; its runs " +
+                    "will run alone")
+        if not self.cpu_affinity:
+            self.resource_pool = ResourcePool(
+                self.node_cores, self.node_memory_gb)
+            return
+        cpus = sorted(os.sched_getaffinity(0))[:self.node_cores]
+        if self.numa and shutil.which("numactl") is None:
+            logging.warning(
+                " numactl is not installed, solver runs are pinned to " +
+                "CPUs but their memory is not bound to a NUMA node")
+            self.numa = False
+        self.resource_pool = ResourcePool(
+            len(cpus), self.node_memory_gb, cpus, read_numa_nodes())
+        return
+
+    def cpu_slots(self, processes=None):
+        """Returns disjoint sets of CPUs for the worker processes of
+        parallel_method=multiprocessing, so each process pins its solver
+        runs to its own CPUs, or None if cpu_affinity is False
+
+        Parameters
+        ----------
+        processes : int, optional
+            number of worker processes, defaults to one per CPU
+
+        Returns
+        -------
+        list or None
+            lists of CPU ids, one per process
+
+        """
+        if not self.cpu_affinity:
+            return None
+        self.start_resource_pool()
+        return self.resource_pool.slots(
+            processes or len(self.resource_pool.cpus))
+
+    def max_concurrent_runs(self):
+        """Returns how many runs of the most demanding solver (by cores and
+        by memory) fit on the node at once, or None if no evaluator is
+        defined with cores or memory_gb
+
+        Returns
+        -------
+        int or None
+
+        """
+        if not self.resources:
+            return None
+        runs = self.node_cores // max(
+            cores for cores, _ in self.resources.values())
+        memory_gb = max(memory_gb for _, memory_gb in self.resources.values())
+        if memory_gb > 0:
+            runs = min(runs, int(self.node_memory_gb // memory_gb))
+        return max(runs, 1)
+
+    def solver_resources(self, solver):
+        """Returns the cores and memory each of a solver's runs uses, one
+        core and no memory if the evaluator does not define them
+
+        Parameters
+        ----------
+        solver : str
+            name of solver
+
+        Returns
+        -------
+        tuple
+            (cores, memory_gb)
+
+        """
+        return self.resources.get(solver, (1, 0))
+
+    @contextlib.contextmanager
+    def reserve_resources(self, solver, path):
+        """Context manager that holds a solver run's cores and memory while
+        its block runs, waiting until they are free. With cpu_affinity, the
+        processes started in the block are pinned to the run's CPUs.
+
+        Parameters
+        ----------
+        solver : str
+            name of solver
+        path : str
+            path name of the individual (or batch) the run evaluates
+
+        """
+        if self.resource_pool is None:
+            yield
+            return
+        cores, memory_gb = self.solver_resources(solver)
+        with self.resource_pool.reserve(cores, memory_gb) as cpus:
+            with self.pin_run(path, solver, cpus):
+                yield
+
+    @contextlib.contextmanager
+    def pin_run(self, path, solver, cpus):
+        """Context manager that pins the processes a solver run starts in its
+        block (in this thread or asyncio task) to cpus, and appends the run's
+        CPUs, NUMA node, and runtime to affinity_records
+
+        Parameters
+        ----------
+        path : str
+            path name of the individual (or batch) the run evaluates
+        solver : str
+            name of solver
+        cpus : list of int
+            CPUs reserved for the run, nothing is pinned if empty
+
+        """
+        if not cpus:
+            yield
+            return
+        numa_node = self.resource_pool.numa_node(cpus)
+        token = PINNED_CPUS.set((cpus, numa_node))
+        start_time = time.time()
+        try:
+            yield
+        finally:
+            PINNED_CPUS.reset(token)
+            self.affinity_records.append({
+                "path": path,
+                "solver": solver,
+                "cpus": cpus,
+                "numa_node": numa_node,
+                "runtime": time.time() - start_time,
+            })
+            logging.info(" " + path + " " + solver + " ran on CPUs " +
+                         format_cpu_list(cpus) + ", NUMA node " +
+                         str(numa_node))
+
+    def pin_child(self):
+        """Returns the preexec_fn that pins a solver process to the CPUs of
+        the current solver run. It runs in the child process before the
+        command starts, so no thread of ROLLO is ever pinned.
+
+        Returns
+        -------
+        function or None
+            None if the current solver run is not pinned
+
+        """
+        cpus = self.pinned_cpus()
+        if cpus is None:
+            return None
+        return functools.partial(os.sched_setaffinity, 0, cpus)
+
+    def pinned_cpus(self):
+        """Returns the CPUs of the current solver run, which its processes
+        (and the scripts it runs in warm worker processes) are pinned to
+
+        Returns
+        -------
+        list of int or None
+            None if the current solver run is not pinned
+
+        """
+        pinned_cpus = PINNED_CPUS.get()
+        if pinned_cpus is None:
+            return None
+        return pinned_cpus[0]
+
+    def numactl_args(self):
+        """Returns the numactl arguments that bind the current solver run's
+        processes and memory to its NUMA node, if numa is True
+
+        Returns
+        -------
+        list of str
+            empty if numa is False or the run is not on one NUMA node
+
+        """
+        pinned_cpus = PINNED_CPUS.get()
+        if not self.numa or pinned_cpus is None or pinned_cpus[1] is None:
+            return []
+        cpus, numa_node = pinned_cpus
+        return ["numactl", "--physcpubind=" + format_cpu_list(cpus),
+                "--membind=" + str(numa_node)]
+
+    def numactl_command(self, command):
+        """Returns a bash command wrapped in numactl, see `numactl_args`
+
+        Parameters
+        ----------
+        command : str
+            bash command
+
+        Returns
+        -------
+        str
+
+        """
+        args = self.numactl_args()
+        if not args:
+            return command
+        return " ".join(args) + " bash -c " + shlex.quote(command)
+
+    def solver_env(self, solver):
+        """Returns the environment a solver's commands run with:
+        OMP_NUM_THREADS set to its cores if the evaluator defines cores,
+        else None (the current environment)
+
+        Parameters
+        ----------
+        solver : str
+            name of solver
+
+        Returns
+        -------
+        dict or None
+
+        """
+        if solver not in self.resources:
+            return None
+        return dict(os.environ, OMP_NUM_THREADS=str(self.resources[solver][0]))
+
+    def run_batch_solvers(self, pop, control_vars_dict, output_dict, keep):
+        """Evaluates every solver defined with a batch script for all the
+        individuals in pop with one run of the script each. Batch solvers
+        only read control variables, so they run before the individuals'
+        other solvers (input validation requires their order to be lower).
+        A failed run (non-zero exit code, or missing or short
+        batch_output.jsonl) is retried and penalized for every individual in
+        the batch like any solver's, see `failed`.
+
+        For each batch solver, a ``<gen>_<solver>_batch_*`` directory is
+        created with ``batch_input.jsonl``, one JSON dictionary of the
+        solver's control variables per individual, in pop's order. The
+        script runs in that directory and must write ``batch_output.jsonl``,
+        one row per individual in the same order. A row is either a
+        dictionary of output parameter names and values, or a list of the
+        values of the solver's outputs that are not control variables, in
+        output_dict's order.
+
+        Parameters
+        ----------
+        pop : list
+            list of deap.creator.Ind
+        control_vars_dict: dict
+            key is gen_ind dir (str), value is the individual's control
+            variables from `name_ind`
+        output_dict : OrderedDict
+            Ordered dict of output variables as keys and solvers as values
+        keep : bool
+            if True, the batch directories are kept
+
+        Returns
+        -------
+        dict
+            key is gen_ind dir (str), value is a list of the individual's
+            output values ordered by output_dict, None for outputs of other
+            solvers (empty if no solver is defined with a batch script)
+
+        """
+        batch_output_vals = {}
+        if not self.batch_scripts or not pop:
+            return batch_output_vals
+        paths = [self.ind_path(ind) for ind in pop]
+        for ind_path in paths:
+            batch_output_vals[ind_path] = [None] * len(output_dict)
+        for solver in self.batch_scripts:
+            path = tempfile.mkdtemp(
+                prefix=str(pop[0].gen) + "_" + solver + "_batch_",
+                dir=self.make_scratch_dir() or ".")
+            with open(os.path.join(path, "batch_input.jsonl"), "w") as fp:
+                for ind_path in paths:
+                    fp.write(json.dumps(
+                        control_vars_dict[ind_path][solver]) + "\n")
+            self.link_file(self.batch_scripts[solver][1], path)
+            attempt = 0
+            while True:
+                try:
+                    rows = self.run_batch_script(path, solver, len(paths))
+                    break
+                except subprocess.TimeoutExpired as error:
+                    for ind_path in paths:
+                        batch_output_vals[ind_path] = self.timed_out(
+                            ind_path, solver, error,
+                            batch_output_vals[ind_path])
+                    rows = []
+                    break
+                except SolverError as error:
+                    # every individual in the batch failed with the run
+                    delays = [self.failed(ind_path, solver, attempt, error)
+                              for ind_path in paths]
+                if delays[0] is None:
+                    for ind_path in paths:
+                        batch_output_vals[ind_path] = \
+                            self.solver_penalty_vals(
+                                solver, batch_output_vals[ind_path])
+                    rows = []
+                    break
+                time.sleep(delays[0])
+                attempt += 1
+            for ind_path, row in zip(paths, rows):
+                if self.is_penalized(ind_path):
+                    continue
+                if isinstance(row, list):
+                    control_vars = control_vars_dict[ind_path][solver]
+                    row = dict(zip(
+                        [var for var in output_dict if output_dict[var] ==
+                         solver and var not in control_vars], row))
+                self.assign_output_vals(
+                    batch_output_vals[ind_path], solver, output_dict,
+                    control_vars_dict[ind_path], row)
+            self.finish_ind_directory(path, keep)
+        return batch_output_vals
+
+    def run_batch_script(self, path, solver, num_rows):
+        """Runs a solver's batch script once in its batch directory and
+        returns the rows it wrote
+
+        Parameters
+        ----------
+        path : str
+            batch directory's path name
+        solver : str
+            name of solver
+        num_rows : int
+            number of individuals in the batch
+
+        Returns
+        -------
+        list
+            each row is a dict or a list of output values
+
+        Raises
+        ------
+        rollo.evaluation.SolverError
+            if the script exited with a non-zero code (for solvers defined
+            with retries or penalty), or did not write num_rows rows
+        subprocess.TimeoutExpired
+            if the script was killed after the solver's timeout
+
+        """
+        command = " ".join(self.batch_scripts[solver])
+        result_file = os.path.join(path, "batch_output.jsonl")
+        # a retried run must not read the rows of the run that failed
+        if os.path.exists(result_file):
+            os.remove(result_file)
+        with self.reserve_resources(solver, path):
+            returncode = self.subprocess_call(
+                path, "batch_script_out.txt", command,
+                self.timeouts.get(solver), self.solver_env(solver))
+        if returncode != 0:
+            logging.warning(" Solver: " + solver + ", command '" +
+                            command + "' exited with code " +
+                            str(returncode) + " in " + path)
+        self.check_returncode(path, solver, command, returncode)
+        rows = self.read_batch_results(path, solver)
+        if len(rows) != num_rows:
+            raise SolverError(
+                "ROLLO expected " + str(num_rows) + " rows in " +
+                result_file + " from solver: " + solver +
+                ", but found " + str(len(rows)))
+        return rows
+
+    def read_batch_results(self, path, solver):
+        """Returns the rows written by a solver's batch script
+
+        Parameters
+        ----------
+        path : str
+            batch directory's path name
+        solver : str
+            name of solver
+
+        Returns
+        -------
+        list
+            each row is a dict or a list of output values
+
+        """
+        result_file = os.path.join(path, "batch_output.jsonl")
+        if not os.path.exists(result_file):
+            raise SolverError("ROLLO could not find " + result_file +
+                              " written by the batch script of solver: " +
+                              solver)
+        rows = []
+        with open(result_file) as fp:
+            for line in fp:
+                if line.strip():
+                    rows.append(json.loads(line))
+        return rows
+
+    def merge_output_vals(self, output_vals, new_output_vals):
+        """Copies the values in new_output_vals that are not None into
+        output_vals
+
+        Parameters
+        ----------
+        output_vals : list
+            output values ordered by output_dict
+        new_output_vals : list
+            output values ordered by output_dict, None for values that are
+            kept
+
+        Returns
+        -------
+        output_vals : list
+            output values ordered by output_dict
+
+        """
+        for i, val in enumerate(new_output_vals):
+            if val is not None:
+                output_vals[i] = val
+        return output_vals
+
+    def uses_warm_worker(self, solver, script):
+        """Returns True if script (a 2-element input_script or output_script
+        list) runs in a warm worker process
+
+        Parameters
+        ----------
+        solver : str
+            name of solver
+        script : list of str
+            1st element: executable, 2nd element: script name
+
+        Returns
+        -------
+        bool
+
+        """
+        return solver in self.preloads and \
+            os.path.basename(script[0]).startswith("python")
+
+    def start_warm_workers(self, max_workers=None):
+        """Creates the warm worker processes' pool for evaluators defined with
+        preload. The workers themselves start on first use.
+
+        Parameters
+        ----------
+        max_workers : int, optional
+            number of worker processes, defaults to the number of CPUs
+
+        Returns
+        -------
+        None
+
+        """
+        if self.preloads and self.warm_workers is None:
+            modules = []
+            for solver in self.preloads:
+                for module in self.preloads[solver]:
+                    if module not in modules:
+                        modules.append(module)
+            self.warm_workers = WarmWorkerPool(
+                modules, max_workers or os.cpu_count())
+        return
+
+    def run_script(self, path, out_file, solver, script):
+        """Runs an input or output script in an individual's directory, in a
+        warm worker process if the solver preloads modules, else in bash
+
+        Parameters
+        ----------
+        path : str
+            path name
+        out_file : str
+            txt file (relative to path) to output script's stderror and
+            stdoutput to
+        solver : str
+            name of solver
+        script : list of str
+            1st element: executable, 2nd element: script name
+
+        Returns
+        -------
+        None
+
+        """
+        if self.uses_warm_worker(solver, script):
+            self.start_warm_workers()
+            returncode = self.warm_workers.run(
+                path, out_file, script[1], self.timeouts.get(solver),
+                self.pinned_cpus(), self.solver_env(solver))
+        else:
+            returncode = self.subprocess_call(
+                path, out_file, script[0] + " " + script[1],
+                self.timeouts.get(solver), self.solver_env(solver), solver)
+        self.check_returncode(path, solver, " ".join(script), returncode)
         return
 
+    def needs_directory(self):
+        """Returns True if any solver runs in an individual's directory,
+        False if every solver is a Python callable or a batch script
+
+        Returns
+        -------
+        bool
+
+        """
+        for solver in self.input_scripts:
+            if solver not in self.callables and \
+                    solver not in self.batch_scripts:
+                return True
+        return False
+
     def eval_fn_generator(
             self,
             control_dict,
@@ -60,15 +1030,23 @@ class Evaluation:
             input_evaluators,
             gens,
             parallel_method,
-            keep_files):
-        """if parallel_method is none or multiprocessing, this function
-        returns a function that accepts a DEAP individual and returns a
-        tuple of output values listed in outputs
-
-        if parallel_method is job_control, this function returns a function
-        that accepts a list of DEAP individuals (population) and returns
-        a list of output value tuples. Each tuple corresponds to one
-        individual
+            keep_files,
+            max_concurrent_evaluations=None):
+        """if parallel_method is none, multiprocessing, or threads, this
+        function returns a function that accepts a DEAP individual and returns
+        a tuple of output values listed in outputs. The returned function
+        only works with explicit per-individual paths (it never changes the
+        working directory), so it can be called concurrently from a thread
+        pool.
+
+        if parallel_method is job_control, asyncio, scheduler, or
+        distributed, this function returns a function that accepts a list of
+        DEAP individuals (population) and returns a list of output value
+        tuples. Each tuple corresponds to one individual. Each individual's
+        ordered chain of solvers runs as its own task (a job array task for
+        scheduler, a worker's task for distributed), so an individual can
+        start its next solver while others are still running their previous
+        one.
 
         Parameters
         ----------
@@ -81,8 +1059,15 @@ class Evaluation:
             evaluators sub-dictionary from input file
         gens : int
             total generations in simulation (defined in input file)
-        parallel_method : {'none', 'multiprocessing', 'job_control'}
+        parallel_method : {'none', 'multiprocessing', 'threads', 'job_control',
+                           'asyncio', 'scheduler', 'distributed'}
             parallelization method
+        keep_files : {'none', 'only_final', 'all', 'archive'}
+            which individuals' directories to keep
+        max_concurrent_evaluations : int, optional
+            maximum number of individuals evaluated at the same time for
+            parallel_method=asyncio or job_control, defaults to the number
+            of CPUs
 
         Returns
         -------
@@ -91,8 +1076,33 @@ class Evaluation:
             output by the software
 
         """
+        if self.penalty_vals is None:
+            self.penalty_vals = [float("nan")] * len(output_dict)
+        self.output_names = list(output_dict)
+        self.output_solvers = list(output_dict.values())
+        self.stage_files(input_evaluators)
+        self.start_resource_pool()
+        if keep_files == "archive" and archive_extension() == ".tar.xz":
+            logging.warning(
+                " zstandard failed to import, archives are compressed " +
+                "with xz")
+        if self.reuse_partial_results and self.artifact_store is None and \
+                keep_files in ["none", "only_final"]:
+            logging.warning(
+                " reuse_partial_results finds the files of a parent's " +
+                "solvers in its kept or archived directory, or in the " +
+                "artifact_store; with keep_files = " + keep_files + " and " +
+                "no artifact_store, no solver will be reused")
+        if parallel_method == "multiprocessing":
+            # made before the evaluator is copied into the processes, so
+            # they share one scratch directory
+            self.make_scratch_dir()
+            # each multiprocessing process evaluates one individual at a time
+            self.start_warm_workers(1)
+        else:
+            self.start_warm_workers(max_concurrent_evaluations)
         if parallel_method == "job_control":
-            def eval_function(pop):
+            def eval_function(pop, required=None):
                 """Accepts a list of DEAP individuals (population) and returns
                 a list of output value tuples. Each tuple corresponds to one
                 individual
@@ -101,46 +1111,56 @@ class Evaluation:
                 ----------
                 pop : list
                     list of deap.creator.Ind
+                required : int, optional
+                    number of individuals that must be evaluated; the rest
+                    are cancelled once that many have finished
 
                 Returns
                 -------
                 all_output_vals : list of tuple
                     each index of list contains a tuple of output values from
-                    evaluators ordered by output_dict
+                    evaluators ordered by output_dict (None for cancelled
+                    individuals)
 
                 """
                 start_time = time.time()
+                self.start_generation(pop[0].gen)
                 order_of_solvers = self.solver_order(input_evaluators)
                 control_vars_dict = {}
-                output_vals_dict = OrderedDict()
+                partial_results_dict = {}
                 for ind in pop:
-                    path = str(ind.gen) + "_" + str(ind.num)
+                    path = self.ind_path(ind)
                     control_vars_dict[path] = self.name_ind(
                         ind, control_dict, input_evaluators)
-                    output_vals_dict[path] = [None] * len(output_dict)
-                    os.mkdir(path)
-
-                for solver in order_of_solvers:
-                    self.create_input_execute_output_scripts(
-                        pop,
-                        solver,
-                        control_vars_dict,
-                        input_evaluators[solver])
-                    self.run_input_and_execute_and_output_scripts(
-                        pop, solver, input_evaluators[solver])
-                    all_output_vals = self.get_output_vals_job_control(
-                        output_vals_dict, pop, solver,
-                        output_dict, control_vars_dict)
-                # remove files
-                if keep_files == "none":
-                    for ind in pop:
-                        path = str(ind.gen) + "_" + str(ind.num)
-                        shutil.rmtree(path)
-                elif keep_files == "only_final":
-                    for ind in pop:
-                        if ind.gen < gens - 1:
-                            path = str(ind.gen) + "_" + str(ind.num)
-                            shutil.rmtree(path)
+                    partial_results_dict[path] = self.partial_results(
+                        ind, control_vars_dict[path], order_of_solvers,
+                        control_dict, output_dict, input_evaluators)
+                    if self.needs_directory():
+                        self.make_ind_directory(
+                            ind, path, order_of_solvers,
+                            partial_results_dict[path][0],
+                            control_vars_dict[path])
+                batch_output_vals = self.run_batch_solvers(
+                    pop, control_vars_dict, output_dict,
+                    keep_files == "all")
+                for path in batch_output_vals:
+                    self.merge_output_vals(
+                        partial_results_dict[path][1],
+                        batch_output_vals[path])
+                all_output_vals = self.run_job_control_queue(
+                    pop,
+                    order_of_solvers,
+                    control_vars_dict,
+                    output_dict,
+                    input_evaluators,
+                    max_concurrent_evaluations,
+                    partial_results_dict,
+                    required)
+                self.log_job_control_records(pop[0].gen)
+                # remove files, cancelled individuals' are already removed
+                self.finish_directories(
+                    [ind for ind, output_vals in zip(pop, all_output_vals)
+                     if output_vals is not None], gens, keep_files)
                 end_time = time.time()
                 logging.info(" Generation: " +
                              str(pop[0].gen) +
@@ -149,267 +1169,1329 @@ class Evaluation:
                                        start_time, 2)) +
                              " seconds")
                 return all_output_vals  # list of tuples
-        else:
-            def eval_function(ind):
-                """Accepts a DEAP individual and returns a tuple of output
-                values listed in outputs
+        elif parallel_method == "asyncio":
+            def eval_function(pop, required=None):
+                """Accepts a list of DEAP individuals (population) and returns
+                a list of output value tuples. Each tuple corresponds to one
+                individual. Each individual's solvers run back to back in an
+                event loop, with at most max_concurrent_evaluations
+                individuals being evaluated at once
 
                 Parameters
                 ----------
-                ind : deap.creator.Ind
-                    created in `rollo.toolbox_generator.ToolboxGenerator`.
-                    It is a list with special attributes.
+                pop : list
+                    list of deap.creator.Ind
+                required : int, optional
+                    number of individuals that must be evaluated; the rest
+                    are cancelled once that many have finished
+
+                Returns
+                -------
+                all_output_vals : list of tuple
+                    each index of list contains a tuple of output values from
+                    evaluators ordered by output_dict (None for cancelled
+                    individuals)
+
+                """
+                start_time = time.time()
+                self.start_generation(pop[0].gen)
+                control_vars_dict = {}
+                for ind in pop:
+                    control_vars_dict[self.ind_path(ind)] = self.name_ind(
+                        ind, control_dict, input_evaluators)
+                batch_output_vals = self.run_batch_solvers(
+                    pop, control_vars_dict, output_dict,
+                    keep_files == "all")
+                all_output_vals = asyncio.run(
+                    self.evaluate_pop_async(
+                        pop,
+                        control_dict,
+                        output_dict,
+                        input_evaluators,
+                        max_concurrent_evaluations,
+                        required,
+                        batch_output_vals))
+                # remove files, cancelled individuals' are already removed
+                self.finish_directories(
+                    [ind for ind, output_vals in zip(pop, all_output_vals)
+                     if output_vals is not None], gens, keep_files)
+                end_time = time.time()
+                logging.info(" Generation: " +
+                             str(pop[0].gen) +
+                             ", Evaluation Total Runtime: " +
+                             str(round(end_time -
+                                       start_time, 2)) +
+                             " seconds")
+                return all_output_vals  # list of tuples
+        elif parallel_method in ["scheduler", "distributed"]:
+            if parallel_method == "distributed":
+                self.start_coordinator()
+
+            def eval_function(pop, required=None):
+                """Accepts a list of DEAP individuals (population) and returns
+                a list of output value tuples. Each tuple corresponds to one
+                individual. The population is submitted to the batch
+                scheduler as one job array, or to the coordinator's queue as
+                one task per individual
+
+                Parameters
+                ----------
+                pop : list
+                    list of deap.creator.Ind
+                required : int, optional
+                    not used, every submitted individual is evaluated
+
+                Returns
+                -------
+                all_output_vals : list of tuple
+                    each index of list contains a tuple of output values from
+                    evaluators ordered by output_dict
+
+                """
+                start_time = time.time()
+                self.start_generation(pop[0].gen)
+                order_of_solvers = self.solver_order(input_evaluators)
+                control_vars_dict = {}
+                partial_results_dict = {}
+                for ind in pop:
+                    path = self.ind_path(ind)
+                    control_vars_dict[path] = self.name_ind(
+                        ind, control_dict, input_evaluators)
+                    partial_results_dict[path] = self.partial_results(
+                        ind, control_vars_dict[path], order_of_solvers,
+                        control_dict, output_dict, input_evaluators)
+                    if self.needs_directory():
+                        self.make_ind_directory(
+                            ind, path, order_of_solvers,
+                            partial_results_dict[path][0],
+                            control_vars_dict[path])
+                batch_output_vals = self.run_batch_solvers(
+                    pop, control_vars_dict, output_dict,
+                    keep_files == "all")
+                for path in batch_output_vals:
+                    self.merge_output_vals(
+                        partial_results_dict[path][1],
+                        batch_output_vals[path])
+                if parallel_method == "distributed":
+                    all_output_vals = self.run_distributed_tasks(
+                        pop,
+                        order_of_solvers,
+                        control_vars_dict,
+                        output_dict,
+                        input_evaluators,
+                        partial_results_dict)
+                else:
+                    all_output_vals = self.run_scheduler_job_array(
+                        pop,
+                        order_of_solvers,
+                        control_vars_dict,
+                        output_dict,
+                        input_evaluators,
+                        partial_results_dict,
+                        keep_files == "all")
+                self.finish_directories(pop, gens, keep_files)
+                end_time = time.time()
+                logging.info(" Generation: " +
+                             str(pop[0].gen) +
+                             ", Evaluation Total Runtime: " +
+                             str(round(end_time -
+                                       start_time, 2)) +
+                             " seconds")
+                return all_output_vals  # list of tuples
+        else:
+            def eval_function(ind):
+                """Accepts a DEAP individual and returns a tuple of output
+                values listed in outputs
+
+                Parameters
+                ----------
+                ind : deap.creator.Ind
+                    created in `rollo.toolbox_generator.ToolboxGenerator`.
+                    It is a list with special attributes.
+
+                Returns
+                -------
+                tuple
+                    output values from evaluators ordered by output_dict
+
+                """
+                self.start_generation(ind.gen)
+                control_vars = self.name_ind(
+                    ind, control_dict, input_evaluators)
+                order_of_solvers = self.solver_order(input_evaluators)
+                reused_solvers, output_vals = self.partial_results(
+                    ind, control_vars, order_of_solvers, control_dict,
+                    output_dict, input_evaluators)
+                path = self.ind_path(ind)
+                needs_directory = self.needs_directory()
+                if needs_directory:
+                    self.make_ind_directory(
+                        ind, path, order_of_solvers, reused_solvers,
+                        control_vars)
+                batch_output_vals = self.run_batch_solvers(
+                    [ind], {path: control_vars}, output_dict,
+                    keep_files == "all")
+                if path in batch_output_vals:
+                    self.merge_output_vals(
+                        output_vals, batch_output_vals[path])
+
+                try:
+                    for solver in order_of_solvers:
+                        if self.is_penalized(path):
+                            break
+                        if solver in reused_solvers or \
+                                solver in self.batch_scripts:
+                            continue
+                        if solver in self.callables:
+                            output_vals = self.run_callable(
+                                output_vals, solver, output_dict, control_vars)
+                            continue
+                        before = self.list_solver_files(path)
+                        output_vals = self.run_with_retries(
+                            path, solver, functools.partial(
+                                self.run_solver_serial, ind, path, solver,
+                                output_vals, output_dict, control_vars,
+                                input_evaluators), output_vals)
+                        self.record_solver_files(
+                            path, solver, before, control_vars,
+                            order_of_solvers)
+                except subprocess.TimeoutExpired as error:
+                    output_vals = self.timed_out(
+                        path, solver, error, output_vals)
+
+                # remove or move files
+                if needs_directory:
+                    self.finish_ind_directory(
+                        path, self.keeps_files(ind, gens, keep_files))
+
+                return tuple(output_vals)
+        eval_function = self.usage_eval_fn(
+            eval_function,
+            parallel_method in [
+                "job_control", "asyncio", "scheduler", "distributed"])
+        if self.evaluation_cache is not None:
+            eval_function = self.cached_eval_fn(
+                eval_function,
+                parallel_method in [
+                    "job_control", "asyncio", "scheduler", "distributed"],
+                control_dict,
+                input_evaluators)
+        return eval_function
+
+    def usage_eval_fn(self, eval_function, accepts_population):
+        """Returns eval_function wrapped so that each individual's output
+        values are returned as an `EvaluationOutput` carrying the resource
+        usage of the commands run to evaluate it, its failed solver runs,
+        whether it was given penalty output values, and when its evaluation
+        finished
+
+        Parameters
+        ----------
+        eval_function : function
+            evaluation function from `eval_fn_generator`
+        accepts_population : bool
+            True if eval_function accepts a list of individuals, False if it
+            accepts one individual
+
+        Returns
+        -------
+        function
+            evaluation function with the same signature as eval_function
+
+        """
+        if accepts_population:
+            def usage_eval_function(pop, required=None):
+                all_output_vals = eval_function(pop, required)
+                for i, ind in enumerate(pop):
+                    path = self.ind_path(ind)
+                    resources = self.usage_records.pop(path, [])
+                    failures = self.failure_records.pop(path, [])
+                    finish_time = self.finish_times.pop(path, None)
+                    if all_output_vals[i] is not None:
+                        all_output_vals[i] = EvaluationOutput(
+                            all_output_vals[i], resources, failures,
+                            self.is_penalized(path), finish_time)
+                return all_output_vals
+        else:
+            def usage_eval_function(ind):
+                output_vals = eval_function(ind)
+                path = self.ind_path(ind)
+                return EvaluationOutput(
+                    output_vals,
+                    self.usage_records.pop(path, []),
+                    self.failure_records.pop(path, []),
+                    self.is_penalized(path),
+                    time.time())
+        return usage_eval_function
+
+    def cached_eval_fn(
+            self,
+            eval_function,
+            accepts_population,
+            control_dict,
+            input_evaluators):
+        """Returns eval_function wrapped so that individuals already in
+        evaluation_cache are not evaluated again. Cached output values are
+        returned without creating the individual's directory or running any
+        solver, and newly evaluated output values are added to the cache.
+
+        Parameters
+        ----------
+        eval_function : function
+            evaluation function from `eval_fn_generator`
+        accepts_population : bool
+            True if eval_function accepts a list of individuals, False if it
+            accepts one individual
+        control_dict : OrderedDict
+            Ordered dict of control variables as keys and a list of their
+            solver and number of variables as each value
+        input_evaluators : dict
+            evaluators sub-dictionary from input file
+
+        Returns
+        -------
+        function
+            evaluation function with the same signature as eval_function
+
+        """
+        cache = self.evaluation_cache
+
+        def ind_key(ind):
+            return cache.key(self.name_ind(ind, control_dict, input_evaluators))
+
+        if accepts_population:
+            def cached_eval_function(pop, required=None):
+                keys = [ind_key(ind) for ind in pop]
+                all_output_vals = [cache.get(key) for key in keys]
+                # evaluate each uncached design once, even if several
+                # individuals (e.g. clones) share it
+                misses = {}
+                for ind, key, output_vals in zip(pop, keys, all_output_vals):
+                    if output_vals is None and key not in misses:
+                        misses[key] = ind
+                new_output_vals = {}
+                if misses:
+                    required_misses = required
+                    if required is not None:
+                        # cached individuals are already finished
+                        required_misses = max(
+                            required - (len(pop) - len(misses)), 0)
+                    new_output_vals = dict(zip(misses, eval_function(
+                        list(misses.values()), required_misses)))
+                    for key, output_vals in new_output_vals.items():
+                        if output_vals is not None and \
+                                not self.is_penalized(
+                                    self.ind_path(misses[key])):
+                            cache.put(key, output_vals)
+                for i, ind in enumerate(pop):
+                    hit = all_output_vals[i] is not None or \
+                        misses.get(keys[i]) is not ind
+                    if all_output_vals[i] is None:
+                        all_output_vals[i] = new_output_vals[keys[i]]
+                    cache.record_lookup(ind.gen, ind.num, hit)
+                return all_output_vals
+        else:
+            def cached_eval_function(ind):
+                key = ind_key(ind)
+                output_vals = cache.get(key)
+                cache.record_lookup(ind.gen, ind.num, output_vals is not None)
+                if output_vals is None:
+                    output_vals = eval_function(ind)
+                    if not self.is_penalized(self.ind_path(ind)):
+                        cache.put(key, output_vals)
+                return output_vals
+        return cached_eval_function
+
+    def partial_results(
+            self,
+            ind,
+            control_vars,
+            order_of_solvers,
+            control_dict,
+            output_dict,
+            input_evaluators):
+        """Returns the leading solvers in order_of_solvers whose control
+        variables are the same for ind and for the parent it was bred from,
+        and a list of output values with those solvers' output values copied
+        from the parent. Solvers are only reused if reuse_partial_results is
+        True and the files they produced for the parent can be found, since
+        later solvers may read them, see `partial_files_source`.
+
+        Parameters
+        ----------
+        ind : deap.creator.Ind
+            Created in `rollo.toolbox_generator.ToolboxGenerator`. It is
+            a list with special attributes.
+        control_vars : dict
+            ind's control variables from `name_ind`
+        order_of_solvers : list
+            list with solver name at its order index
+        control_dict : OrderedDict
+            Ordered dict of control variables as keys and a list of their
+            solver and number of variables as each value
+        output_dict : OrderedDict
+            Ordered dict of output variables as keys and solvers as values
+        input_evaluators : dict
+            evaluators sub-dictionary from input file
+
+        Returns
+        -------
+        reused_solvers : list of str
+            solvers that are not run again
+        output_vals : list
+            output values ordered by output_dict, None for solvers that must
+            run
+
+        """
+        reused_solvers = []
+        output_vals = [None] * len(output_dict)
+        if not self.reuse_partial_results:
+            return reused_solvers, output_vals
+        parent = getattr(ind, "parent", None)
+        if parent is None:
+            return reused_solvers, output_vals
+        parent_control_vars = self.name_ind(
+            parent["vals"], control_dict, input_evaluators)
+        for solver in order_of_solvers:
+            if control_vars[solver] != parent_control_vars[solver]:
+                break
+            reused_solvers.append(solver)
+        source, reused_solvers = self.partial_files_source(
+            parent["path"], reused_solvers, control_vars, order_of_solvers)
+        for solver in reused_solvers:
+            for i, var in enumerate(output_dict):
+                if output_dict[var] == solver:
+                    output_vals[i] = parent["output"][i]
+        return reused_solvers, output_vals
+
+    def partial_files_source(
+            self, name, solvers, control_vars, order_of_solvers):
+        """Returns where the files that solvers produced for an evaluated
+        individual are found, and the leading solvers whose files are found
+        there. The files are searched in the individual's directory, if it
+        still exists (e.g. keep_files=all), then in the artifact store (every
+        solver but the last in order saves its files there), then in its
+        generation's archive (keep_files=archive). The files each solver
+        produced are listed in the directory's SOLVER_FILES_RECORD, which is
+        only written for parallel_method=none, threads, multiprocessing,
+        job_control, and asyncio.
+
+        Parameters
+        ----------
+        name : str
+            gen_ind directory name of the evaluated individual
+        solvers : list of str
+            leading solvers in order_of_solvers to reuse
+        control_vars : dict
+            control variables from `name_ind`, the same as the evaluated
+            individual's for solvers
+        order_of_solvers : list
+            list with solver name at its order index
+
+        Returns
+        -------
+        source : {'directory', 'artifact_store', 'archive'} or None
+            where the files are found
+        reused_solvers : list of str
+            leading solvers whose files are found
+
+        """
+        if not solvers:
+            return None, []
+        path = self.settled_path(name)
+        if path is not None and \
+                os.path.exists(os.path.join(path, SOLVER_FILES_RECORD)):
+            with open(os.path.join(path, SOLVER_FILES_RECORD)) as fp:
+                reused_solvers = self.recorded_solvers(solvers, json.load(fp))
+            if reused_solvers:
+                return "directory", reused_solvers
+        if self.artifact_store is not None:
+            reused_solvers = []
+            for solver in solvers:
+                key = self.partial_results_key(
+                    solver, control_vars, order_of_solvers)
+                if solver not in self.callables and (key is None or not
+                        os.path.isdir(self.artifact_store.entry(key))):
+                    break
+                reused_solvers.append(solver)
+            if reused_solvers:
+                return "artifact_store", reused_solvers
+        archive = self.archive_name(name)
+        record = read_file(archive, name, SOLVER_FILES_RECORD) if \
+            os.path.exists(archive) else None
+        if record is not None:
+            return "archive", self.recorded_solvers(
+                solvers, json.loads(record))
+        return None, []
+
+    def recorded_solvers(self, solvers, record):
+        """Returns the leading solvers whose produced files are in record,
+        callable evaluators produce none
+
+        Parameters
+        ----------
+        solvers : list of str
+            leading solvers in order_of_solvers
+        record : dict
+            key is solver name, value is the list of files it produced
+
+        Returns
+        -------
+        list of str
+
+        """
+        recorded = []
+        for solver in solvers:
+            if solver not in record and solver not in self.callables:
+                break
+            recorded.append(solver)
+        return recorded
+
+    def partial_results_key(self, solver, control_vars, order_of_solvers):
+        """Returns the artifact store key of the files a solver produced,
+        which depend on its and the earlier solvers' control variables and
+        input scripts
+
+        Parameters
+        ----------
+        solver : str
+            name of solver
+        control_vars : dict
+            control variables from `name_ind`
+        order_of_solvers : list
+            list with solver name at its order index
+
+        Returns
+        -------
+        str or None
+            key, None if there is no artifact store or solver is the last in
+            order (no later solver reads its files)
+
+        """
+        i = order_of_solvers.index(solver)
+        if self.artifact_store is None or i == len(order_of_solvers) - 1:
+            return None
+        leading = order_of_solvers[:i + 1]
+        files = []
+        for leading_solver in leading:
+            input_script = self.input_scripts.get(leading_solver)
+            if input_script and len(input_script) > 1:
+                files.append(input_script[1])
+        return self.artifact_store.key(
+            {"partial_results": leading,
+             "depends_on": {s: control_vars[s] for s in leading}}, files)
+
+    def list_solver_files(self, path):
+        """Returns the files in an individual's directory before a solver
+        runs, so the files it produces can be recorded, see
+        `record_solver_files`
+
+        Parameters
+        ----------
+        path : str
+            path name
+
+        Returns
+        -------
+        set or None
+            file names relative to path, without the staged files linked
+            into it (see `stage_files`), None if reuse_partial_results is
+            False
+
+        """
+        if not self.reuse_partial_results or not os.path.isdir(path):
+            return None
+        files = set()
+        for directory, directories, names in os.walk(path):
+            for name in names:
+                files.add(os.path.relpath(os.path.join(directory, name), path))
+        files.discard(SOLVER_FILES_RECORD)
+        return files - {os.path.normpath(file) for file in self.staged_files}
+
+    def record_solver_files(
+            self, path, solver, before, control_vars, order_of_solvers):
+        """Records the files a solver produced in an individual's
+        directory in its SOLVER_FILES_RECORD, and saves them to the artifact
+        store (if there is one), so individuals bred from it can reuse them
+
+        Parameters
+        ----------
+        path : str
+            path name
+        solver : str
+            name of solver
+        before : set or None
+            files in path before the solver ran, from `list_solver_files`
+        control_vars : dict
+            control variables from `name_ind`
+        order_of_solvers : list
+            list with solver name at its order index
+
+        Returns
+        -------
+        None
+
+        """
+        if before is None or self.is_penalized(path) or \
+                self.is_cancelled(path):
+            return
+        produced = sorted(self.list_solver_files(path) - before)
+        self.write_solver_files_record(path, {solver: produced})
+        key = self.partial_results_key(solver, control_vars, order_of_solvers)
+        if key is not None:
+            self.artifact_store.save(key, path, produced)
+        return
+
+    def write_solver_files_record(self, path, solver_files):
+        """Adds solvers' produced files to an individual's
+        SOLVER_FILES_RECORD
+
+        Parameters
+        ----------
+        path : str
+            path name
+        solver_files : dict
+            key is solver name, value is the list of files it produced
+
+        Returns
+        -------
+        None
+
+        """
+        record_file = os.path.join(path, SOLVER_FILES_RECORD)
+        record = {}
+        if os.path.exists(record_file):
+            with open(record_file) as fp:
+                record = json.load(fp)
+        record.update(solver_files)
+        with open(record_file, "w") as fp:
+            json.dump(record, fp)
+        return
+
+    def restore_solver_files(
+            self, name, path, solvers, control_vars, order_of_solvers):
+        """Copies the files that solvers produced for an evaluated
+        individual into another individual's directory, from where
+        `partial_files_source` finds them
+
+        Parameters
+        ----------
+        name : str
+            gen_ind directory name of the evaluated individual
+        path : str
+            path name of the directory the files are copied into
+        solvers : list of str
+            leading solvers in order_of_solvers whose files are copied
+        control_vars : dict
+            control variables from `name_ind`
+        order_of_solvers : list
+            list with solver name at its order index
+
+        Returns
+        -------
+        None
+
+        """
+        source, found_solvers = self.partial_files_source(
+            name, solvers, control_vars, order_of_solvers)
+        solver_files = {}
+        if source == "directory":
+            parent_path = self.settled_path(name)
+            with open(os.path.join(parent_path, SOLVER_FILES_RECORD)) as fp:
+                record = json.load(fp)
+            for solver in found_solvers:
+                solver_files[solver] = record.get(solver, [])
+                for file in solver_files[solver]:
+                    target = os.path.join(path, file)
+                    os.makedirs(os.path.dirname(target), exist_ok=True)
+                    # copied, since later solvers may change them
+                    shutil.copy2(os.path.join(parent_path, file), target)
+        elif source == "artifact_store":
+            for solver in found_solvers:
+                if solver in self.callables:
+                    continue
+                key = self.partial_results_key(
+                    solver, control_vars, order_of_solvers)
+                solver_files[solver] = self.artifact_store.files(key)
+                self.artifact_store.restore(key, path, solver_files[solver])
+        elif source == "archive":
+            archive = self.archive_name(name)
+            record = json.loads(read_file(archive, name, SOLVER_FILES_RECORD))
+            for solver in found_solvers:
+                solver_files[solver] = record.get(solver, [])
+            extract_files(archive, name, [
+                file for files in solver_files.values() for file in files],
+                path)
+        if found_solvers != solvers:
+            logging.warning(" " + path + " could not find the files of " +
+                            ", ".join(solvers[len(found_solvers):]) +
+                            " from " + name)
+        self.write_solver_files_record(path, solver_files)
+        return
+
+    def make_ind_directory(
+            self, ind, path, order_of_solvers, reused_solvers,
+            control_vars=None):
+        """Creates an individual's directory. If solvers are reused from the
+        individual's parent, the files they produced for the parent are
+        copied into it, so they are available to the solvers that run.
+
+        Parameters
+        ----------
+        ind : deap.creator.Ind
+            Created in `rollo.toolbox_generator.ToolboxGenerator`. It is
+            a list with special attributes.
+        path : str
+            path name
+        order_of_solvers : list
+            list with solver name at its order index
+        reused_solvers : list of str
+            solvers reused from the individual's parent, see
+            `partial_results`
+        control_vars : dict, optional
+            control variables from `name_ind`, required if reused_solvers
+            is not empty
+
+        Returns
+        -------
+        None
+
+        """
+        # an earlier directory with the same name may still be being removed
+        self.wait_for_file_operation(os.path.basename(path))
+        os.mkdir(path)
+        self.link_static_files(path)
+        if not reused_solvers:
+            return
+        self.restore_solver_files(
+            ind.parent["path"], path, reused_solvers, control_vars,
+            order_of_solvers)
+        logging.info(" " + path + " reused " + ", ".join(reused_solvers) +
+                     " results from " + ind.parent["path"])
+        return
+
+    def timed_out(self, path, solver, error, output_vals=None):
+        """Records that an individual's evaluation timed out and returns its
+        penalty output values
+
+        Parameters
+        ----------
+        path : str
+            path name
+        solver : str
+            name of solver that timed out
+        error : subprocess.TimeoutExpired
+            raised when the solver's command was killed
+        output_vals : list, optional
+            the individual's output values so far, see
+            `solver_penalty_vals`
+
+        Returns
+        -------
+        list
+            the solver's penalty output values, see `solver_penalty_vals`
+
+        """
+        logging.warning(" Solver: " + solver + ", command '" +
+                        str(error.cmd) + "' was killed after " +
+                        str(error.timeout) + " seconds in " + path)
+        with self.job_control_lock:
+            self.timed_out_paths.add(path)
+        return self.solver_penalty_vals(solver, output_vals)
+
+    def solver_penalty_vals(self, solver, output_vals=None):
+        """Returns the output values given to an individual whose
+        evaluation by a solver timed out or failed. The values earlier
+        solvers already produced are kept; the solver's own outputs, those
+        named in its penalty, and those of the solvers after it, which are
+        skipped, are given penalty values.
+
+        Parameters
+        ----------
+        solver : str
+            name of solver
+        output_vals : list, optional
+            the individual's output values so far, None for outputs not
+            produced yet (every output is penalized if not given)
+
+        Returns
+        -------
+        list
+            penalty_vals, with the values of the solver's penalty (if the
+            evaluator defines one), and the values in output_vals that are
+            kept
+
+        """
+        penalty_vals = list(self.penalty_vals)
+        penalty = self.penalties.get(solver, {})
+        for var, val in penalty.items():
+            penalty_vals[self.output_names.index(var)] = val
+        if output_vals is None:
+            return penalty_vals
+        for i, val in enumerate(output_vals):
+            if val is not None and self.output_solvers[i] != solver and \
+                    self.output_names[i] not in penalty:
+                penalty_vals[i] = val
+        return penalty_vals
+
+    def failed(self, path, solver, attempt, error, retry=True):
+        """Records a failed run of a solver for an individual. Failures of
+        solvers defined without retries or penalty are raised.
+
+        Parameters
+        ----------
+        path : str
+            path name
+        solver : str
+            name of solver
+        attempt : int
+            number of earlier runs of the solver for the individual
+        error : rollo.evaluation.SolverError
+            reason the run failed
+        retry : bool, optional
+            False if the run cannot be retried
+
+        Returns
+        -------
+        float or None
+            seconds to wait before running the solver again, None if its
+            retries are exhausted
+
+        """
+        if solver not in self.retries:
+            raise error
+        retries, retry_backoff = self.retries[solver]
+        retried = retry and attempt < retries
+        self.failure_records.setdefault(path, []).append({
+            "solver": solver,
+            "attempt": attempt,
+            "reason": str(error),
+            "retried": retried,
+        })
+        if retried:
+            delay = retry_backoff * 2 ** attempt
+            logging.warning(" Solver: " + solver + " failed in " + path +
+                            " (" + str(error) + "), retrying in " +
+                            str(delay) + " seconds")
+            return delay
+        logging.warning(" Solver: " + solver + " failed in " + path +
+                        " (" + str(error) + "), the individual is given " +
+                        "penalty output values")
+        # skip the individual's other solvers and do not cache it
+        with self.job_control_lock:
+            self.failed_paths.add(path)
+        return None
+
+    def run_with_retries(self, path, solver, run, output_vals=None):
+        """Returns the output values from run, a solver's run for an
+        individual, running it again after a SolverError as long as the
+        solver has retries left
+
+        Parameters
+        ----------
+        path : str
+            path name
+        solver : str
+            name of solver
+        run : function
+            runs the solver and returns the individual's output values
+        output_vals : list, optional
+            the individual's output values before the solver runs, see
+            `solver_penalty_vals`
+
+        Returns
+        -------
+        list
+            output values from run, or the solver's penalty output values
+            once its retries are exhausted
+
+        """
+        attempt = 0
+        while True:
+            try:
+                return run()
+            except SolverError as error:
+                delay = self.failed(path, solver, attempt, error)
+            if delay is None:
+                return self.solver_penalty_vals(solver, output_vals)
+            time.sleep(delay)
+            attempt += 1
+
+    def check_returncode(self, path, solver, command, returncode):
+        """Raises a SolverError if a command of a solver defined with
+        retries or penalty exited with a non-zero code
+
+        Parameters
+        ----------
+        path : str
+            path name
+        solver : str
+            name of solver
+        command : str
+            command that was run
+        returncode : int
+            its exit code
+
+        Returns
+        -------
+        None
+
+        """
+        if returncode != 0 and solver in self.retries:
+            raise SolverError(
+                "command '" + command + "' exited with code " +
+                str(returncode))
+        return
+
+    def was_timed_out(self, ind):
+        """Returns True if an individual's evaluation timed out, so it was
+        given penalty output values
+
+        Parameters
+        ----------
+        ind : deap.creator.Ind
+            Created in `rollo.toolbox_generator.ToolboxGenerator`. It is
+            a list with special attributes.
+
+        Returns
+        -------
+        bool
+
+        """
+        with self.job_control_lock:
+            return self.ind_path(ind) in self.timed_out_paths
+
+    def was_failed(self, ind):
+        """Returns True if a solver failed for an individual after its
+        retries were exhausted, so it was given penalty output values
+
+        Parameters
+        ----------
+        ind : deap.creator.Ind
+            Created in `rollo.toolbox_generator.ToolboxGenerator`. It is
+            a list with special attributes.
+
+        Returns
+        -------
+        bool
+
+        """
+        with self.job_control_lock:
+            return self.ind_path(ind) in self.failed_paths
+
+    def is_penalized(self, path):
+        """Returns True if an individual's evaluation timed out or failed,
+        so its remaining solvers are skipped and it is not cached
+
+        Parameters
+        ----------
+        path : str
+            path name
+
+        Returns
+        -------
+        bool
+
+        """
+        with self.job_control_lock:
+            return path in self.timed_out_paths or path in self.failed_paths
+
+    def finish_directories(self, pop, gens, keep_files):
+        """Removes individuals' directories, or moves them out of scratch_dir,
+        according to keep_files for evaluation functions that accept a
+        population
+
+        Parameters
+        ----------
+        pop : list
+            list of deap.creator.Ind
+        gens : int
+            total generations in simulation (defined in input file)
+        keep_files : {'none', 'only_final', 'all', 'archive'}
+            which individuals' directories to keep
+
+        Returns
+        -------
+        None
+
+        """
+        if not self.needs_directory():
+            return
+        for ind in pop:
+            self.finish_ind_directory(
+                self.ind_path(ind), self.keeps_files(ind, gens, keep_files))
+        return
+
+    def keeps_files(self, ind, gens, keep_files):
+        """Returns True if an individual's directory is kept, "archive" if
+        it is kept in its generation's archive
+
+        Parameters
+        ----------
+        ind : deap.creator.Ind
+            Created in `rollo.toolbox_generator.ToolboxGenerator`. It is
+            a list with special attributes.
+        gens : int
+            total generations in simulation (defined in input file)
+        keep_files : {'none', 'only_final', 'all', 'archive'}
+            which individuals' directories to keep
+
+        Returns
+        -------
+        bool or str
+
+        """
+        if keep_files == "none":
+            return False
+        if keep_files == "archive":
+            return "archive"
+        if keep_files == "only_final":
+            return ind.gen >= gens - 1
+        return True
+
+    def ind_path(self, ind):
+        """Returns the directory an individual is evaluated in
+
+        Parameters
+        ----------
+        ind : deap.creator.Ind
+            Created in `rollo.toolbox_generator.ToolboxGenerator`. It is
+            a list with special attributes.
+
+        Returns
+        -------
+        str
+            path name, gen_ind inside scratch_dir if it is defined, with a
+            _f<level> suffix if the individual is evaluated below the highest
+            fidelity level, and an _s suffix if it is a speculative duplicate
+            from `duplicate_ind`
+
+        """
+        name = str(ind.gen) + "_" + str(ind.num)
+        fidelity = getattr(ind, "fidelity", None)
+        if fidelity is not None and fidelity < self.fidelity_levels - 1:
+            name += "_f" + str(fidelity)
+        if getattr(ind, "speculative", False):
+            name += "_s"
+        scratch_dir = self.make_scratch_dir()
+        if scratch_dir is None:
+            return name
+        return os.path.join(scratch_dir, name)
+
+    def make_scratch_dir(self):
+        """Returns this run's scratch directory, creating it inside
+        scratch_parent the first time it is needed
+
+        Returns
+        -------
+        str or None
+            path name of scratch_dir, None if scratch_parent is None
+
+        """
+        if self.scratch_dir is None and self.scratch_parent is not None:
+            with self.file_operations_lock:
+                if self.scratch_dir is None:
+                    os.makedirs(self.scratch_parent, exist_ok=True)
+                    # unique per run, so runs sharing a node do not collide
+                    self.scratch_dir = tempfile.mkdtemp(
+                        prefix="rollo_", dir=self.scratch_parent)
+        return self.scratch_dir
+
+    def finish_ind_directory(self, path, keep):
+        """Deletes an evaluated individual's directory, moves it from
+        scratch_dir to the directory ROLLO runs in if it is kept, or packs it
+        into its generation's archive. All run on the file_operations
+        background thread, so they do not add to the evaluation's runtime.
+
+        Parameters
+        ----------
+        path : str
+            path name
+        keep : bool or str
+            True if the individual's directory is kept, "archive" if it is
+            kept in its generation's archive, see `archive_directory`
+
+        Returns
+        -------
+        None
+
+        """
+        name = os.path.basename(path)
+        if keep == "archive":
+            operation = functools.partial(
+                self.archive_directory, path, name)
+        elif keep and self.scratch_dir is None:
+            return
+        elif keep:
+            operation = functools.partial(self.move_directory, path, name)
+        else:
+            operation = functools.partial(
+                shutil.rmtree, path, ignore_errors=True)
+        self.run_file_operation(name, operation)
+        return
+
+    def run_file_operation(self, name, operation):
+        """Runs an operation on an individual's directory on the
+        file_operations background thread
+
+        Parameters
+        ----------
+        name : str
+            gen_ind directory name
+        operation : function
+            accepts no arguments
+
+        Returns
+        -------
+        None
+
+        """
+        if os.getpid() != self.pid:
+            # e.g. a multiprocessing worker, whose threads are never flushed
+            operation()
+            return
+        with self.file_operations_lock:
+            if self.file_operations is None:
+                self.file_operations = ThreadPoolExecutor(max_workers=1)
+            future = self.file_operations.submit(operation)
+            self.pending_file_operations[name] = future
+        return
+
+    def move_directory(self, path, name):
+        """Moves a kept individual's directory from scratch_dir to the
+        directory ROLLO runs in, replacing an older directory with the same
+        name
+
+        Parameters
+        ----------
+        path : str
+            path name inside scratch_dir
+        name : str
+            gen_ind directory name
+
+        Returns
+        -------
+        None
+
+        """
+        if os.path.exists(name):
+            shutil.rmtree(name)
+        shutil.move(path, name)
+        return
+
+    def archive_directory(self, path, name):
+        """Packs an evaluated individual's directory into its generation's
+        archive, archive_<gen>.tar.zst in the directory ROLLO runs in, then
+        deletes it. One individual is extracted from an archive with
+        `rollo.archive.extract_individual`.
+
+        Parameters
+        ----------
+        path : str
+            path name
+        name : str
+            gen_ind directory name
+
+        Returns
+        -------
+        None
+
+        """
+        append_directory(
+            self.archive_name(name), path, name, self.shared_inodes())
+        shutil.rmtree(path, ignore_errors=True)
+        return
+
+    def shared_inodes(self):
+        """Returns the inodes of the files hard-linked into individuals'
+        directories from outside them: staged static files and artifact
+        store files. Archives leave them out, since every individual shares
+        them.
+
+        Returns
+        -------
+        set of tuple
+            (st_dev, st_ino) of each shared file
+
+        """
+        inodes = set()
+        for staged_file in self.staged_files.values():
+            try:
+                file_stat = os.stat(staged_file)
+            except OSError:
+                continue
+            inodes.add((file_stat.st_dev, file_stat.st_ino))
+        if self.artifact_store is not None:
+            inodes |= self.artifact_store.inodes()
+        return inodes
+
+    def archive_name(self, name):
+        """Returns the file name of the archive an individual's directory
+        is packed into, see `archive_directory`
+
+        Parameters
+        ----------
+        name : str
+            gen_ind directory name
+
+        Returns
+        -------
+        str
+
+        """
+        return "archive_" + name.split("_")[0] + archive_extension()
 
-                Returns
-                -------
-                tuple
-                    output values from evaluators ordered by output_dict
+    def settled_path(self, name):
+        """Returns where an evaluated individual's directory is, after its
+        pending move or deletion (if any) has finished
 
-                """
-                control_vars = self.name_ind(
-                    ind, control_dict, input_evaluators)
-                output_vals = [None] * len(output_dict)
-                order_of_solvers = self.solver_order(input_evaluators)
-                path = str(ind.gen) + "_" + str(ind.num)
-                os.mkdir(path)
-
-                for solver in order_of_solvers:
-                    # run input script
-                    self.run_input_script_serial(
-                        solver, control_vars[solver], ind, path)
-                    # run execute if they exist
-                    if "execute" in input_evaluators[solver]:
-                        self.run_execute_serial(
-                            input_evaluators[solver]["execute"], path, solver)
-                    # get output values
-                    output_vals = self.run_output_script_serial(
-                        output_vals, solver, output_dict, control_vars, path
-                    )
-
-                # remove files
-                if keep_files == "none":
-                    shutil.rmtree(path)
-                elif keep_files == "only_final":
-                    if ind.gen < gens - 1:
-                        shutil.rmtree(path)
+        Parameters
+        ----------
+        name : str
+            gen_ind directory name
 
-                return tuple(output_vals)
-        return eval_function
+        Returns
+        -------
+        str or None
+            path name, None if the directory does not exist
 
-    def create_input_execute_output_scripts(
-            self,
-            pop,
-            solver,
-            control_vars_dict,
-            input_evaluators_solver):
-        """Renders input scripts, copies execute scripts, and renders
-        output scripts for parallel_method=job_control in each
-        individual's directory
+        """
+        self.wait_for_file_operation(name)
+        paths = [name]
+        if self.scratch_dir is not None:
+            paths.insert(0, os.path.join(self.scratch_dir, name))
+        for path in paths:
+            if os.path.isdir(path):
+                return path
+        return None
+
+    def wait_for_file_operation(self, name):
+        """Waits for the pending deletion or move of an individual's
+        directory, if there is one
 
         Parameters
         ----------
-        pop : list
-            list of deap.creator.Ind
-        solver : str
-            name of solver
-        control_vars_dict: dict
-            multiple layers of dicts
-            layer 1: gen_ind dir (str)
-            layer 2: solver (str)
-            layer 3: control parameter (str)
-            layer 4: control parameter value (float)
-        input_evaluators_solver: dict
-            specific solver's evaluators sub-sub-dictionary from input file
+        name : str
+            gen_ind directory name
 
         Returns
         -------
         None
 
         """
-        for ind in pop:
-            path = str(ind.gen) + "_" + str(ind.num)
-            self.render_input_script(
-                solver, control_vars_dict[path][solver], ind, path)
-            if "execute" in input_evaluators_solver:
-                self.generate_execute_scripts(
-                    path, input_evaluators_solver["execute"])
-            self.generate_output_script(path, solver)
+        future = self.pending_file_operations.get(name)
+        if future is not None:
+            future.result()
         return
 
-    def run_input_and_execute_and_output_scripts(
-            self, pop, solver, input_evaluators_solver):
-        """Runs input scripts, execute scripts or executable, and
-        output scripts for parallel_method=job_control in each
-        individual's directory
-
-        Parameters
-        ----------
-        pop : list
-            list of deap.creator.Ind
-        solver : str
-            name of solver
-        control_vars_dict: dict
-            multiple layers of dicts
-            layer 1: gen_ind dir (str)
-            layer 2: solver (str)
-            layer 3: control parameter (str)
-            layer 4: control parameter value (float)
-        input_evaluators_solver: dict
-            specific solver's evaluators sub-sub-dictionary from input file
+    def flush_file_operations(self):
+        """Waits for every pending deletion and move of individuals'
+        directories, then removes this run's scratch directory and staged
+        files
 
         Returns
         -------
         None
 
         """
-        # run input script
-        run_input = self.generate_run_command_job_control(
-            pop=pop,
-            solver=solver,
-            single_command=self.input_scripts[solver][0] +
-            " " +
-            self.input_scripts[solver][1] +
-            " > " +
-            solver +
-            "_input_script_out.txt 2>&1")
-        start_time = time.time()
-        subprocess.call(run_input, shell=True)
-        end_time = time.time()
-        logging.info(" Solver: " + solver + ", Input Script Runtime: " +
-                     str(round(end_time - start_time, 2)) + " seconds")
-        # run execute script if exists
-        if "execute" in input_evaluators_solver:
-            for execute_index, executable in enumerate(
-                    input_evaluators_solver["execute"]):
-                single_command = ""
-                for exe in executable:
-                    single_command += exe + " "
-                single_command += "> " + solver + \
-                    "_execute_" + str(execute_index) + "_out.txt 2>&1"
-                execute_input = self.generate_run_command_job_control(
-                    pop=pop,
-                    solver=solver,
-                    single_command=single_command)
-                start_time = time.time()
-                subprocess.call(execute_input, shell=True)
-                end_time = time.time()
-                logging.info(" Solver: " +
-                             solver +
-                             ", Execute Task " +
-                             str(execute_index) +
-                             " Runtime: " +
-                             str(round(end_time -
-                                       start_time, 2)) +
-                             " seconds")
-        # run output script
-        run_output = self.generate_run_command_job_control(
-            pop=pop,
-            solver=solver,
-            single_command=self.output_scripts[solver][0] +
-            " " +
-            self.output_scripts[solver][1] +
-            " > " +
-            solver +
-            "_output_script_out.txt 2>&1")
-        start_time = time.time()
-        subprocess.call(run_output, shell=True)
-        end_time = time.time()
-        logging.info(" Solver: " + solver + ", Output Script Runtime: " +
-                     str(round(end_time - start_time, 2)) + " seconds")
+        with self.file_operations_lock:
+            file_operations = self.file_operations
+            self.file_operations = None
+            self.pending_file_operations = {}
+        if file_operations is not None:
+            file_operations.shutdown(wait=True)
+        if self.static_dir is not None:
+            # kept individuals' hard links to the copies remain
+            shutil.rmtree(self.static_dir, ignore_errors=True)
+            self.static_dir = None
+        self.staged_files = {}
+        if self.scratch_dir is not None:
+            shutil.rmtree(self.scratch_dir, ignore_errors=True)
+            self.scratch_dir = None
         return
 
-    def generate_run_command_job_control(self, pop, solver, single_command):
-        """Generates bash command to run all directories executables
-        for parallel_method=job_control
+    def start_generation(self, gen):
+        """Clears the running processes, cancelled individuals, and timed
+        out or failed individuals recorded for an earlier generation
 
         Parameters
         ----------
-        pop : list
-            list of deap.creator.Ind
-        solver : str
-            name of solver
-        control_vars_dict: dict
-            multiple layers of dicts
-            layer 1: gen_ind dir (str)
-            layer 2: solver (str)
-            layer 3: control parameter (str)
-            layer 4: control parameter value (float)
-        input_evaluators_solver: dict
-            specific solver's evaluators sub-sub-dictionary from input file
+        gen : int
+            generation number of the individuals about to be evaluated
 
         Returns
         -------
-        command : str
-            bash command to run all directories executables for
-            parallel_method=job_control
+        None
 
         """
-        command = ''''''
-        count = 0
-        for ind in pop:
-            path = str(ind.gen) + "_" + str(ind.num)
-            if count == 0:
-                command += "cd " + path + "\n"
-            else:
-                command += "cd ../" + path + "\n"
-            count += 1
-            command += single_command + " & \n"
-            command += "sleep 1 \n"
-        command += "wait"
-        return command
-
-    def get_output_vals_job_control(
+        with self.job_control_lock:
+            if gen != self.generation:
+                self.generation = gen
+                self.job_control_processes = {}
+                self.cancelled_paths = set()
+                self.timed_out_paths = set()
+                self.failed_paths = set()
+        return
+
+    def run_solver_serial(
             self,
-            output_vals_dict,
-            pop,
+            ind,
+            path,
             solver,
+            output_vals,
             output_dict,
-            control_vars_dict):
-        """returns a list of output value tuples. Each tuple corresponds to
-        output values for one individual. The results are in order of the
-        individuals in pop. For parallel_method=job_control
+            control_vars,
+            input_evaluators):
+        """Runs a solver's input script, execute steps, and output script in
+        an individual's directory for parallel_method=none, multiprocessing,
+        or threads
 
         Parameters
         ----------
-        output_vals_dict : dict
-            layer 1: gen_ind dir (str)
-            layer 2: list of output values requested by rollo input file
-                     in correct order
-        pop : list
-            list of deap.creator.Ind
+        ind : deap.creator.Ind
+            Created in `rollo.toolbox_generator.ToolboxGenerator`. It is
+            a list with special attributes.
+        path : str
+            path name
         solver : str
             name of solver
+        output_vals : list
+            the individual's output values so far
         output_dict : OrderedDict
             Ordered dict of output variables as keys and solvers as values
-        control_vars_dict: dict
-            multiple layers of dicts
-            layer 1: gen_ind dir (str)
-            layer 2: solver (str)
-            layer 3: control parameter (str)
-            layer 4: control parameter value (float)
+        control_vars : dict
+            multiple layers of dict, see `name_ind`
+        input_evaluators : dict
+            evaluators sub-dictionary from input file
 
         Returns
         -------
-        all_output_vals : list
-            each index of list contains a tuple of output values from
-            evaluators ordered by output_dict
+        output_vals : list
+            output_vals populated with the solver's output values
 
         """
-        all_output_vals = []
-        for ind in pop:
-            path = str(ind.gen) + "_" + str(ind.num)
-            output_vals_dict[path] = self.get_output_vals(
-                output_vals_dict[path],
-                solver,
-                path,
-                output_dict,
-                control_vars_dict[path])
-            all_output_vals.append(tuple(output_vals_dict[path]))
-        return all_output_vals
+        with self.reserve_resources(solver, path):
+            # run input script
+            self.run_input_script_serial(
+                solver, control_vars[solver], ind, path)
+            # run execute if they exist
+            if "execute" in input_evaluators[solver]:
+                self.run_execute_serial(
+                    input_evaluators[solver]["execute"],
+                    path,
+                    solver,
+                    control_vars[solver],
+                    input_evaluators[solver].get(
+                        "execute_memoize"))
+            # get output values
+            output_vals = self.run_output_script_serial(
+                output_vals, solver, output_dict, control_vars,
+                path)
+        return output_vals
 
     def run_input_script_serial(self, solver, control_vars_solver, ind, path):
         """Renders an input script into an individual's directory and runs it
-        for parallel_method=none or multiprocessing
+        for parallel_method=none, multiprocessing, or threads
 
         Parameters
         ----------
@@ -427,18 +2509,24 @@ class Evaluation:
 
         """
         self.render_input_script(solver, control_vars_solver, ind, path)
-        self.subprocess_call(
+        self.run_script(
             path,
             solver + "_input_script_out.txt",
-            self.input_scripts[solver][0] +
-            " " +
-            self.input_scripts[solver][1])
+            solver,
+            self.input_scripts[solver])
         return
 
-    def run_execute_serial(self, input_evaluator_solver_execute, path, solver):
+    def run_execute_serial(
+            self,
+            input_evaluator_solver_execute,
+            path,
+            solver,
+            control_vars_solver=None,
+            execute_memoize=None):
         """copies execute scripts into an individual's directory if the scripts
-        exists then runs it or only the executable for parallel_method=none
-        or multiprocessing
+        exists then runs it or only the executable for parallel_method=none,
+        multiprocessing, or threads. Memoized steps whose files are in the
+        artifact store are restored instead of run.
 
         Parameters
         ----------
@@ -449,6 +2537,11 @@ class Evaluation:
             path name
         solver : str
             name of solver
+        control_vars_solver : dict, optional
+            control parameter names and values for the solver
+        execute_memoize : dict, optional
+            execute_memoize from specific solver's evaluators
+            sub-sub-dictionary from input file
 
         Returns
         -------
@@ -461,8 +2554,125 @@ class Evaluation:
                 execute = executables[0] + " " + executables[1]
             else:
                 execute = executables[0]
-            self.subprocess_call(
-                path, solver + "_execute_" + str(i) + "_output.txt", execute)
+            out_file = solver + "_execute_" + str(i) + "_output.txt"
+            key = self.execute_step_key(
+                solver, i, executables, control_vars_solver, execute_memoize)
+            if self.restore_execute_step(
+                    path, out_file, key, i, execute_memoize):
+                continue
+            returncode = self.subprocess_call(
+                path, out_file, execute, self.timeouts.get(solver),
+                self.solver_env(solver), solver)
+            self.save_execute_step(
+                path, key, i, execute_memoize, returncode)
+            self.check_returncode(path, solver, execute, returncode)
+        return
+
+    def execute_step_key(
+            self,
+            solver,
+            i,
+            executables,
+            control_vars_solver,
+            execute_memoize):
+        """Returns the artifact store key of a solver's execute step: a hash
+        of the step's command, its script, the solver's input script template,
+        and the values of the control variables the step depends on
+
+        Parameters
+        ----------
+        solver : str
+            name of solver
+        i : int
+            index of the step in the solver's execute list
+        executables : list of str
+            the step's executable and arguments
+        control_vars_solver : dict or None
+            control parameter names and values for the solver
+        execute_memoize : dict or None
+            execute_memoize from specific solver's evaluators
+            sub-sub-dictionary from input file
+
+        Returns
+        -------
+        str or None
+            key, None if the step is not memoized
+
+        """
+        if self.artifact_store is None or not execute_memoize or \
+                str(i) not in execute_memoize:
+            return None
+        depends_on = {}
+        for var in execute_memoize[str(i)]["depends_on"]:
+            val = control_vars_solver[var]
+            if isinstance(val, float):
+                val = float("%.12g" % val)
+            depends_on[var] = val
+        files = [self.input_scripts[solver][1]]
+        if len(executables) > 1:
+            files.append(executables[1])
+        return self.artifact_store.key(
+            {"solver": solver, "step": i, "execute": executables,
+             "depends_on": depends_on}, files)
+
+    def restore_execute_step(self, path, out_file, key, i, execute_memoize):
+        """Links a memoized execute step's files from the artifact store into
+        an individual's directory, if an earlier individual saved them
+
+        Parameters
+        ----------
+        path : str
+            path name
+        out_file : str
+            txt file (relative to path) the step's stderror and stdoutput
+            would have been written to
+        key : str or None
+            artifact store key from `execute_step_key`
+        i : int
+            index of the step in the solver's execute list
+        execute_memoize : dict or None
+            execute_memoize from specific solver's evaluators
+            sub-sub-dictionary from input file
+
+        Returns
+        -------
+        bool
+            True if the step's files were restored and it must not run
+
+        """
+        if key is None or not self.artifact_store.restore(
+                key, path, execute_memoize[str(i)]["produces"]):
+            return False
+        with open(os.path.join(path, out_file), "w") as output:
+            output.write("restored from artifact store entry " + key + "\n")
+        return True
+
+    def save_execute_step(self, path, key, i, execute_memoize, returncode):
+        """Saves the files a memoized execute step produced into the
+        artifact store if the step succeeded
+
+        Parameters
+        ----------
+        path : str
+            path name
+        key : str or None
+            artifact store key from `execute_step_key`
+        i : int
+            index of the step in the solver's execute list
+        execute_memoize : dict or None
+            execute_memoize from specific solver's evaluators
+            sub-sub-dictionary from input file
+        returncode : int
+            exit code of the step
+
+        Returns
+        -------
+        None
+
+        """
+        if key is not None and returncode == 0:
+            self.artifact_store.save(
+                key, path, execute_memoize[str(i)]["produces"])
         return
 
     def solver_order(self, input_evaluators):
@@ -504,21 +2714,23 @@ class Evaluation:
         None
 
         """
+        if solver in self.resources:
+            # a control variable named cores takes precedence
+            control_vars_solver = {
+                "cores": self.resources[solver][0], **control_vars_solver}
         rendered_script = self.render_jinja_template(
             script=self.input_scripts[solver][1],
             control_vars_solver=control_vars_solver,
             ind=ind,
             solver=solver
         )
-        os.chdir(path)
-        f = open(self.input_scripts[solver][1], "w+")
-        f.write(rendered_script)
-        f.close()
-        os.chdir("../")
+        script_path = os.path.join(path, self.input_scripts[solver][1])
+        with open(script_path, "w+") as f:
+            f.write(rendered_script)
         return
 
     def generate_execute_scripts(self, path, input_evaluator_solver_execute):
-        """Copies execute scripts into an individual's directory
+        """Links execute scripts into an individual's directory
 
         Parameters
         ----------
@@ -533,15 +2745,13 @@ class Evaluation:
         None
 
         """
-        os.chdir(path)
         for executables in input_evaluator_solver_execute:
             if len(executables) > 1:
-                shutil.copyfile("../" + executables[1], executables[1])
-        os.chdir("../")
+                self.link_file(executables[1], path)
         return
 
     def generate_output_script(self, path, solver):
-        """Copies output script into an individual's directory
+        """Links output script into an individual's directory
 
         Parameters
         ----------
@@ -555,38 +2765,305 @@ class Evaluation:
         None
 
         """
-        os.chdir(path)
-        shutil.copyfile(
-            "../" + self.output_scripts[solver][1],
-            self.output_scripts[solver][1])
-        os.chdir("../")
+        self.link_file(self.output_scripts[solver][1], path)
+        return
+
+    def stage_files(self, input_evaluators):
+        """Stages every evaluator's static files, execute scripts, and output
+        or batch script once per run. A file on the same file system as
+        individuals' directories is hard-linked from where it is, without
+        copying it. A file on a different file system is copied once into
+        static_dir (made read-only), so individuals' directories can
+        hard-link the copy. Directories are symbolically linked from where
+        they are, so the links in kept directories stay valid after
+        static_dir is removed.
+
+        Parameters
+        ----------
+        input_evaluators : dict
+            evaluators sub-dictionary from input file
+
+        Returns
+        -------
+        None
+
+        """
+        files = []
+        for solver in self.input_scripts:
+            if solver in self.callables:
+                continue
+            if solver in self.batch_scripts:
+                files.append(self.batch_scripts[solver][1])
+                continue
+            files += self.static_files.get(solver, [])
+            for executables in input_evaluators[solver].get("execute", []):
+                if len(executables) > 1:
+                    files.append(executables[1])
+            if self.output_scripts[solver]:
+                files.append(self.output_scripts[solver][1])
+        for file in files:
+            if file in self.staged_files:
+                continue
+            if not os.path.exists(file) or os.path.isdir(file) or \
+                    self.same_file_system(file):
+                self.staged_files[file] = file
+                continue
+            if self.static_dir is None:
+                if self.scratch_parent is None:
+                    self.static_dir = tempfile.mkdtemp(
+                        prefix="rollo_static_", dir=".")
+                else:
+                    self.static_dir = os.path.join(
+                        self.make_scratch_dir(), "static")
+            staged_file = os.path.join(self.static_dir, file)
+            os.makedirs(os.path.dirname(staged_file), exist_ok=True)
+            shutil.copy2(file, staged_file)
+            os.chmod(staged_file,
+                     stat.S_IRUSR | stat.S_IXUSR | stat.S_IRGRP |
+                     stat.S_IROTH)
+            self.staged_files[file] = staged_file
+        return
+
+    def same_file_system(self, file):
+        """Returns True if a file is on the same file system as individuals'
+        directories (scratch_dir, or the directory ROLLO runs in), so it can
+        be hard-linked into them
+
+        Parameters
+        ----------
+        file : str
+            file name
+
+        Returns
+        -------
+        bool
+
+        """
+        # scratch_dir is only created once an individual needs it
+        directory = os.path.abspath(self.scratch_parent or ".")
+        while not os.path.exists(directory):
+            directory = os.path.dirname(directory)
+        return os.stat(file).st_dev == os.stat(directory).st_dev
+
+    def link_static_files(self, path):
+        """Links every evaluator's static files into an individual's
+        directory
+
+        Parameters
+        ----------
+        path : str
+            path name
+
+        Returns
+        -------
+        None
+
+        """
+        for solver in self.static_files:
+            for file in self.static_files[solver]:
+                self.link_file(file, path)
+        return
+
+    def link_file(self, file, path):
+        """Hard-links a staged file into an individual's directory (or
+        copies it if it cannot be hard-linked), or symlinks it if it is a
+        directory
+
+        Parameters
+        ----------
+        file : str
+            file name, relative to the directory ROLLO runs in and to path
+        path : str
+            path name
+
+        Returns
+        -------
+        None
+
+        """
+        source = self.staged_files.get(file, file)
+        target = os.path.join(path, file)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        if os.path.lexists(target):
+            os.remove(target)
+        if os.path.isdir(source):
+            os.symlink(os.path.abspath(source), target)
+            return
+        try:
+            os.link(source, target)
+        except OSError:
+            shutil.copy2(source, target)
         return
 
-    def subprocess_call(self, path, out_file, command):
-        """Runs command in bash
+    def subprocess_call(
+            self, path, out_file, command, timeout=None, env=None,
+            solver=None):
+        """Runs command in bash with path as its working directory. The
+        process-wide working directory is never changed, so this is safe to
+        call from several threads at once. If solver is given, the command's
+        resource usage is recorded for the individual in path.
 
         Parameters
         ----------
         path : str
             path name
         out_file : str
-            txt file to output command's stderror and stdoutput to
+            txt file (relative to path) to output command's stderror and
+            stdoutput to
         command : str
             bash command to run
+        timeout : float, optional
+            seconds after which command and every process it started are
+            killed
+        env : dict, optional
+            command's environment, defaults to the current environment
+        solver : str, optional
+            name of the solver command belongs to
 
         Returns
         -------
-        None
+        int
+            exit code of command
+
+        Raises
+        ------
+        subprocess.TimeoutExpired
+            if command was killed after timeout seconds
 
         """
-        os.chdir(path)
-        with open(out_file, "wb") as output:
-            subprocess.call(
-                command,
+        start_time = time.time()
+        with open(os.path.join(path, out_file), "wb") as output:
+            process = subprocess.Popen(
+                self.numactl_command(command),
                 stdout=output,
                 stderr=output,
-                shell=True)
-        os.chdir("../")
+                shell=True,
+                cwd=path,
+                env=env,
+                start_new_session=timeout is not None,
+                preexec_fn=self.pin_child())
+            try:
+                returncode, rusage = self.wait_process(process, timeout)
+            except subprocess.TimeoutExpired:
+                self.kill_process_group(process.pid)
+                process.wait()
+                raise
+        if solver is not None:
+            self.record_usage(
+                path, solver, command, time.time() - start_time, rusage)
+        return returncode
+
+    def wait_process(self, process, timeout=None):
+        """Waits for a subprocess.Popen process to exit and reaps it with
+        os.wait4, which reports the resources used by the process and the
+        descendants it waited for
+
+        Parameters
+        ----------
+        process : subprocess.Popen
+            running process
+        timeout : float, optional
+            seconds to wait
+
+        Returns
+        -------
+        tuple
+            (exit code, resource.struct_rusage or None if the process was
+            already reaped)
+
+        Raises
+        ------
+        subprocess.TimeoutExpired
+            if process is still running after timeout seconds
+
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        interval = 0.01
+        while True:
+            try:
+                pid, status, rusage = os.wait4(
+                    process.pid, 0 if deadline is None else os.WNOHANG)
+            except ChildProcessError:
+                return process.wait(), None
+            if pid != 0:
+                break
+            if time.time() >= deadline:
+                raise subprocess.TimeoutExpired(process.args, timeout)
+            time.sleep(interval)
+            # short solver commands are noticed within 50 ms of exiting
+            interval = min(2 * interval, 0.05)
+        # negative signal number if it was killed, as subprocess reports it
+        if os.WIFSIGNALED(status):
+            process.returncode = -os.WTERMSIG(status)
+        else:
+            process.returncode = os.WEXITSTATUS(status)
+        return process.returncode, rusage
+
+    def record_usage(self, path, solver, command, wall_time, rusage):
+        """Records the resources a command used for the individual in path;
+        they are returned with its output values, see `usage_eval_fn`
+
+        Parameters
+        ----------
+        path : str
+            path name
+        solver : str
+            name of solver
+        command : str
+            command that was run
+        wall_time : float
+            seconds the command ran
+        rusage : resource.struct_rusage or None
+            resource usage of the command's process and its descendants,
+            None if it is not known
+
+        Returns
+        -------
+        dict
+            keys: solver, command, wall_time (seconds), user_time and
+            system_time (CPU seconds), max_rss (bytes), bytes_written (bytes
+            written to storage). user_time, system_time, max_rss, and
+            bytes_written are None if rusage is None
+
+        """
+        usage = {
+            "solver": solver,
+            "command": command,
+            "wall_time": wall_time,
+            "user_time": None,
+            "system_time": None,
+            "max_rss": None,
+            "bytes_written": None,
+        }
+        if rusage is not None:
+            usage["user_time"] = rusage.ru_utime
+            usage["system_time"] = rusage.ru_stime
+            # kilobytes on Linux
+            usage["max_rss"] = rusage.ru_maxrss * 1024
+            # 512-byte blocks on Linux, counted when they are written to the
+            # page cache; tmpfs writes are not counted
+            usage["bytes_written"] = rusage.ru_oublock * 512
+        self.usage_records.setdefault(path, []).append(usage)
+        return usage
+
+    def kill_process_group(self, pid):
+        """Kills a process started in its own session and every process it
+        started
+
+        Parameters
+        ----------
+        pid : int
+            process id, which is also its process group id
+
+        Returns
+        -------
+        None
+
+        """
+        try:
+            os.killpg(pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
         return
 
     def run_output_script_serial(
@@ -596,7 +3073,7 @@ class Evaluation:
             output_dict,
             control_vars,
             path):
-        """Copies an output script into an individual's directory and runs it
+        """Links an output script into an individual's directory and runs it
         and returns a populated list with output values for each solver
 
         Parameters
@@ -624,12 +3101,11 @@ class Evaluation:
         if self.output_scripts[solver]:
             self.generate_output_script(path, solver)
             # run the output script
-            self.subprocess_call(
+            self.run_script(
                 path,
-                "./" + solver + "_output_script_out.txt",
-                self.output_scripts[solver][0] +
-                " " +
-                self.output_scripts[solver][1])
+                solver + "_output_script_out.txt",
+                solver,
+                self.output_scripts[solver])
             output_vals = self.get_output_vals(
                 output_vals, solver, path, output_dict, control_vars)
         return output_vals
@@ -665,19 +3141,88 @@ class Evaluation:
             output values requested by rollo input file in correct order
 
         """
+        oup_script_results = None
         if self.output_scripts[solver]:
-            # return the output script's printed dictionary into a variable
-            with open("./" + path + "/" + solver + "_output_script_out.txt") \
-                    as fp:
-                lines = fp.readlines()
-            for line in lines:
+            oup_script_results = self.read_output_script_results(path, solver)
+        return self.assign_output_vals(
+            output_vals, solver, output_dict, control_vars, oup_script_results)
+
+    def read_output_script_results(self, path, solver):
+        """Returns the output parameter dictionary written by a solver's
+        output script. The output script's result file,
+        ``<solver>_output.json`` in the individual's directory, is parsed
+        once if it exists. Otherwise the output script's stdoutput is
+        streamed and the first line that is a printed dictionary is returned.
+
+        Parameters
+        ----------
+        path : str
+            path name
+        solver : str
+            name of solver
+
+        Returns
+        -------
+        dict or None
+            output parameter names and values, None if the output script
+            returned none
+
+        """
+        result_file = os.path.join(path, solver + "_output.json")
+        if os.path.exists(result_file):
+            with open(result_file) as fp:
+                try:
+                    return json.load(fp)
+                except ValueError:
+                    logging.warning(" Solver: " + solver + ", " + result_file +
+                                    " is not valid JSON")
+                    return None
+        with open(os.path.join(path, solver + "_output_script_out.txt")) as fp:
+            for line in fp:
+                line = line.strip()
+                # only printed dictionaries are worth parsing
+                if not line.startswith("{"):
+                    continue
                 try:
                     oup_script_results = ast.literal_eval(line)
-                    if isinstance(oup_script_results, dict):
-                        break
-                except BaseException:
-                    print("ROLLO could not find the output parameter dictionary.")
-                    pass
+                except (ValueError, SyntaxError, MemoryError, RecursionError):
+                    continue
+                if isinstance(oup_script_results, dict):
+                    return oup_script_results
+        return None
+
+    def assign_output_vals(
+            self,
+            output_vals,
+            solver,
+            output_dict,
+            control_vars,
+            oup_script_results):
+        """Returns output_vals populated with a solver's output values, taken
+        from its control variables or from its output script's results
+
+        Parameters
+        ----------
+        output_vals : list
+            list of Nones with length corresponding to number of output values
+        solver : str
+            name of solver
+        output_dict : OrderedDict
+            Ordered dict of output variables as keys and solvers as values
+        control_vars : dict
+            multiple layers of dict
+            layer 1: solver name
+            layer 2: control parameter str
+            layer 3: control parameter value
+        oup_script_results : dict or None
+            output parameter names and values returned by the solver
+
+        Returns
+        -------
+        output_vals : list
+            output values requested by rollo input file in correct order
+
+        """
         for i, var in enumerate(output_dict):
             if output_dict[var] == solver:
                 # if variable is a control variable
@@ -685,12 +3230,18 @@ class Evaluation:
                     output_vals[i] = control_vars[solver][var]
                 # if variable's defined in output script
                 else:
-                    output_vals[i] = oup_script_results[var]
+                    try:
+                        output_vals[i] = oup_script_results[var]
+                    except (KeyError, TypeError):
+                        raise SolverError(
+                            "ROLLO could not find the output parameter '" +
+                            var + "' returned by solver: " + solver)
         return output_vals
 
     def name_ind(self, ind, control_dict, input_evaluators):
         """Returns a dictionary that maps the control_dict's variable names to
-        values from ind list
+        values from ind list, and the fidelity variables of solvers defined
+        with fidelity to their values at the individual's fidelity level
 
         Parameters
         ----------
@@ -718,6 +3269,16 @@ class Evaluation:
         for i, var in enumerate(control_dict):
             for solver in control_dict[var]:
                 control_vars[solver][var] = ind[i]
+        fidelity = getattr(ind, "fidelity", None)
+        for solver, fidelity_vars in self.fidelities.items():
+            if solver not in control_vars:
+                continue
+            for var, values in fidelity_vars.items():
+                level = len(values) - 1
+                if fidelity is not None:
+                    level = min(fidelity, level)
+                # a control variable of the same name takes precedence
+                control_vars[solver].setdefault(var, values[level])
         return control_vars
 
     def render_jinja_template(self, script, control_vars_solver, ind, solver):
@@ -728,8 +3289,9 @@ class Evaluation:
         ----------
         script : str
             name of evaluator template script
-        control_vars_solver : str
-            name of evaluation solver software
+        control_vars_solver : dict
+            control parameter names and values for the solver, passed to the
+            template unchanged
 
         Returns
         -------
@@ -737,12 +3299,41 @@ class Evaluation:
             rendered evaluator template script
         """
 
-        with open(script) as f:
-            tmp = jinja2.Template(f.read())
-        render_str = "tmp.render("
-        for var in control_vars_solver:
-            render_str += str(var) + "='" + \
-                str(control_vars_solver[var]) + "',"
-        render_str += ")"
-        rendered_template = eval(render_str)
+        rendered_template = self.get_template(script).render(
+            **control_vars_solver)
         return rendered_template
+
+    def get_template(self, script):
+        """Returns the compiled jinja2 template for script, compiling it on
+        first use. Templates are loaded through one jinja2.Environment per
+        template directory, so {% include %} and {% import %} of other files
+        in that directory work, and the environment's bytecode cache is used
+        if template_cache_dir is defined.
+
+        Parameters
+        ----------
+        script : str
+            name of evaluator template script
+
+        Returns
+        -------
+        jinja2.Template
+            compiled template
+
+        """
+        if script not in self.templates:
+            directory, name = os.path.split(os.path.abspath(script))
+            if directory not in self.jinja_environments:
+                if self.template_cache_dir:
+                    os.makedirs(self.template_cache_dir, exist_ok=True)
+                    bytecode_cache = jinja2.FileSystemBytecodeCache(
+                        os.path.abspath(self.template_cache_dir))
+                else:
+                    bytecode_cache = None
+                self.jinja_environments[directory] = jinja2.Environment(
+                    loader=jinja2.FileSystemLoader(directory),
+                    bytecode_cache=bytecode_cache)
+            self.templates[script] = \
+                self.jinja_environments[directory].get_template(name)
+        return self.templates[script]
+
@@ -3,12 +3,43 @@ from rollo.input_validation import InputValidation
 from rollo.algorithm import Algorithm
 from rollo.constraints import Constraints
 from rollo.toolbox_generator import ToolboxGenerator
+from rollo.cache import EvaluationCache
+from rollo.artifact_store import ArtifactStore
 import json
 import time
 from collections import OrderedDict
 import logging
 import sys
 
+# algorithm options passed to rollo.Evaluation under the same name
+ALGORITHM_OPTIONS = [
+    "template_cache_dir",
+    "reuse_partial_results",
+    "scratch_dir",
+    "scheduler",
+    "distributed",
+    "node_cores",
+    "node_memory_gb",
+    "cpu_affinity",
+    "numa",
+]
+
+# evaluator options passed to rollo.Evaluation.add_evaluator under the same
+# name, for evaluators defined with batch_script and for the others
+BATCH_EVALUATOR_OPTIONS = [
+    "timeout",
+    "cores",
+    "memory_gb",
+    "retries",
+    "retry_backoff",
+    "penalty",
+]
+EVALUATOR_OPTIONS = BATCH_EVALUATOR_OPTIONS + [
+    "preload",
+    "static_files",
+    "fidelity",
+]
+
 
 class Executor(object):
     """Executes rollo simulation from start to finish.
@@ -37,12 +68,15 @@ class Executor(object):
     checkpoint_file : str
         Name of checkpoint file
     verbose : bool
+    evaluator : rollo.evaluation.Evaluation or None
+        Evaluation object created by `load_evaluator`
 
     """
 
     def __init__(self, input_file, checkpoint_file=None, verbose=False):
         self.input_file = input_file
         self.checkpoint_file = checkpoint_file
+        self.evaluator = None
         if verbose:
             logging.basicConfig(stream=sys.stdout, level=logging.INFO)
 
@@ -64,9 +98,12 @@ class Executor(object):
         # organize control variables and output dict
         control_dict, output_dict = self.organize_input_output(
             complete_input_dict)
+        # load evaluation cache if it is defined
+        evaluation_cache = self.load_evaluation_cache(
+            output_dict, complete_input_dict)
         # generate evaluator function
         evaluator_fn = self.load_evaluator(
-            control_dict, output_dict, complete_input_dict
+            control_dict, output_dict, complete_input_dict, evaluation_cache
         )
         # DEAP toolbox set up
         toolbox, creator = self.load_toolbox(
@@ -79,6 +116,8 @@ class Executor(object):
         constraints = self.load_constraints(
             output_dict, complete_input_dict["constraints"], toolbox
         )
+        overprovision = int(
+            complete_input_dict["algorithm"].get("overprovision", 0))
         alg = Algorithm(
             deap_toolbox=toolbox,
             constraint_obj=constraints,
@@ -89,8 +128,25 @@ class Executor(object):
             input_dict=complete_input_dict,
             start_time=t0,
             parallel_method=complete_input_dict["algorithm"]["parallel"],
+            max_concurrent_evaluations=self.max_concurrent_evaluations(
+                complete_input_dict["algorithm"]),
+            evaluation_cache=evaluation_cache,
+            overprovision=overprovision,
+            processes=self.evaluator.max_concurrent_runs(),
+            cpu_slots=self.evaluator.cpu_slots(
+                self.evaluator.max_concurrent_runs()),
+            fidelity_levels=self.evaluator.fidelity_levels,
         )
-        alg.generate()
+        try:
+            alg.generate()
+        finally:
+            # the warm worker processes would outlive the run
+            if self.evaluator.warm_workers is not None:
+                self.evaluator.warm_workers.shutdown()
+            # finish deleting and moving individuals' directories
+            self.evaluator.flush_file_operations()
+            if self.evaluator.coordinator is not None:
+                self.evaluator.coordinator.close()
         t1 = time.time()
         print("Total time in simulation " +
               str(round(t1 - t0, 2)) + " seconds")
@@ -160,7 +216,35 @@ class Executor(object):
 
         return control_vars, output_vars
 
-    def load_evaluator(self, control_dict, output_dict, input_dict):
+    def load_evaluation_cache(self, output_dict, input_dict):
+        """Creates an EvaluationCache object if the user defined an
+        evaluation_cache file
+
+        Parameters
+        ----------
+        output_dict : OrderedDict
+            Ordered dict of output variables as keys and solvers as values
+        input_dict : dict
+            input file dict with default values filled
+
+        Returns
+        -------
+        rollo.cache.EvaluationCache or None
+            persistent cache of evaluated individuals' output values
+
+        """
+        cache_file = input_dict["algorithm"].get("evaluation_cache")
+        if cache_file is None:
+            return None
+        return EvaluationCache(
+            cache_file, input_dict["evaluators"], output_dict)
+
+    def load_evaluator(
+            self,
+            control_dict,
+            output_dict,
+            input_dict,
+            evaluation_cache=None):
         """Creates an Evaluation function object
 
         Parameters
@@ -172,6 +256,8 @@ class Executor(object):
             Ordered dict of output variables as keys and solvers as values
         input_dict : dict
             input file dict with default values filled
+        evaluation_cache : rollo.cache.EvaluationCache, optional
+            persistent cache of evaluated individuals' output values
 
         Returns
         -------
@@ -181,9 +267,34 @@ class Executor(object):
 
         """
         input_evaluators = input_dict["evaluators"]
-        evaluator = rollo.Evaluation()
+        input_algorithm = input_dict["algorithm"]
+        evaluator = rollo.Evaluation(
+            evaluation_cache=evaluation_cache,
+            artifact_store=self.load_artifact_store(input_dict),
+            penalty_vals=self.penalty_output_vals(
+                output_dict, input_algorithm),
+            speculative_fraction=input_algorithm.get("speculative_execution"),
+            **self.defined_options(input_algorithm, ALGORITHM_OPTIONS))
+        self.evaluator = evaluator
         for solver in input_evaluators:
             solver_dict = input_evaluators[solver]
+            if "callable" in solver_dict:
+                evaluator.add_evaluator(
+                    solver_name=solver,
+                    input_script=None,
+                    output_script=None,
+                    evaluator_callable=solver_dict["callable"],
+                )
+                continue
+            if "batch_script" in solver_dict:
+                evaluator.add_evaluator(
+                    solver_name=solver,
+                    input_script=None,
+                    output_script=None,
+                    batch_script=solver_dict["batch_script"],
+                    **self.defined_options(
+                        solver_dict, BATCH_EVALUATOR_OPTIONS))
+                continue
             try:
                 output_script = solver_dict["output_script"]
             except BaseException:
@@ -193,15 +304,111 @@ class Executor(object):
                 solver_name=solver,
                 input_script=solver_dict["input_script"],
                 output_script=output_script,
-            )
+                **self.defined_options(solver_dict, EVALUATOR_OPTIONS))
         parallel_type = input_dict["algorithm"]["parallel"]
         gens = input_dict["algorithm"]["generations"]
         keep_files = input_dict["algorithm"]["keep_files"]
+        max_concurrent_evaluations = self.max_concurrent_evaluations(
+            input_dict["algorithm"])
         evaluator_fn = evaluator.eval_fn_generator(
             control_dict, output_dict, input_dict["evaluators"],
-            gens, parallel_type, keep_files)
+            gens, parallel_type, keep_files, max_concurrent_evaluations)
         return evaluator_fn
 
+    def defined_options(self, input_section, options):
+        """Returns the options the user defined in a section of the input
+        file, to be passed on as keyword arguments of the same name; the
+        others keep their default values
+
+        Parameters
+        ----------
+        input_section : dict
+            sub-dictionary from input file, e.g. algorithm or one evaluator
+        options : list of str
+            names of the options to pass on
+
+        Returns
+        -------
+        dict
+            key is option name, value is its value in input_section
+
+        """
+        return {option: input_section[option] for option in options
+                if option in input_section}
+
+    def penalty_output_vals(self, output_dict, input_algorithm):
+        """Returns the output values given to an individual whose evaluation
+        timed out: the worst value for each optimized variable (inf if it is
+        minimized, -inf if it is maximized) and nan for other outputs
+
+        Parameters
+        ----------
+        output_dict : OrderedDict
+            Ordered dict of output variables as keys and solvers as values
+        input_algorithm : dict
+            algorithm sub-dictionary from input file
+
+        Returns
+        -------
+        list
+            penalty output values ordered by output_dict
+
+        """
+        penalty_vals = [float("nan")] * len(output_dict)
+        for var, obj in zip(input_algorithm["optimized_variable"],
+                            input_algorithm["objective"]):
+            if var not in output_dict:
+                continue
+            if obj == "max":
+                penalty = -float("inf")
+            else:
+                penalty = float("inf")
+            penalty_vals[list(output_dict).index(var)] = penalty
+        return penalty_vals
+
+    def load_artifact_store(self, input_dict):
+        """Creates an ArtifactStore object if any evaluator memoizes execute
+        steps
+
+        Parameters
+        ----------
+        input_dict : dict
+            input file dict with default values filled
+
+        Returns
+        -------
+        rollo.artifact_store.ArtifactStore or None
+            store of files produced by memoized execute steps
+
+        """
+        memoized = False
+        for solver in input_dict["evaluators"]:
+            if "execute_memoize" in input_dict["evaluators"][solver]:
+                memoized = True
+        if not memoized:
+            return None
+        return ArtifactStore(
+            input_dict["algorithm"].get("artifact_store", "artifact_store"))
+
+    def max_concurrent_evaluations(self, input_algorithm):
+        """Returns the user-defined limit on individuals evaluated at the
+        same time, or None if the user did not define one
+
+        Parameters
+        ----------
+        input_algorithm : dict
+            algorithm sub-dictionary from input file
+
+        Returns
+        -------
+        int or None
+            maximum number of individuals evaluated at the same time
+
+        """
+        if "max_concurrent_evaluations" not in input_algorithm:
+            return None
+        return int(input_algorithm["max_concurrent_evaluations"])
+
     def load_toolbox(
         self, evaluator_fn, input_algorithm, input_ctrl_vars, control_dict
     ):
@@ -1,6 +1,30 @@
 from jsonschema import validate
 import logging
 
+# options a parallel method does not support, rejected rather than ignored
+UNSUPPORTED_OPTIONS = {
+    "scheduler": {
+        "algorithm": ["speculative_execution"],
+        "evaluators": [
+            "timeout",
+            "preload",
+            "execute_memoize",
+            "retries",
+            "retry_backoff",
+        ],
+    },
+    "distributed": {
+        "algorithm": ["speculative_execution"],
+        "evaluators": [
+            "timeout",
+            "preload",
+            "execute_memoize",
+            "retries",
+            "retry_backoff",
+        ],
+    },
+}
+
 
 class InputValidation:
     """The InputValidation class contains methods to read and validate the JSON
@@ -171,6 +195,62 @@ class InputValidation:
             "type": "object",
             "properties": {
                 "parallel": {"type": "string"},
+                "max_concurrent_evaluations": {"type": "number"},
+                "template_cache_dir": {"type": "string"},
+                "evaluation_cache": {"type": "string"},
+                "reuse_partial_results": {"type": "boolean"},
+                "artifact_store": {"type": "string"},
+                "speculative_execution": {
+                    "type": "number",
+                    "exclusiveMinimum": 0,
+                    "maximum": 1,
+                },
+                "overprovision": {"type": "integer", "minimum": 0},
+                "scratch_dir": {"type": "string"},
+                "scheduler": {
+                    "type": "object",
+                    "properties": {
+                        "submit": {
+                            "type": "array",
+                            "items": {"type": "string"},
+                        },
+                        "cancel": {
+                            "type": "array",
+                            "items": {"type": "string"},
+                        },
+                        "template": {"type": "string"},
+                        "poll_interval": {
+                            "type": "number",
+                            "exclusiveMinimum": 0,
+                        },
+                        "timeout": {"type": "number", "exclusiveMinimum": 0},
+                    },
+                    "additionalProperties": False,
+                },
+                "distributed": {
+                    "type": "object",
+                    "properties": {
+                        "address": {
+                            "type": "string",
+                            "pattern": "^.+:[0-9]+$",
+                        },
+                        "authkey": {"type": "string"},
+                        "heartbeat_timeout": {
+                            "type": "number",
+                            "exclusiveMinimum": 0,
+                        },
+                        "timeout": {"type": "number", "exclusiveMinimum": 0},
+                        "return_files": {
+                            "type": "array",
+                            "items": {"type": "string"},
+                        },
+                    },
+                    "additionalProperties": False,
+                },
+                "node_cores": {"type": "integer", "minimum": 1},
+                "node_memory_gb": {"type": "number", "exclusiveMinimum": 0},
+                "cpu_affinity": {"type": "boolean"},
+                "numa": {"type": "boolean"},
                 "keep_files": {"type": "string"},
                 "objective": {
                     "type": "array",
@@ -200,6 +280,20 @@ class InputValidation:
             ["optimized_variable"],
             [
                 "parallel",
+                "max_concurrent_evaluations",
+                "template_cache_dir",
+                "evaluation_cache",
+                "reuse_partial_results",
+                "artifact_store",
+                "speculative_execution",
+                "overprovision",
+                "scratch_dir",
+                "scheduler",
+                "distributed",
+                "node_cores",
+                "node_memory_gb",
+                "cpu_affinity",
+                "numa",
                 "keep_files",
                 "objective",
                 "weight",
@@ -215,12 +309,21 @@ class InputValidation:
         )
         self.validate_in_list(
             input_algorithm["parallel"],
-            ["none", "multiprocessing", "job_control"],
+            [
+                "none",
+                "multiprocessing",
+                "threads",
+                "job_control",
+                "asyncio",
+                "scheduler",
+                "distributed",
+            ],
             "parallel",
         )
+        self.validate_parallel_options(input_algorithm, input_evaluators)
         self.validate_in_list(
             input_algorithm["keep_files"],
-            ["none", "all", "only_final"],
+            ["none", "all", "only_final", "archive"],
             "keep_files",
         )
         for obj in input_algorithm["objective"]:
@@ -240,6 +343,40 @@ class InputValidation:
         self.validate_algorithm_operators("mutation", input_algorithm)
         self.validate_algorithm_operators("mating", input_algorithm)
 
+    def validate_parallel_options(self, input_algorithm, input_evaluators):
+        """Checks that no option is defined that the parallel method does
+        not support, e.g. evaluator retries with parallel = scheduler or
+        distributed, whose jobs and worker tasks run each individual's
+        commands once, outside ROLLO
+
+        Parameters
+        ----------
+        input_algorithm : dict
+            algorithm sub-dictionary from input file
+        input_evaluators : dict
+            evaluators sub-dictionary from input file
+
+        """
+        parallel = input_algorithm["parallel"]
+        if parallel not in UNSUPPORTED_OPTIONS:
+            return
+        for option in UNSUPPORTED_OPTIONS[parallel]["algorithm"]:
+            assert option not in input_algorithm, (
+                "<Input Validation Error> algorithm: " + option +
+                " is not supported with parallel: " + parallel
+            )
+        for evaluator in input_evaluators:
+            # batch scripts run in ROLLO before the individuals' jobs
+            if "batch_script" in input_evaluators[evaluator]:
+                continue
+            for option in UNSUPPORTED_OPTIONS[parallel]["evaluators"]:
+                assert option not in input_evaluators[evaluator], (
+                    "<Input Validation Error> evaluator: " + evaluator +
+                    " defines " + option + ", which is not supported " +
+                    "with parallel: " + parallel
+                )
+        return
+
     def validate_algorithm_operators(self, operator_type, input_algorithm):
         """Validates the genetic algorithm operators
 
@@ -377,6 +514,7 @@ class InputValidation:
                 "properties": {
                     "max": {"type": "number"},
                     "min": {"type": "number"},
+                    "tolerance": {"type": "number", "minimum": 0},
                 },
             }
             variables.append(var)
@@ -385,7 +523,7 @@ class InputValidation:
         for var in variables:
             self.validate_correct_keys(
                 input_ctrl_vars[var], [
-                    "min", "max"], [], "control variable: " + var)
+                    "min", "max"], ["tolerance"], "control variable: " + var)
 
     def validate_evaluators(self, input_evaluators):
         """Validates the evaluators segment of the JSON input file
@@ -423,17 +561,124 @@ class InputValidation:
                     "output_script": {
                         "type": "array",
                         "items": {"type": "string"},
-                    }
+                    },
+                    "callable": {
+                        "type": "string",
+                        "pattern": "^[^:]+:[^:]+$",
+                    },
+                    "batch_script": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "minItems": 2,
+                    },
+                    "preload": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                    },
+                    "execute_memoize": {
+                        "type": "object",
+                        "patternProperties": {
+                            "^[0-9]+$": {
+                                "type": "object",
+                                "properties": {
+                                    "depends_on": {
+                                        "type": "array",
+                                        "items": {"type": "string"},
+                                    },
+                                    "produces": {
+                                        "type": "array",
+                                        "items": {"type": "string"},
+                                    },
+                                },
+                                "required": ["depends_on", "produces"],
+                                "additionalProperties": False,
+                            },
+                        },
+                        "additionalProperties": False,
+                    },
+                    "timeout": {"type": "number", "exclusiveMinimum": 0},
+                    "static_files": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                    },
+                    "cores": {"type": "integer", "minimum": 1},
+                    "memory_gb": {"type": "number", "exclusiveMinimum": 0},
+                    "retries": {"type": "integer", "minimum": 0},
+                    "retry_backoff": {"type": "number", "minimum": 0},
+                    "penalty": {
+                        "type": "object",
+                        "additionalProperties": {"type": "number"},
+                    },
+                    "fidelity": {
+                        "type": "object",
+                        "additionalProperties": {
+                            "type": "array",
+                            "items": {"type": ["number", "string"]},
+                            "minItems": 1,
+                        },
+                    },
                 },
             }
         validate(instance=input_evaluators, schema=schema_evaluators)
+        all_outputs = []
+        for evaluator in input_evaluators:
+            all_outputs += input_evaluators[evaluator]["outputs"]
         for evaluator in input_evaluators:
+            # a Python callable replaces the input, execute and output scripts
+            if "callable" in input_evaluators[evaluator]:
+                self.validate_correct_keys(
+                    input_evaluators[evaluator],
+                    ["callable", "inputs", "outputs", "order"],
+                    [],
+                    "evaluator: " + evaluator,
+                )
+                continue
+            # a batch script evaluates every pending individual at once
+            if "batch_script" in input_evaluators[evaluator]:
+                self.validate_correct_keys(
+                    input_evaluators[evaluator],
+                    ["batch_script", "inputs", "outputs", "order"],
+                    [
+                        "timeout",
+                        "cores",
+                        "memory_gb",
+                        "retries",
+                        "retry_backoff",
+                        "penalty",
+                    ],
+                    "evaluator: " + evaluator,
+                )
+                self.validate_batch_order(input_evaluators, evaluator)
+                for output in input_evaluators[evaluator].get("penalty", {}):
+                    self.validate_in_list(
+                        output, all_outputs, "evaluator: " + evaluator +
+                        " penalty")
+                continue
             self.validate_correct_keys(
                 input_evaluators[evaluator],
                 ["input_script", "inputs", "outputs", "order"],
-                ["output_script", "execute"],
+                [
+                    "output_script",
+                    "execute",
+                    "preload",
+                    "execute_memoize",
+                    "timeout",
+                    "static_files",
+                    "cores",
+                    "memory_gb",
+                    "retries",
+                    "retry_backoff",
+                    "penalty",
+                    "fidelity",
+                ],
                 "evaluator: " + evaluator,
             )
+            for output in input_evaluators[evaluator].get("penalty", {}):
+                self.validate_in_list(
+                    output, all_outputs, "evaluator: " + evaluator +
+                    " penalty")
+            self.validate_execute_memoize(
+                input_evaluators[evaluator], evaluator)
             # check if outputs are in predefined outputs or inputs, and if not
             # output_script must be defined
 
@@ -456,6 +701,68 @@ class InputValidation:
                     raise
         return
 
+    def validate_batch_order(self, input_evaluators, evaluator):
+        """Checks that an evaluator defined with batch_script comes before
+        every evaluator that is not, since batch scripts run for the whole
+        population before individuals' other evaluators
+
+        Parameters
+        ----------
+        input_evaluators : dict
+            evaluators sub-dictionary from input file
+        evaluator : str
+            name of evaluator defined with batch_script
+
+        """
+        order = input_evaluators[evaluator]["order"]
+        for other in input_evaluators:
+            if "batch_script" in input_evaluators[other]:
+                continue
+            assert order < input_evaluators[other]["order"], (
+                "<Input Validation Error> evaluator: "
+                + evaluator
+                + " defines batch_script, so its order must be lower than"
+                + " the order of evaluator: "
+                + other
+            )
+        return
+
+    def validate_execute_memoize(self, input_evaluator, evaluator):
+        """Checks that each memoized execute step exists and only depends on
+        its evaluator's inputs
+
+        Parameters
+        ----------
+        input_evaluator : dict
+            specific evaluator's sub-sub-dictionary from input file
+        evaluator : str
+            name of evaluator
+
+        """
+        if "execute_memoize" not in input_evaluator:
+            return
+        try:
+            execute = input_evaluator["execute"]
+        except KeyError:
+            print(
+                "<Input Validation Error> evaluator: " + evaluator +
+                " must define execute to define execute_memoize"
+            )
+            raise
+        for step in input_evaluator["execute_memoize"]:
+            self.validate_in_list(
+                step,
+                [str(i) for i in range(len(execute))],
+                "execute_memoize step of evaluator: " + evaluator,
+            )
+            for var in input_evaluator["execute_memoize"][step]["depends_on"]:
+                self.validate_in_list(
+                    var,
+                    input_evaluator["inputs"],
+                    "execute_memoize depends_on of evaluator: " + evaluator,
+                )
+        return
+
     def validate_if_in_list(self, input_strings, accepted_strings):
         """Checks if strings are in a defined list of strings and returns a
         boolean
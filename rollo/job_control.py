@@ -0,0 +1,715 @@
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import subprocess
+import functools
+import logging
+import shutil
+import copy
+import time
+import os
+
+
+class JobControlEvaluation(object):
+    """The JobControlEvaluation class holds the `rollo.evaluation.Evaluation`
+    methods for parallel_method=job_control: each individual's chain of
+    solvers is a task in a bounded work queue of threads, whose commands run
+    in bash processes that can be killed when the individual is cancelled
+    or a speculative duplicate of it finishes first.
+
+    """
+
+    def create_input_execute_output_scripts(
+            self,
+            pop,
+            solver,
+            control_vars_dict,
+            input_evaluators_solver):
+        """Renders input scripts, copies execute scripts, and renders
+        output scripts for parallel_method=job_control in each
+        individual's directory
+
+        Parameters
+        ----------
+        pop : list
+            list of deap.creator.Ind
+        solver : str
+            name of solver
+        control_vars_dict: dict
+            multiple layers of dicts
+            layer 1: gen_ind dir (str)
+            layer 2: solver (str)
+            layer 3: control parameter (str)
+            layer 4: control parameter value (float)
+        input_evaluators_solver: dict
+            specific solver's evaluators sub-sub-dictionary from input file
+
+        Returns
+        -------
+        None
+
+        """
+        for ind in pop:
+            path = self.ind_path(ind)
+            self.render_input_script(
+                solver, control_vars_dict[path][solver], ind, path)
+            if "execute" in input_evaluators_solver:
+                self.generate_execute_scripts(
+                    path, input_evaluators_solver["execute"])
+            if self.output_scripts[solver]:
+                self.generate_output_script(path, solver)
+        return
+
+    def job_control_commands(self, solver, input_evaluators_solver):
+        """Returns the bash commands that run a solver's input script,
+        execute scripts or executables, and output script in an individual's
+        directory for parallel_method=job_control
+
+        Parameters
+        ----------
+        solver : str
+            name of solver
+        input_evaluators_solver: dict
+            specific solver's evaluators sub-sub-dictionary from input file
+
+        Returns
+        -------
+        commands : list of str
+            bash commands in the order they must run
+
+        """
+        commands = [
+            self.input_scripts[solver][0] + " " +
+            self.input_scripts[solver][1] + " > " + solver +
+            "_input_script_out.txt 2>&1"]
+        if "execute" in input_evaluators_solver:
+            for execute_index, executable in enumerate(
+                    input_evaluators_solver["execute"]):
+                single_command = ""
+                for exe in executable:
+                    single_command += exe + " "
+                single_command += "> " + solver + \
+                    "_execute_" + str(execute_index) + "_out.txt 2>&1"
+                commands.append(single_command)
+        if self.output_scripts[solver]:
+            commands.append(
+                self.output_scripts[solver][0] + " " +
+                self.output_scripts[solver][1] + " > " + solver +
+                "_output_script_out.txt 2>&1")
+        return commands
+
+    def run_job_control_queue(
+            self,
+            pop,
+            order_of_solvers,
+            control_vars_dict,
+            output_dict,
+            input_evaluators,
+            max_concurrent_evaluations=None,
+            partial_results_dict=None,
+            required=None):
+        """Evaluates every individual in pop for parallel_method=job_control.
+        Each individual's ordered chain of solvers is one task in a bounded
+        work queue: at most max_concurrent_evaluations individuals run at the
+        same time, and the next individual starts as soon as a running one
+        finishes its last solver.
+
+        If speculative_fraction is set, once that fraction of pop has
+        finished, duplicates of the individuals that have been running longest
+        are started on idle slots. If required is set, the remaining
+        individuals are cancelled once that many have finished (see
+        `run_queue_as_completed`).
+
+        Parameters
+        ----------
+        pop : list
+            list of deap.creator.Ind
+        order_of_solvers : list
+            list with solver name at its order index
+        control_vars_dict: dict
+            multiple layers of dicts
+            layer 1: gen_ind dir (str)
+            layer 2: solver (str)
+            layer 3: control parameter (str)
+            layer 4: control parameter value (float)
+        output_dict : OrderedDict
+            Ordered dict of output variables as keys and solvers as values
+        input_evaluators : dict
+            evaluators sub-dictionary from input file
+        max_concurrent_evaluations : int, optional
+            maximum number of individuals evaluated at the same time, defaults
+            to the number of CPUs
+        partial_results_dict : dict, optional
+            key is gen_ind dir (str), value is the individual's reused
+            solvers and output values from `partial_results`
+        required : int, optional
+            number of individuals that must finish, defaults to all of pop
+
+        Returns
+        -------
+        all_output_vals : list
+            each index of list contains a tuple of output values from
+            evaluators ordered by output_dict (None for cancelled
+            individuals)
+
+        """
+        max_workers = max_concurrent_evaluations or os.cpu_count()
+        start_times = {}
+        self.cancellable = self.speculative_fraction is not None or \
+            required is not None
+
+        def run_ind(ind):
+            path = self.ind_path(ind)
+            start_times[path] = time.time()
+            output_vals = self.run_ind_job_control(
+                ind,
+                order_of_solvers,
+                control_vars_dict,
+                output_dict,
+                input_evaluators,
+                partial_results_dict)
+            self.finish_times[path] = time.time()
+            return output_vals
+
+        with ThreadPoolExecutor(max_workers=max_workers) as queue:
+            if self.speculative_fraction is None and required is None:
+                all_output_vals = list(queue.map(run_ind, pop))
+            else:
+                all_output_vals = self.run_queue_as_completed(
+                    queue,
+                    max_workers,
+                    pop,
+                    run_ind,
+                    start_times,
+                    order_of_solvers,
+                    control_vars_dict,
+                    partial_results_dict,
+                    required)
+        return all_output_vals
+
+    def run_queue_as_completed(
+            self,
+            queue,
+            max_workers,
+            pop,
+            run_ind,
+            start_times,
+            order_of_solvers,
+            control_vars_dict,
+            partial_results_dict,
+            required=None):
+        """Evaluates the individuals in pop on queue and collects their output
+        values as they finish.
+
+        If speculative_fraction is set, once that fraction of pop has
+        finished, a duplicate of each of the longest-running unfinished
+        individuals is started on idle slots, in the individual's directory
+        name with an "_s" suffix. Whichever copy finishes first is kept, the
+        other is cancelled, and the winner's directory, resource usage,
+        failed solver runs, and finish time are left at the individual's own
+        path.
+
+        If required is set, once that many individuals have finished the
+        others are cancelled and their directories are removed.
+
+        Parameters
+        ----------
+        queue : concurrent.futures.ThreadPoolExecutor
+            work queue of individuals
+        max_workers : int
+            number of individuals evaluated at the same time
+        pop : list
+            list of deap.creator.Ind
+        run_ind : function
+            accepts an individual, records its start time in start_times, and
+            returns its output values (None if it was cancelled)
+        start_times : dict
+            key is gen_ind dir (str), value is the time its evaluation started
+        order_of_solvers : list
+            list with solver name at its order index
+        control_vars_dict: dict
+            multiple layers of dicts, see `run_job_control_queue`
+        partial_results_dict : dict or None
+            key is gen_ind dir (str), value is the individual's reused
+            solvers and output values from `partial_results`
+        required : int, optional
+            number of individuals that must finish, defaults to all of pop
+
+        Returns
+        -------
+        all_output_vals : list
+            each index of list contains a tuple of output values from
+            evaluators ordered by output_dict (None for cancelled
+            individuals)
+
+        """
+        if required is None:
+            required = len(pop)
+        required = min(required, len(pop))
+        all_output_vals = [None] * len(pop)
+        futures = {}
+        for i, ind in enumerate(pop):
+            futures[queue.submit(run_ind, ind)] = (i, ind)
+        pending = set(futures)
+        duplicates = {}
+        winners = {}
+        while len(winners) < required and pending:
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                i, ind = futures[future]
+                if future.cancelled():
+                    continue
+                output_vals = future.result()
+                if i in winners or output_vals is None:
+                    continue
+                all_output_vals[i] = output_vals
+                winners[i] = ind
+                if i in duplicates:
+                    loser = duplicates[i] if ind is pop[i] else pop[i]
+                    self.cancel_ind(loser, futures)
+            idle = max_workers - len(pending)
+            if self.speculative_fraction is None or idle <= 0 or \
+                    len(winners) < self.speculative_fraction * len(pop):
+                continue
+            stragglers = []
+            for i, ind in enumerate(pop):
+                path = self.ind_path(ind)
+                if i not in winners and i not in duplicates and \
+                        path in start_times:
+                    stragglers.append((start_times[path], i))
+            for start_time, i in sorted(stragglers)[:idle]:
+                duplicates[i] = self.duplicate_ind(
+                    pop[i], order_of_solvers, control_vars_dict,
+                    partial_results_dict)
+                future = queue.submit(run_ind, duplicates[i])
+                futures[future] = (i, duplicates[i])
+                pending.add(future)
+        unfinished = [i for i in range(len(pop)) if i not in winners]
+        for i in unfinished:
+            self.cancel_ind(pop[i], futures)
+            if i in duplicates:
+                self.cancel_ind(duplicates[i], futures)
+        if unfinished:
+            logging.info(" Generation: " + str(pop[0].gen) + ", " +
+                         str(len(unfinished)) + " individuals still running" +
+                         " after " + str(required) + " finished were " +
+                         "cancelled")
+        # cancelled copies exit before their directories are removed
+        wait(pending)
+        for i in unfinished:
+            self.finish_ind_directory(self.ind_path(pop[i]), False)
+        for i, duplicate in duplicates.items():
+            path = self.ind_path(pop[i])
+            duplicate_path = self.ind_path(duplicate)
+            usage = self.usage_records.pop(duplicate_path, [])
+            failures = self.failure_records.pop(duplicate_path, [])
+            finish_time = self.finish_times.pop(duplicate_path, None)
+            if winners.get(i) is duplicate:
+                self.usage_records[path] = usage
+                self.failure_records[path] = failures
+                self.finish_times[path] = finish_time
+                shutil.rmtree(path, ignore_errors=True)
+                if os.path.isdir(duplicate_path):
+                    os.rename(duplicate_path, path)
+                with self.job_control_lock:
+                    if duplicate_path in self.timed_out_paths:
+                        self.timed_out_paths.add(path)
+                    if duplicate_path in self.failed_paths:
+                        self.failed_paths.add(path)
+                logging.info(" " + path + " was replaced by its duplicate " +
+                             duplicate_path + ", which finished first")
+            else:
+                self.finish_ind_directory(duplicate_path, False)
+        return all_output_vals
+
+    def duplicate_ind(
+            self,
+            ind,
+            order_of_solvers,
+            control_vars_dict,
+            partial_results_dict):
+        """Returns a speculative copy of an individual, evaluated in the
+        individual's directory name with an "_s" suffix, and creates its
+        directory so it can be evaluated alongside the original
+
+        Parameters
+        ----------
+        ind : deap.creator.Ind
+            Created in `rollo.toolbox_generator.ToolboxGenerator`. It is
+            a list with special attributes.
+        order_of_solvers : list
+            list with solver name at its order index
+        control_vars_dict: dict
+            multiple layers of dicts, see `run_job_control_queue`
+        partial_results_dict : dict or None
+            key is gen_ind dir (str), value is the individual's reused
+            solvers and output values from `partial_results`
+
+        Returns
+        -------
+        deap.creator.Ind
+            duplicate individual
+
+        """
+        path = self.ind_path(ind)
+        duplicate = copy.deepcopy(ind)
+        duplicate.speculative = True
+        duplicate_path = self.ind_path(duplicate)
+        control_vars_dict[duplicate_path] = control_vars_dict[path]
+        reused_solvers = []
+        if partial_results_dict is not None:
+            reused_solvers, output_vals = partial_results_dict[path]
+            partial_results_dict[duplicate_path] = (
+                reused_solvers, list(output_vals))
+        if self.needs_directory():
+            self.make_ind_directory(
+                duplicate, duplicate_path, order_of_solvers, reused_solvers,
+                control_vars_dict[path])
+        logging.info(" " + path + " is still running, started duplicate " +
+                     duplicate_path)
+        return duplicate
+
+    def cancel_ind(self, ind, futures):
+        """Stops evaluating an individual that is no longer needed, e.g. one
+        copy of an individual after the other copy finished first. It is
+        removed from the queue if it has not started, otherwise its running
+        command is killed and it launches no further commands.
+
+        Parameters
+        ----------
+        ind : deap.creator.Ind
+            Created in `rollo.toolbox_generator.ToolboxGenerator`. It is
+            a list with special attributes.
+        futures : dict
+            key is concurrent.futures.Future, value is its (index, individual)
+
+        Returns
+        -------
+        None
+
+        """
+        path = self.ind_path(ind)
+        with self.job_control_lock:
+            self.cancelled_paths.add(path)
+            process = self.job_control_processes.get(path)
+        for future, (i, future_ind) in futures.items():
+            if future_ind is ind:
+                future.cancel()
+        if process is not None:
+            self.kill_process_group(process.pid)
+        return
+
+    def is_cancelled(self, path):
+        """Returns True if an individual was cancelled by `cancel_ind`
+
+        Parameters
+        ----------
+        path : str
+            path name
+
+        Returns
+        -------
+        bool
+
+        """
+        with self.job_control_lock:
+            return path in self.cancelled_paths
+
+    def run_ind_job_control(
+            self,
+            ind,
+            order_of_solvers,
+            control_vars_dict,
+            output_dict,
+            input_evaluators,
+            partial_results_dict=None):
+        """Runs one individual's chain of solvers (input script, execute
+        scripts or executables, output script, then the next solver) in its
+        directory for parallel_method=job_control. Each command's exit code
+        and runtime are appended to job_control_records.
+
+        Parameters
+        ----------
+        ind : deap.creator.Ind
+            Created in `rollo.toolbox_generator.ToolboxGenerator`. It is
+            a list with special attributes.
+        order_of_solvers : list
+            list with solver name at its order index
+        control_vars_dict: dict
+            multiple layers of dicts
+            layer 1: gen_ind dir (str)
+            layer 2: solver (str)
+            layer 3: control parameter (str)
+            layer 4: control parameter value (float)
+        output_dict : OrderedDict
+            Ordered dict of output variables as keys and solvers as values
+        input_evaluators : dict
+            evaluators sub-dictionary from input file
+        partial_results_dict : dict, optional
+            key is gen_ind dir (str), value is the individual's reused
+            solvers and output values from `partial_results`
+
+        Returns
+        -------
+        tuple or None
+            output values from evaluators ordered by output_dict, None if
+            the individual was cancelled by `cancel_ind`
+
+        """
+        path = self.ind_path(ind)
+        reused_solvers = []
+        output_vals = [None] * len(output_dict)
+        if partial_results_dict is not None:
+            reused_solvers, output_vals = partial_results_dict[path]
+        try:
+            for solver in order_of_solvers:
+                if self.is_cancelled(path):
+                    # another copy of this individual finished first
+                    return None
+                if self.is_penalized(path):
+                    break
+                if solver in reused_solvers or solver in self.batch_scripts:
+                    continue
+                if solver in self.callables:
+                    output_vals = self.run_callable(
+                        output_vals, solver, output_dict,
+                        control_vars_dict[path])
+                    continue
+                before = self.list_solver_files(path)
+                output_vals = self.run_with_retries(
+                    path, solver, functools.partial(
+                        self.run_solver_job_control, ind, path, solver,
+                        output_vals, output_dict, control_vars_dict,
+                        input_evaluators), output_vals)
+                self.record_solver_files(
+                    path, solver, before, control_vars_dict[path],
+                    order_of_solvers)
+                if output_vals is None:
+                    # another copy of this individual finished first
+                    return None
+        except subprocess.TimeoutExpired as error:
+            output_vals = self.timed_out(path, solver, error, output_vals)
+        return tuple(output_vals)
+
+    def run_solver_job_control(
+            self,
+            ind,
+            path,
+            solver,
+            output_vals,
+            output_dict,
+            control_vars_dict,
+            input_evaluators):
+        """Runs a solver's input script, execute steps, and output script in
+        an individual's directory for parallel_method=job_control
+
+        Parameters
+        ----------
+        ind : deap.creator.Ind
+            Created in `rollo.toolbox_generator.ToolboxGenerator`. It is
+            a list with special attributes.
+        path : str
+            path name
+        solver : str
+            name of solver
+        output_vals : list
+            the individual's output values so far
+        output_dict : OrderedDict
+            Ordered dict of output variables as keys and solvers as values
+        control_vars_dict: dict
+            multiple layers of dicts, see `run_ind_job_control`
+        input_evaluators : dict
+            evaluators sub-dictionary from input file
+
+        Returns
+        -------
+        output_vals : list or None
+            output_vals populated with the solver's output values, None if
+            the individual was cancelled by `cancel_ind`
+
+        """
+        self.create_input_execute_output_scripts(
+            [ind], solver, control_vars_dict, input_evaluators[solver])
+        commands = self.job_control_commands(
+            solver, input_evaluators[solver])
+        # input and output scripts may run in warm worker processes
+        scripts = {0: ["_input_script_out.txt",
+                       self.input_scripts[solver]]}
+        if self.output_scripts[solver]:
+            scripts[len(commands) - 1] = [
+                "_output_script_out.txt",
+                self.output_scripts[solver]]
+        # execute steps follow the input script
+        executes = input_evaluators[solver].get("execute", [])
+        execute_memoize = input_evaluators[solver].get(
+            "execute_memoize")
+        with self.reserve_resources(solver, path):
+            for step, single_command in enumerate(commands):
+                if self.is_cancelled(path):
+                    # another copy of this individual finished first
+                    return None
+                i = step - 1
+                key = None
+                if 0 <= i < len(executes):
+                    key = self.execute_step_key(
+                        solver, i, executes[i],
+                        control_vars_dict[path][solver],
+                        execute_memoize)
+                    if self.restore_execute_step(
+                            path,
+                            solver + "_execute_" + str(i) + "_out.txt",
+                            key, i, execute_memoize):
+                        continue
+                if step in scripts and self.uses_warm_worker(
+                        solver, scripts[step][1]):
+                    record = self.run_warm_worker_command(
+                        path, solver, solver + scripts[step][0],
+                        scripts[step][1])
+                else:
+                    record = self.run_job_control_command(
+                        path, solver, single_command)
+                if self.is_cancelled(path):
+                    return None
+                if record["returncode"] != 0:
+                    logging.warning(" Solver: " + solver +
+                                    ", command '" + single_command +
+                                    "' exited with code " +
+                                    str(record["returncode"]) +
+                                    " in " + path)
+                self.job_control_records.append(record)
+                self.save_execute_step(
+                    path, key, i, execute_memoize,
+                    record["returncode"])
+                self.check_returncode(
+                    path, solver, single_command, record["returncode"])
+        output_vals = self.get_output_vals(
+            output_vals, solver, path, output_dict,
+            control_vars_dict[path])
+        return output_vals
+
+    def run_warm_worker_command(self, path, solver, out_file, script):
+        """Runs an input or output script in a warm worker process and blocks
+        until it exits
+
+        Parameters
+        ----------
+        path : str
+            path name
+        solver : str
+            name of solver
+        out_file : str
+            txt file (relative to path) to output script's stderror and
+            stdoutput to
+        script : list of str
+            1st element: executable, 2nd element: script name
+
+        Returns
+        -------
+        dict
+            keys: path, solver, command, returncode, runtime (seconds)
+
+        Raises
+        ------
+        subprocess.TimeoutExpired
+            if the script was killed after the solver's timeout
+
+        """
+        start_time = time.time()
+        self.start_warm_workers()
+        returncode = self.warm_workers.run(
+            path, out_file, script[1], self.timeouts.get(solver),
+            self.pinned_cpus(), self.solver_env(solver))
+        return {
+            "path": path,
+            "solver": solver,
+            "command": script[0] + " " + script[1],
+            "returncode": returncode,
+            "runtime": time.time() - start_time,
+        }
+
+    def log_job_control_records(self, gen):
+        """Logs the number of runs and the mean and maximum runtime of each
+        solver's commands in a generation, then clears job_control_records
+
+        Parameters
+        ----------
+        gen : int
+            generation number
+
+        Returns
+        -------
+        None
+
+        """
+        runtimes = {}
+        for record in self.job_control_records:
+            runtimes.setdefault(
+                (record["solver"], record["command"]), []).append(
+                record["runtime"])
+        for (solver, command), solver_runtimes in runtimes.items():
+            logging.info(" Generation: " + str(gen) + ", Solver: " + solver +
+                         ", '" + command + "' Runs: " +
+                         str(len(solver_runtimes)) + ", Mean Runtime: " +
+                         str(round(sum(solver_runtimes) /
+                                   len(solver_runtimes), 2)) +
+                         " seconds, Max Runtime: " +
+                         str(round(max(solver_runtimes), 2)) + " seconds")
+        self.job_control_records = []
+        return
+
+    def run_job_control_command(self, path, solver, single_command):
+        """Runs one bash command in an individual's directory, blocks until
+        it exits, and records its resource usage for the individual
+
+        Parameters
+        ----------
+        path : str
+            path name
+        solver : str
+            name of solver
+        single_command : str
+            bash command to run
+
+        Returns
+        -------
+        dict
+            keys: path, solver, command, returncode, runtime (seconds)
+
+        Raises
+        ------
+        subprocess.TimeoutExpired
+            if the command was killed after the solver's timeout
+
+        """
+        start_time = time.time()
+        timeout = self.timeouts.get(solver)
+        # its own process group, so it can be killed with its children
+        process = subprocess.Popen(
+            self.numactl_command(single_command),
+            shell=True,
+            cwd=path,
+            env=self.solver_env(solver),
+            start_new_session=timeout is not None or self.cancellable,
+            preexec_fn=self.pin_child())
+        with self.job_control_lock:
+            self.job_control_processes[path] = process
+            cancelled = path in self.cancelled_paths
+        if cancelled:
+            # cancelled while it was being launched
+            self.kill_process_group(process.pid)
+        try:
+            returncode, rusage = self.wait_process(process, timeout)
+        except subprocess.TimeoutExpired:
+            self.kill_process_group(process.pid)
+            process.wait()
+            raise
+        finally:
+            with self.job_control_lock:
+                self.job_control_processes.pop(path, None)
+        self.record_usage(
+            path, solver, single_command, time.time() - start_time, rusage)
+        return {
+            "path": path,
+            "solver": solver,
+            "command": single_command,
+            "returncode": returncode,
+            "runtime": time.time() - start_time,
+        }
@@ -0,0 +1,339 @@
+from contextlib import contextmanager
+import threading
+import glob
+import os
+
+
+class ResourcePool(object):
+    """The ResourcePool class holds a node's cores and memory and hands them
+    out to concurrent solver runs, so runs that declare how many cores and
+    how much memory they use are packed onto the node without
+    oversubscribing it. A run that does not fit waits until running ones
+    release enough resources.
+
+    If cpus is given, each run is also handed a disjoint set of those CPUs
+    to pin its processes to, within one NUMA node when one has enough free
+    CPUs.
+
+    Parameters
+    ----------
+    cores : int
+        number of cores on the node
+    memory_gb : float
+        memory on the node in GB
+    cpus : list of int, optional
+        ids of the CPUs handed out to runs, one per core
+    numa_nodes : dict, optional
+        key is CPU id, value is its NUMA node
+
+    Attributes
+    ----------
+    cores : int
+        number of cores on the node
+    memory_gb : float
+        memory on the node in GB
+    free_cores : int
+        cores not reserved by a run
+    free_memory_gb : float
+        memory not reserved by a run in GB
+    cpus : list of int or None
+        ids of the CPUs handed out to runs, None if runs are not pinned
+    numa_nodes : dict
+        key is CPU id, value is its NUMA node
+    free_cpus : list of int or None
+        CPUs not reserved by a run
+
+    """
+
+    def __init__(self, cores, memory_gb, cpus=None, numa_nodes=None):
+        self.cores = cores
+        self.memory_gb = memory_gb
+        self.free_cores = cores
+        self.free_memory_gb = memory_gb
+        self.cpus = cpus
+        self.numa_nodes = numa_nodes or {}
+        self.free_cpus = None if cpus is None else list(cpus)
+        self.condition = threading.Condition()
+
+    def __getstate__(self):
+        # each process that unpickles the pool packs its own runs
+        state = self.__dict__.copy()
+        state["condition"] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.condition = threading.Condition()
+        if self.cpus is not None:
+            # only hand out the CPUs this process may run on, e.g. its slot
+            # of a multiprocessing pool, see `pin_process`
+            allowed = os.sched_getaffinity(0)
+            self.cpus = [cpu for cpu in self.cpus if cpu in allowed] or \
+                self.cpus
+            self.cores = self.free_cores = len(self.cpus)
+            self.free_cpus = list(self.cpus)
+
+    def fit(self, cores, memory_gb):
+        """Returns the request limited to the node's size, so a request
+        larger than the node runs alone instead of waiting forever
+
+        Parameters
+        ----------
+        cores : int
+            cores requested
+        memory_gb : float
+            memory requested in GB
+
+        Returns
+        -------
+        tuple
+            (cores, memory_gb)
+
+        """
+        return min(cores, self.cores), min(memory_gb, self.memory_gb)
+
+    def try_acquire(self, cores, memory_gb):
+        """Reserves resources if they are free
+
+        Parameters
+        ----------
+        cores : int
+            cores requested
+        memory_gb : float
+            memory requested in GB
+
+        Returns
+        -------
+        list of int or None
+            CPUs reserved for the run (empty if the pool does not pin runs),
+            None if the resources are not free
+
+        """
+        cores, memory_gb = self.fit(cores, memory_gb)
+        with self.condition:
+            if cores > self.free_cores or memory_gb > self.free_memory_gb:
+                return None
+            return self.take(cores, memory_gb)
+
+    def acquire(self, cores, memory_gb):
+        """Reserves resources, waiting until they are free
+
+        Parameters
+        ----------
+        cores : int
+            cores requested
+        memory_gb : float
+            memory requested in GB
+
+        Returns
+        -------
+        list of int
+            CPUs reserved for the run, empty if the pool does not pin runs
+
+        """
+        cores, memory_gb = self.fit(cores, memory_gb)
+        with self.condition:
+            self.condition.wait_for(
+                lambda: cores <= self.free_cores and
+                memory_gb <= self.free_memory_gb)
+            return self.take(cores, memory_gb)
+
+    def take(self, cores, memory_gb):
+        """Reserves free resources, the caller holds the condition's lock.
+        CPUs are taken from the NUMA node with the fewest free CPUs that
+        still fits the run, so larger nodes stay whole for larger runs.
+
+        Parameters
+        ----------
+        cores : int
+            cores requested
+        memory_gb : float
+            memory requested in GB
+
+        Returns
+        -------
+        list of int
+            CPUs reserved for the run, empty if the pool does not pin runs
+
+        """
+        self.free_cores -= cores
+        self.free_memory_gb -= memory_gb
+        if self.free_cpus is None:
+            return []
+        free_by_node = {}
+        for cpu in self.free_cpus:
+            free_by_node.setdefault(
+                self.numa_nodes.get(cpu, 0), []).append(cpu)
+        fitting = [cpus for cpus in free_by_node.values()
+                   if len(cpus) >= cores]
+        if fitting:
+            cpus = min(fitting, key=len)[:cores]
+        else:
+            cpus = sorted(self.free_cpus)[:cores]
+        for cpu in cpus:
+            self.free_cpus.remove(cpu)
+        return sorted(cpus)
+
+    def release(self, cores, memory_gb, cpus=()):
+        """Returns reserved resources to the pool and wakes waiting runs
+
+        Parameters
+        ----------
+        cores : int
+            cores reserved
+        memory_gb : float
+            memory reserved in GB
+        cpus : list of int, optional
+            CPUs reserved
+
+        """
+        cores, memory_gb = self.fit(cores, memory_gb)
+        with self.condition:
+            self.free_cores += cores
+            self.free_memory_gb += memory_gb
+            if self.free_cpus is not None:
+                self.free_cpus.extend(cpus)
+            self.condition.notify_all()
+
+    def numa_node(self, cpus):
+        """Returns the NUMA node that all of cpus are on
+
+        Parameters
+        ----------
+        cpus : list of int
+            CPU ids
+
+        Returns
+        -------
+        int or None
+            NUMA node, None if cpus span several nodes or the topology is
+            unknown
+
+        """
+        nodes = set(self.numa_nodes.get(cpu) for cpu in cpus)
+        if len(nodes) != 1:
+            return None
+        return nodes.pop()
+
+    def slots(self, number):
+        """Splits the pool's CPUs into disjoint slots of equal size,
+        keeping CPUs of the same NUMA node together
+
+        Parameters
+        ----------
+        number : int
+            number of slots
+
+        Returns
+        -------
+        list
+            number lists of CPU ids
+
+        """
+        cpus = sorted(self.cpus,
+                      key=lambda cpu: (self.numa_nodes.get(cpu, 0), cpu))
+        size = max(len(cpus) // number, 1)
+        return [cpus[(i * size) % len(cpus):][:size] for i in range(number)]
+
+    @contextmanager
+    def reserve(self, cores, memory_gb):
+        """Context manager that holds resources while its block runs
+
+        Parameters
+        ----------
+        cores : int
+            cores requested
+        memory_gb : float
+            memory requested in GB
+
+        Yields
+        ------
+        list of int
+            CPUs reserved for the run, empty if the pool does not pin runs
+
+        """
+        cpus = self.acquire(cores, memory_gb)
+        try:
+            yield cpus
+        finally:
+            self.release(cores, memory_gb, cpus)
+
+
+def parse_cpu_list(cpu_list):
+    """Parses a Linux CPU list, e.g. ``0-3,8``
+
+    Parameters
+    ----------
+    cpu_list : str
+        comma-separated CPU ids and ranges
+
+    Returns
+    -------
+    list of int
+        CPU ids
+
+    """
+    cpus = []
+    for part in cpu_list.strip().split(","):
+        if not part:
+            continue
+        first, _, last = part.partition("-")
+        cpus += range(int(first), int(last or first) + 1)
+    return cpus
+
+
+def format_cpu_list(cpus):
+    """Formats CPU ids as a Linux CPU list, e.g. ``0-3,8``, as numactl and
+    taskset accept
+
+    Parameters
+    ----------
+    cpus : list of int
+        CPU ids
+
+    Returns
+    -------
+    str
+
+    """
+    ranges = []
+    for cpu in sorted(cpus):
+        if ranges and cpu == ranges[-1][1] + 1:
+            ranges[-1][1] = cpu
+        else:
+            ranges.append([cpu, cpu])
+    return ",".join(str(first) if first == last else
+                    str(first) + "-" + str(last) for first, last in ranges)
+
+
+def read_numa_nodes():
+    """Reads the node's NUMA topology from sysfs
+
+    Returns
+    -------
+    dict
+        key is CPU id, value is its NUMA node, empty if the topology is
+        unknown
+
+    """
+    numa_nodes = {}
+    for path in glob.glob("/sys/devices/system/node/node*/cpulist"):
+        node = int(os.path.basename(os.path.dirname(path))[4:])
+        with open(path) as fp:
+            for cpu in parse_cpu_list(fp.read()):
+                numa_nodes[cpu] = node
+    return numa_nodes
+
+
+def pin_process(slots):
+    """Pins the calling process to the next slot of CPUs in slots, used as
+    initializer of the worker processes of parallel_method=multiprocessing
+    so each works on its own CPUs
+
+    Parameters
+    ----------
+    slots : multiprocessing.Queue
+        lists of CPU ids
+
+    """
+    os.sched_setaffinity(0, slots.get())
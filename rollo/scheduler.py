@@ -0,0 +1,377 @@
+import subprocess
+import tempfile
+import logging
+import shlex
+import time
+import os
+import jinja2
+from .errors import SolverError
+
+# default job script for parallel_method=scheduler: a Slurm job array that
+# runs the rollo_job.sh of the individual on the array index's line of
+# jobs_file
+SLURM_JOB_ARRAY_TEMPLATE = """#!/bin/bash
+#SBATCH --job-name=rollo_{{ gen }}
+#SBATCH --array=0-{{ num_jobs - 1 }}
+#SBATCH --output={{ scheduler_dir }}/job_%a_out.txt
+bash "$(sed -n "$((SLURM_ARRAY_TASK_ID + 1))p" {{ jobs_file }})/rollo_job.sh"
+"""
+
+
+class SchedulerEvaluation(object):
+    """The SchedulerEvaluation class holds the `rollo.evaluation.Evaluation`
+    methods for parallel_method=scheduler: each generation is submitted to
+    the cluster's batch scheduler as one job array, one task per individual.
+    The job scripts they write are also run by the workers of
+    parallel_method=distributed.
+
+    """
+
+    def run_scheduler_job_array(
+            self,
+            pop,
+            order_of_solvers,
+            control_vars_dict,
+            output_dict,
+            input_evaluators,
+            partial_results_dict,
+            keep):
+        """Evaluates every individual in pop as one task of a batch scheduler
+        job array for parallel_method=scheduler. Each individual's solver
+        commands are written to ``rollo_job.sh`` in its directory, the
+        directories are listed in ``jobs.txt`` (one per array index), and
+        the job script rendered from the scheduler template is submitted
+        with the scheduler's submit command. The individuals' output values
+        are collected once each of their ``rollo_job.done`` files exists.
+        After the scheduler timeout, the job array is cancelled with the
+        scheduler's cancel command and the unfinished individuals are given
+        penalty output values.
+
+        Parameters
+        ----------
+        pop : list
+            list of deap.creator.Ind
+        order_of_solvers : list
+            list with solver name at its order index
+        control_vars_dict: dict
+            multiple layers of dicts, see `run_job_control_queue`
+        output_dict : OrderedDict
+            Ordered dict of output variables as keys and solvers as values
+        input_evaluators : dict
+            evaluators sub-dictionary from input file
+        partial_results_dict : dict
+            key is gen_ind dir (str), value is the individual's reused
+            solvers and output values from `partial_results`
+        keep : bool
+            if True, the job array's directory is kept
+
+        Returns
+        -------
+        all_output_vals : list
+            each index of list contains a tuple of output values from
+            evaluators ordered by output_dict
+
+        """
+        solvers = self.prepare_job_scripts(
+            pop,
+            order_of_solvers,
+            control_vars_dict,
+            output_dict,
+            input_evaluators,
+            partial_results_dict)
+        scheduler_path = tempfile.mkdtemp(
+            prefix=str(pop[0].gen) + "_scheduler_",
+            dir=self.make_scratch_dir() or ".")
+        jobs = [path for path in solvers if solvers[path]]
+        job_id = None
+        if jobs:
+            job_id = self.submit_scheduler_job_array(
+                scheduler_path, pop[0].gen, jobs)
+        poll_interval = self.scheduler.get("poll_interval", 5)
+        timeout = self.scheduler.get("timeout")
+        start_time = time.time()
+        waiting = set(jobs)
+        while waiting:
+            for path in list(waiting):
+                if os.path.exists(os.path.join(path, "rollo_job.done")):
+                    waiting.remove(path)
+            if not waiting:
+                break
+            if timeout is not None and time.time() - start_time > timeout:
+                self.cancel_scheduler_job_array(scheduler_path, job_id)
+                error = subprocess.TimeoutExpired(
+                    os.path.join(scheduler_path, "job_array.sh"), timeout)
+                for path in waiting:
+                    partial_results_dict[path] = (
+                        partial_results_dict[path][0],
+                        self.timed_out(path, "scheduler", error,
+                                       partial_results_dict[path][1]))
+                break
+            time.sleep(poll_interval)
+        self.finish_ind_directory(scheduler_path, keep)
+        return self.collect_job_output_vals(
+            pop, solvers, control_vars_dict, output_dict,
+            partial_results_dict)
+
+    def prepare_job_scripts(
+            self,
+            pop,
+            order_of_solvers,
+            control_vars_dict,
+            output_dict,
+            input_evaluators,
+            partial_results_dict):
+        """Runs the individuals' Python callables, renders the scripts of
+        the solvers that run in a job (parallel_method=scheduler or
+        distributed), and writes each individual's ``rollo_job.sh``
+
+        Parameters
+        ----------
+        pop : list
+            list of deap.creator.Ind
+        order_of_solvers : list
+            list with solver name at its order index
+        control_vars_dict: dict
+            multiple layers of dicts, see `run_job_control_queue`
+        output_dict : OrderedDict
+            Ordered dict of output variables as keys and solvers as values
+        input_evaluators : dict
+            evaluators sub-dictionary from input file
+        partial_results_dict : dict
+            key is gen_ind dir (str), value is the individual's reused
+            solvers and output values from `partial_results`; callables'
+            output values are added to it
+
+        Returns
+        -------
+        solvers : dict
+            key is gen_ind dir (str), value is the list of solvers that run
+            in the individual's job (empty if it does not need a job)
+
+        """
+        solvers = {}
+        for ind in pop:
+            path = self.ind_path(ind)
+            reused_solvers, output_vals = partial_results_dict[path]
+            solvers[path] = [
+                solver for solver in order_of_solvers
+                if solver not in reused_solvers and
+                solver not in self.batch_scripts and
+                not self.is_penalized(path)]
+            for solver in list(solvers[path]):
+                if solver in self.callables:
+                    self.run_callable(
+                        output_vals, solver, output_dict,
+                        control_vars_dict[path])
+                    solvers[path].remove(solver)
+                    continue
+                self.create_input_execute_output_scripts(
+                    [ind], solver, control_vars_dict,
+                    input_evaluators[solver])
+            if solvers[path]:
+                self.write_job_script(path, solvers[path], input_evaluators)
+        return solvers
+
+    def collect_job_output_vals(
+            self,
+            pop,
+            solvers,
+            control_vars_dict,
+            output_dict,
+            partial_results_dict):
+        """Returns the individuals' output values once their jobs (from
+        `prepare_job_scripts`) are finished, and reports non-zero exit codes
+        of the jobs' commands as warnings
+
+        Parameters
+        ----------
+        pop : list
+            list of deap.creator.Ind
+        solvers : dict
+            key is gen_ind dir (str), value is the list of solvers that ran
+            in the individual's job
+        control_vars_dict: dict
+            multiple layers of dicts, see `run_job_control_queue`
+        output_dict : OrderedDict
+            Ordered dict of output variables as keys and solvers as values
+        partial_results_dict : dict
+            key is gen_ind dir (str), value is the individual's reused
+            solvers and output values
+
+        Returns
+        -------
+        all_output_vals : list
+            each index of list contains a tuple of output values from
+            evaluators ordered by output_dict
+
+        """
+        all_output_vals = []
+        for ind in pop:
+            path = self.ind_path(ind)
+            output_vals = partial_results_dict[path][1]
+            if not self.is_penalized(path):
+                self.log_job_returncodes(path)
+                for solver in solvers[path]:
+                    try:
+                        output_vals = self.get_output_vals(
+                            output_vals, solver, path, output_dict,
+                            control_vars_dict[path])
+                    except SolverError as error:
+                        # the job already ran, so it is not retried
+                        self.failed(path, solver, 0, error, retry=False)
+                        output_vals = self.solver_penalty_vals(
+                            solver, output_vals)
+                        break
+            all_output_vals.append(tuple(output_vals))
+        return all_output_vals
+
+    def write_job_script(self, path, solvers, input_evaluators):
+        """Writes ``rollo_job.sh`` in an individual's directory. It runs the
+        solvers' commands in order in that directory, records each command's
+        exit code in ``rollo_job_returncodes.txt``, and creates
+        ``rollo_job.done`` when it is finished.
+
+        Parameters
+        ----------
+        path : str
+            path name
+        solvers : list of str
+            solvers that run in the job, in order
+        input_evaluators : dict
+            evaluators sub-dictionary from input file
+
+        Returns
+        -------
+        None
+
+        """
+        lines = ["#!/bin/bash", 'cd "$(dirname "$0")"']
+        for solver in solvers:
+            env = ""
+            if solver in self.resources:
+                env = "OMP_NUM_THREADS=" + str(self.resources[solver][0]) + \
+                    " "
+            for single_command in self.job_control_commands(
+                    solver, input_evaluators[solver]):
+                lines.append(env + single_command)
+                lines.append("echo $? " + shlex.quote(single_command) +
+                             " >> rollo_job_returncodes.txt")
+        lines.append("touch rollo_job.done")
+        job_script = os.path.join(path, "rollo_job.sh")
+        with open(job_script, "w") as fp:
+            fp.write("\n".join(lines) + "\n")
+        os.chmod(job_script, 0o755)
+        return
+
+    def submit_scheduler_job_array(self, scheduler_path, gen, jobs):
+        """Renders the job array script from the scheduler template into
+        scheduler_path and submits it with the scheduler's submit command
+
+        Parameters
+        ----------
+        scheduler_path : str
+            path name of the job array's directory
+        gen : int
+            generation number
+        jobs : list of str
+            individuals' path names, one per job array index
+
+        Returns
+        -------
+        str or None
+            job ID, the last word the submit command printed (e.g. 123 for
+            sbatch's "Submitted batch job 123", 123.server for qsub), None
+            if it printed nothing
+
+        """
+        jobs_file = os.path.abspath(os.path.join(scheduler_path, "jobs.txt"))
+        with open(jobs_file, "w") as fp:
+            for path in jobs:
+                fp.write(os.path.abspath(path) + "\n")
+        template_file = self.scheduler.get("template")
+        if template_file is None:
+            template = jinja2.Template(SLURM_JOB_ARRAY_TEMPLATE)
+        else:
+            template = self.get_template(template_file)
+        with open(os.path.join(scheduler_path, "job_array.sh"), "w") as fp:
+            fp.write(template.render(
+                gen=gen,
+                num_jobs=len(jobs),
+                jobs_file=jobs_file,
+                scheduler_dir=os.path.abspath(scheduler_path),
+                cores=max([1] + [cores for cores, _ in
+                                 self.resources.values()]),
+                memory_gb=max([0] + [memory_gb for _, memory_gb in
+                                     self.resources.values()])))
+        command = " ".join(self.scheduler.get("submit", ["sbatch"]) +
+                           ["job_array.sh"])
+        returncode = self.subprocess_call(
+            scheduler_path, "submit_out.txt", command)
+        if returncode != 0:
+            raise Exception(
+                "ROLLO could not submit the job array with '" + command +
+                "', see " + os.path.join(scheduler_path, "submit_out.txt"))
+        logging.info(" Generation: " + str(gen) + ", submitted " +
+                     str(len(jobs)) + " individuals as a job array")
+        with open(os.path.join(scheduler_path, "submit_out.txt")) as fp:
+            words = fp.read().split()
+        if not words:
+            return None
+        # sbatch --parsable prints "job_id;cluster"
+        return words[-1].split(";")[0]
+
+    def cancel_scheduler_job_array(self, scheduler_path, job_id):
+        """Cancels a submitted job array with the scheduler's cancel
+        command, so its unfinished tasks do not keep running after their
+        individuals were given penalty output values
+
+        Parameters
+        ----------
+        scheduler_path : str
+            path name of the job array's directory
+        job_id : str or None
+            job ID from `submit_scheduler_job_array`, nothing is cancelled
+            if it is None
+
+        Returns
+        -------
+        None
+
+        """
+        if job_id is None:
+            return
+        command = " ".join(self.scheduler.get("cancel", ["scancel"]) +
+                           [shlex.quote(job_id)])
+        returncode = self.subprocess_call(
+            scheduler_path, "cancel_out.txt", command)
+        if returncode != 0:
+            logging.warning(" ROLLO could not cancel job " + job_id +
+                            " with '" + command + "', see " +
+                            os.path.join(scheduler_path, "cancel_out.txt"))
+        return
+
+    def log_job_returncodes(self, path):
+        """Reports non-zero exit codes recorded by an individual's
+        ``rollo_job.sh`` as warnings
+
+        Parameters
+        ----------
+        path : str
+            path name
+
+        Returns
+        -------
+        None
+
+        """
+        returncodes_file = os.path.join(path, "rollo_job_returncodes.txt")
+        if not os.path.exists(returncodes_file):
+            return
+        with open(returncodes_file) as fp:
+            for line in fp:
+                returncode, single_command = line.rstrip("\n").split(" ", 1)
+                if returncode != "0":
+                    logging.warning(" Command '" + single_command +
+                                    "' exited with code " + returncode +
+                                    " in " + path)
+        return
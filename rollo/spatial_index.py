@@ -0,0 +1,126 @@
+import numpy
+
+try:
+    from scipy.spatial import cKDTree
+except ImportError:
+    cKDTree = None
+
+
+class SpatialIndex(object):
+    """The SpatialIndex class holds evaluated individuals' control variable
+    values and finds an evaluated individual within a per-variable tolerance
+    of a new one, so its output values can be reused instead of running the
+    solvers again.
+
+    Two individuals are within tolerance if every control variable differs by
+    at most that variable's tolerance. Variables with a tolerance of 0 must
+    match exactly. Individuals are grouped by their exactly-matching
+    variables, and each group's tolerant variables (divided by their
+    tolerances) are searched with a scipy.spatial.cKDTree using the Chebyshev
+    distance, or with numpy if scipy is not installed.
+
+    Parameters
+    ----------
+    tolerances : list of float
+        ordered list of tolerances for individual variables
+
+    Attributes
+    ----------
+    tolerances : numpy.ndarray
+        ordered array of tolerances for individual variables
+    groups : dict
+        key is a tuple of an individual's exactly-matching variable values,
+        value is a dict with the group's scaled points, values, and search
+        tree
+
+    """
+
+    def __init__(self, tolerances):
+        self.tolerances = numpy.array(tolerances, dtype=float)
+        self.tolerant = self.tolerances > 0
+        self.groups = {}
+
+    def __len__(self):
+        return sum(len(group["values"]) for group in self.groups.values())
+
+    def split(self, point):
+        """Returns a point's group key and scaled tolerant variables
+
+        Parameters
+        ----------
+        point : list of float
+            individual's control variable values
+
+        Returns
+        -------
+        key : tuple
+            exactly-matching variable values
+        scaled : numpy.ndarray
+            tolerant variable values divided by their tolerances
+
+        """
+        point = numpy.array(point, dtype=float)
+        key = tuple(point[~self.tolerant])
+        scaled = point[self.tolerant] / self.tolerances[self.tolerant]
+        return key, scaled
+
+    def add(self, point, value):
+        """Adds an evaluated individual
+
+        Parameters
+        ----------
+        point : list of float
+            individual's control variable values
+        value : object
+            value returned by `query` for points within tolerance, e.g. the
+            individual's output values
+
+        """
+        key, scaled = self.split(point)
+        if key not in self.groups:
+            self.groups[key] = {"points": [], "values": [], "tree": None}
+        group = self.groups[key]
+        group["points"].append(scaled)
+        group["values"].append(value)
+        # rebuilt on the next query
+        group["tree"] = None
+        return
+
+    def query(self, point):
+        """Returns the value of the nearest added point within tolerance of
+        point
+
+        Parameters
+        ----------
+        point : list of float
+            individual's control variable values
+
+        Returns
+        -------
+        object or None
+            value of the nearest point within tolerance, None if there is none
+
+        """
+        key, scaled = self.split(point)
+        if key not in self.groups:
+            return None
+        group = self.groups[key]
+        if len(scaled) == 0:
+            # every variable matches exactly
+            return group["values"][0]
+        if group["tree"] is None:
+            points = numpy.array(group["points"])
+            if cKDTree is not None:
+                group["tree"] = cKDTree(points)
+            else:
+                group["tree"] = points
+        if cKDTree is not None:
+            distance, i = group["tree"].query(
+                scaled, k=1, p=numpy.inf, distance_upper_bound=1.0 + 1e-12)
+        else:
+            distances = numpy.max(numpy.abs(group["tree"] - scaled), axis=1)
+            i = int(numpy.argmin(distances))
+            distance = distances[i]
+        if distance > 1.0 + 1e-12:
+            return None
+        return group["values"][i]
@@ -68,6 +68,8 @@ class ToolboxGenerator(object):
         toolbox.register("evaluate", evaluator_fn)
         min_list, max_list = self.min_max_list(control_dict, input_ctrl_vars)
         toolbox.min_list, toolbox.max_list = min_list, max_list
+        toolbox.tolerance_list = self.tolerance_list(
+            control_dict, input_ctrl_vars)
         toolbox = self.add_toolbox_operators(
             toolbox,
             selection_dict=input_algorithm["selection_operator"],
@@ -140,6 +142,35 @@ class ToolboxGenerator(object):
             max_list.append(input_ctrl_vars[var]["max"])
         return min_list, max_list
 
+    def tolerance_list(self, control_dict, input_ctrl_vars):
+        """Returns an ordered list of tolerances for the individual. Two
+        individuals whose variables all differ by at most their tolerances
+        are treated as the same design.
+
+        Parameters
+        ----------
+        control_dict : OrderedDict
+            Ordered dict of control variables as keys and a list of their
+            solver and number of variables as each value
+        input_ctrl_vars : dict
+            control variables sub-dictionary from input file
+
+        Returns
+        -------
+        tolerance_list : list
+            ordered list of tolerances for individual variables, 0 for
+            variables without a tolerance
+
+        """
+
+        tolerance_list = []
+        for var in control_dict:
+            try:
+                tolerance_list.append(input_ctrl_vars[var]["tolerance"])
+            except KeyError:
+                tolerance_list.append(0)
+        return tolerance_list
+
     def add_toolbox_operators(
             self,
             toolbox,
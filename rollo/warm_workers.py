@@ -0,0 +1,300 @@
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import threading
+import importlib
+import subprocess
+import traceback
+import signal
+import runpy
+import time
+import sys
+import os
+
+
+class WarmWorkerPool(object):
+    """The WarmWorkerPool class holds a fixed set of long-lived Python worker
+    processes that import heavy solver modules (e.g. openmc, numpy, h5py)
+    once, when the worker starts. Rendered input and output scripts are then
+    run by a worker with runpy in a forked child (or in a clean namespace on
+    platforms without fork), so each script starts with the preloaded modules
+    already imported instead of paying a fresh interpreter's import cost.
+
+    Parameters
+    ----------
+    modules : list of str
+        names of modules each worker imports when it starts
+    max_workers : int
+        number of worker processes
+
+    Attributes
+    ----------
+    modules : list of str
+        names of modules each worker imports when it starts
+    max_workers : int
+        number of worker processes
+    executor : concurrent.futures.ProcessPoolExecutor or None
+        pool of worker processes, started on first use
+
+    """
+
+    def __init__(self, modules, max_workers):
+        self.modules = list(modules)
+        self.max_workers = max_workers
+        self.executor = None
+        self.pid = None
+        self.lock = threading.Lock()
+
+    def __getstate__(self):
+        # worker processes and locks belong to the process that started them
+        state = self.__dict__.copy()
+        state["executor"] = None
+        state["pid"] = None
+        state["lock"] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
+
+    def start(self):
+        """Starts the worker processes if they are not running in this
+        process yet
+
+        Returns
+        -------
+        concurrent.futures.ProcessPoolExecutor
+            pool of worker processes
+
+        """
+        with self.lock:
+            if self.executor is None or self.pid != os.getpid():
+                # workers start from a clean interpreter, not a fork of a
+                # possibly multi-threaded ROLLO process
+                if "forkserver" in multiprocessing.get_all_start_methods():
+                    context = multiprocessing.get_context("forkserver")
+                else:
+                    context = multiprocessing.get_context("spawn")
+                self.executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=context,
+                    initializer=preload_modules,
+                    initargs=(self.modules,))
+                self.pid = os.getpid()
+        return self.executor
+
+    def submit(self, path, out_file, script, timeout=None, cpus=None,
+               env=None):
+        """Submits a Python script to the worker processes
+
+        Parameters
+        ----------
+        path : str
+            path name of the directory the script runs in
+        out_file : str
+            txt file (relative to path) to output the script's stderror and
+            stdoutput to
+        script : str
+            script name (relative to path)
+        timeout : float, optional
+            seconds after which the script is killed
+        cpus : list of int, optional
+            CPUs the script is pinned to
+        env : dict, optional
+            the script's environment, defaults to the worker's
+
+        Returns
+        -------
+        concurrent.futures.Future
+            resolves to the script's exit code, or raises
+            subprocess.TimeoutExpired if the script was killed
+
+        """
+        return self.start().submit(
+            run_script, os.path.abspath(path), out_file, script, timeout,
+            cpus, env)
+
+    def run(self, path, out_file, script, timeout=None, cpus=None,
+            env=None):
+        """Runs a Python script in a worker process and blocks until it exits
+
+        Parameters
+        ----------
+        path : str
+            path name of the directory the script runs in
+        out_file : str
+            txt file (relative to path) to output the script's stderror and
+            stdoutput to
+        script : str
+            script name (relative to path)
+        timeout : float, optional
+            seconds after which the script is killed
+        cpus : list of int, optional
+            CPUs the script is pinned to
+        env : dict, optional
+            the script's environment, defaults to the worker's
+
+        Returns
+        -------
+        int
+            exit code of the script
+
+        """
+        return self.submit(
+            path, out_file, script, timeout, cpus, env).result()
+
+    def shutdown(self):
+        """Stops the worker processes"""
+        if self.executor is not None and self.pid == os.getpid():
+            self.executor.shutdown()
+        self.executor = None
+        return
+
+
+def preload_modules(modules):
+    """Imports modules in a worker process when it starts
+
+    Parameters
+    ----------
+    modules : list of str
+        names of modules to import
+
+    """
+    for module in modules:
+        importlib.import_module(module)
+    return
+
+
+def run_script(path, out_file, script, timeout=None, cpus=None, env=None):
+    """Runs a Python script in a forked child of the worker process, so the
+    script sees the preloaded modules but cannot change the worker's state.
+    The child is pinned to cpus and given env before the script starts, as a
+    solver's commands run in bash are; libraries that read the environment
+    when they are imported (e.g. OMP_NUM_THREADS for an OpenMP runtime
+    started by a preloaded module) keep the worker's setting. Falls back to
+    a clean namespace in the worker process itself on platforms without fork
+    (where timeout, cpus, and env are not applied).
+
+    Parameters
+    ----------
+    path : str
+        absolute path name of the directory the script runs in
+    out_file : str
+        txt file (relative to path) to output the script's stderror and
+        stdoutput to
+    script : str
+        script name (relative to path)
+    timeout : float, optional
+        seconds after which the script and every process it started are
+        killed
+    cpus : list of int, optional
+        CPUs the script and the processes it starts are pinned to
+    env : dict, optional
+        the script's environment, defaults to the worker's
+
+    Returns
+    -------
+    int
+        exit code of the script
+
+    Raises
+    ------
+    subprocess.TimeoutExpired
+        if the script was killed after timeout seconds
+
+    """
+    if not hasattr(os, "fork"):
+        return exec_script(path, out_file, script)
+    sys.stdout.flush()
+    sys.stderr.flush()
+    pid = os.fork()
+    if pid == 0:
+        returncode = 1
+        try:
+            # own process group, so a timeout kills the script's children too
+            os.setsid()
+            if cpus:
+                os.sched_setaffinity(0, cpus)
+            if env is not None:
+                os.environ.clear()
+                os.environ.update(env)
+            returncode = exec_script(path, out_file, script)
+        finally:
+            os._exit(returncode)
+    if timeout is None:
+        _, status = os.waitpid(pid, 0)
+    else:
+        deadline = time.time() + timeout
+        waited_pid, status = os.waitpid(pid, os.WNOHANG)
+        while waited_pid == 0:
+            if time.time() > deadline:
+                try:
+                    os.killpg(pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+                os.waitpid(pid, 0)
+                raise subprocess.TimeoutExpired(script, timeout)
+            time.sleep(0.05)
+            waited_pid, status = os.waitpid(pid, os.WNOHANG)
+    if os.WIFSIGNALED(status):
+        return -os.WTERMSIG(status)
+    return os.WEXITSTATUS(status)
+
+
+def exec_script(path, out_file, script):
+    """Runs a Python script as __main__ with runpy, the way `python script`
+    would: in path, with its stdoutput and stderror written to out_file
+
+    Parameters
+    ----------
+    path : str
+        absolute path name of the directory the script runs in
+    out_file : str
+        txt file (relative to path) to output the script's stderror and
+        stdoutput to
+    script : str
+        script name (relative to path)
+
+    Returns
+    -------
+    int
+        exit code of the script
+
+    """
+    cwd, argv, sys_path = os.getcwd(), sys.argv, list(sys.path)
+    stdout, stderr = sys.stdout, sys.stderr
+    saved_fds = [os.dup(1), os.dup(2)]
+    sys.stdout.flush()
+    sys.stderr.flush()
+    with open(os.path.join(path, out_file), "wb") as output:
+        # redirect both the file descriptors (for compiled solver libraries)
+        # and sys.stdout/sys.stderr (for Python code)
+        os.dup2(output.fileno(), 1)
+        os.dup2(output.fileno(), 2)
+        sys.stdout = sys.stderr = open(
+            os.dup(1), "w", buffering=1, closefd=True)
+        returncode = 0
+        try:
+            os.chdir(path)
+            sys.argv = [script]
+            sys.path.insert(0, path)
+            runpy.run_path(script, run_name="__main__")
+        except SystemExit as error:
+            if isinstance(error.code, int):
+                returncode = error.code
+            elif error.code is not None:
+                print(error.code, file=sys.stderr)
+                returncode = 1
+        except BaseException:
+            traceback.print_exc()
+            returncode = 1
+        finally:
+            sys.stdout.close()
+            sys.stdout, sys.stderr = stdout, stderr
+            os.dup2(saved_fds[0], 1)
+            os.dup2(saved_fds[1], 2)
+            for fd in saved_fds:
+                os.close(fd)
+            os.chdir(cwd)
+            sys.argv = argv
+            sys.path[:] = sys_path
+    return returncode
@@ -0,0 +1,174 @@
+from multiprocessing.connection import Client
+import subprocess
+import threading
+import traceback
+import tempfile
+import fnmatch
+import getopt
+import shutil
+import time
+import sys
+import os
+
+
+def run_task(task, work_dir=None):
+    """Runs an evaluation task from `rollo.coordinator.Coordinator` in a new
+    directory and returns its result. The directory is removed afterwards.
+
+    Parameters
+    ----------
+    task : dict
+        ``name``: individual's directory name, ``files``: dict of file names
+        (relative to the individual's directory) and their contents (bytes),
+        ``static_files``: files linked from the worker's working directory,
+        ``command``: bash command to run, ``return_files``: glob patterns of
+        files sent back
+    work_dir : str, optional
+        directory the task's directory is created in, defaults to the
+        system's temporary directory
+
+    Returns
+    -------
+    dict
+        ``returncode``: exit code of command, ``files``: dict of returned
+        file names and their contents (bytes)
+
+    """
+    path = tempfile.mkdtemp(prefix=task["name"] + "_", dir=work_dir)
+    try:
+        for name, content in task["files"].items():
+            file = os.path.join(path, name)
+            os.makedirs(os.path.dirname(file), exist_ok=True)
+            with open(file, "wb") as fp:
+                fp.write(content)
+        for name in task["static_files"]:
+            if os.path.exists(name):
+                target = os.path.join(path, name)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                os.symlink(os.path.abspath(name), target)
+        with open(os.path.join(path, "rollo_worker_out.txt"), "wb") as output:
+            returncode = subprocess.call(
+                task["command"], shell=True, cwd=path, stdout=output,
+                stderr=output)
+        files = {}
+        for directory, _, names in os.walk(path):
+            for name in names:
+                file = os.path.join(directory, name)
+                relative_name = os.path.relpath(file, path)
+                if any(fnmatch.fnmatch(relative_name, pattern)
+                       for pattern in task["return_files"]):
+                    with open(file, "rb") as fp:
+                        files[relative_name] = fp.read()
+        return {"returncode": returncode, "files": files}
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def run_worker(
+        address,
+        authkey,
+        heartbeat_interval=5,
+        work_dir=None,
+        connect_timeout=60):
+    """Connects to a coordinator and runs the tasks it sends, one at a time,
+    until the coordinator closes the connection. A heartbeat is sent every
+    heartbeat_interval seconds while a task runs.
+
+    Parameters
+    ----------
+    address : tuple
+        coordinator's (host, port)
+    authkey : bytes
+        coordinator's key
+    heartbeat_interval : float, optional
+        seconds between heartbeats
+    work_dir : str, optional
+        directory tasks run in, defaults to the system's temporary directory
+    connect_timeout : float, optional
+        seconds to keep retrying to connect to a coordinator that has not
+        started yet
+
+    Returns
+    -------
+    int
+        number of tasks run
+
+    """
+    start_time = time.time()
+    while True:
+        try:
+            connection = Client(address, authkey=authkey)
+            break
+        except ConnectionRefusedError:
+            if time.time() - start_time > connect_timeout:
+                raise
+            time.sleep(1)
+    send_lock = threading.Lock()
+
+    def send(message):
+        with send_lock:
+            connection.send(message)
+
+    def heartbeat(stop):
+        while not stop.wait(heartbeat_interval):
+            send(("heartbeat",))
+
+    num_tasks = 0
+    try:
+        while True:
+            send(("ready",))
+            try:
+                message = connection.recv()
+            except EOFError:
+                # the coordinator has no more work
+                break
+            if message[0] != "task":
+                continue
+            _, task_id, task = message
+            stop = threading.Event()
+            heartbeat_thread = threading.Thread(
+                target=heartbeat, args=(stop,), daemon=True)
+            heartbeat_thread.start()
+            try:
+                result = run_task(task, work_dir)
+            except Exception:
+                result = {"returncode": None, "files": {},
+                          "error": traceback.format_exc()}
+            finally:
+                stop.set()
+                heartbeat_thread.join()
+            send(("result", task_id, result))
+            num_tasks += 1
+    except (EOFError, OSError):
+        pass
+    finally:
+        connection.close()
+    return num_tasks
+
+
+def main():
+    argv = sys.argv[1:]
+    msg = "python -m rollo.worker --connect <host:port> --authkey <key> " + \
+        "--heartbeat <seconds> --work-dir <directory>"
+    try:
+        opts, args = getopt.getopt(
+            argv, "", ["connect=", "authkey=", "heartbeat=", "work-dir="])
+    except getopt.GetoptError:
+        raise Exception("To run a ROLLO worker: " + msg)
+    opts_dict = dict(opts)
+    if "--connect" not in opts_dict:
+        raise Exception("To run a ROLLO worker: " + msg)
+    host, port = opts_dict["--connect"].rsplit(":", 1)
+    authkey = opts_dict.get("--authkey", os.environ.get("ROLLO_AUTHKEY"))
+    if authkey is None:
+        raise Exception("ROLLO worker needs --authkey or the ROLLO_AUTHKEY " +
+                        "environment variable")
+    run_worker(
+        (host, int(port)),
+        authkey.encode(),
+        heartbeat_interval=float(opts_dict.get("--heartbeat", 5)),
+        work_dir=opts_dict.get("--work-dir"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,15 @@
+import json
+import sys
+
+if sys.argv[1:] == ["fail"]:
+    sys.exit(1)
+with open("batch_input.jsonl") as fp:
+    rows = [json.loads(line) for line in fp]
+with open("batch_output.jsonl", "w") as fp:
+    for row in rows:
+        doubled = 2 * row["packing_fraction"]
+        if sys.argv[1:] == ["list"]:
+            fp.write(json.dumps([doubled, len(rows)]) + "\n")
+        else:
+            fp.write(json.dumps(
+                {"doubled": doubled, "batch_size": len(rows)}) + "\n")
@@ -0,0 +1,2 @@
+def evaluate(control_vars):
+    return {"num_batches": 10, "double_pf": 2 * control_vars["packing_fraction"]}
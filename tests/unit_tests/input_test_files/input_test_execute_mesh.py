@@ -0,0 +1,4 @@
+with open("../input_test_execute_mesh_runs.txt", "a") as f:
+    f.write("run\n")
+with open("mesh.txt", "w") as f:
+    f.write("mesh")
@@ -0,0 +1,5 @@
+import json
+
+# particles is set by the individual's fidelity level
+with open("evaluator_1_output.json", "w") as fp:
+    json.dump({"total": {{variable}} + {{particles}}}, fp)
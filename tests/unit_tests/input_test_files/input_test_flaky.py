@@ -0,0 +1,10 @@
+import json
+import os
+import sys
+
+# the first run of each individual fails, individual 1 always fails
+if {{variable}} == 1 or not os.path.exists("flaky_marker"):
+    open("flaky_marker", "w").close()
+    sys.exit(1)
+with open("evaluator_1_output.json", "w") as fp:
+    json.dump({"variable": {{variable}}}, fp)
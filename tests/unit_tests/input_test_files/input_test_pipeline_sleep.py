@@ -0,0 +1,5 @@
+import time
+
+print(time.time())
+time.sleep({{delay}})
+print(time.time())
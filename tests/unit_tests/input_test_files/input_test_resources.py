@@ -0,0 +1,12 @@
+import json
+import os
+import time
+
+# sleep so concurrent runs overlap
+start = time.time()
+time.sleep(0.5)
+with open("evaluator_1_output.json", "w") as fp:
+    json.dump({"omp": int(os.environ["OMP_NUM_THREADS"]),
+               "cores": {{cores}},
+               "start": start,
+               "end": time.time()}, fp)
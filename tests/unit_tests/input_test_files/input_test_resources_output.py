@@ -0,0 +1 @@
+# the input script writes evaluator_1_output.json
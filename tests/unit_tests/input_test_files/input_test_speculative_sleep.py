@@ -0,0 +1,7 @@
+import os
+import time
+
+# only the original individual is slow, its "_s" duplicate is not
+if not os.getcwd().endswith("_s"):
+    time.sleep({{delay}})
+print(os.path.basename(os.getcwd()))
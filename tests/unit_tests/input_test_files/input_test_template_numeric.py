@@ -0,0 +1,2 @@
+radius = {{ radius * 2 }}
+{% include "input_test_template_include.txt" %}
\ No newline at end of file
@@ -0,0 +1,7 @@
+import json
+
+# write 100 kB, as a solver's output files would be
+with open("usage_data.bin", "wb") as fp:
+    fp.write(bytes(100000))
+with open("evaluator_1_output.json", "w") as fp:
+    json.dump({"variable": {{variable}}}, fp)
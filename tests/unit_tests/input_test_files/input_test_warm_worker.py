@@ -0,0 +1,6 @@
+import sys
+
+print("colorsys" in sys.modules)
+if len(sys.argv) > 1:
+    sys.exit(int(sys.argv[1]))
+sys.exit(3)
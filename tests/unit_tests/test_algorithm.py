@@ -1,7 +1,10 @@
 from rollo.algorithm import Algorithm
 from rollo.constraints import Constraints
+from rollo.evaluation import EvaluationOutput
 from deap import base, creator, tools
+from concurrent.futures import ThreadPoolExecutor
 import random
+import time
 import os
 from collections import OrderedDict
 
@@ -102,6 +105,27 @@ def test_generate():
     os.remove("checkpoint.pkl")
 
 
+def test_generate_threads():
+    toolbox, test_constraints = init()
+    a = Algorithm(
+        deap_toolbox=toolbox,
+        constraint_obj=test_constraints,
+        checkpoint_file=None,
+        deap_creator=creator,
+        control_dict=control_dict,
+        output_dict=output_dict,
+        input_dict={},
+        start_time=0,
+        parallel_method="threads",
+    )
+    final_pop = a.generate()
+    assert len(final_pop) == toolbox.pop_size
+    for ind in final_pop:
+        assert ind.fitness.values[0] > 1.5
+        assert ind.fitness.values[0] < 2.5
+    os.remove("checkpoint.pkl")
+
+
 def test_initialize_pop():
     toolbox, test_constraints = init()
     a = Algorithm(
@@ -134,6 +158,32 @@ def test_initialize_pop():
     os.remove("checkpoint.pkl")
 
 
+def test_assign_output():
+    toolbox, test_constraints = init()
+    a = Algorithm(
+        deap_toolbox=toolbox,
+        constraint_obj=test_constraints,
+        checkpoint_file=None,
+        deap_creator=creator,
+        control_dict=control_dict,
+        output_dict=output_dict,
+        input_dict={},
+        start_time=0,
+        parallel_method="none",
+    )
+    a.backend.initialize_new_backend()
+    pop = toolbox.population(n=2)
+    resources = [{"solver": "evaluator_1", "wall_time": 1.0}]
+    a.assign_output(pop[0], EvaluationOutput([2.0, 5], resources))
+    a.assign_output(pop[1], tuple([2.0, 5]))
+    assert pop[0].output == pop[1].output == tuple([2.0, 5])
+    assert pop[0].resources == resources
+    assert pop[1].resources == []
+    a.backend.update_backend(pop, 0, pop, random.getstate())
+    assert a.backend.results["all"]["resources"] == [[resources, []]]
+    os.remove("checkpoint.pkl")
+
+
 def test_apply_algorithm_ngen():
     toolbox, test_constraints = init()
     a = Algorithm(
@@ -164,6 +214,275 @@ def test_apply_algorithm_ngen():
     os.remove("checkpoint.pkl")
 
 
+def test_evaluate_inds_tolerance():
+    toolbox, test_constraints = init()
+    evaluated = []
+
+    def evaluator_fn(ind):
+        evaluated.append(list(ind))
+        return tuple([ind[0] + ind[1], 5])
+
+    toolbox.register("evaluate", evaluator_fn)
+    toolbox.tolerance_list = [1e-3, 1e-3, 0]
+    a = Algorithm(
+        deap_toolbox=toolbox,
+        constraint_obj=test_constraints,
+        checkpoint_file=None,
+        deap_creator=creator,
+        control_dict=control_dict,
+        output_dict=output_dict,
+        input_dict={},
+        start_time=0,
+        parallel_method="none",
+    )
+    inds = [creator.Ind([0.5, 1.5, 2.0]),
+            # within tolerance of the 1st individual, evaluated together
+            creator.Ind([0.5005, 1.5, 2.0]),
+            # outside tolerance of the 1st individual
+            creator.Ind([0.502, 1.5, 2.0]),
+            # 3rd variable has no tolerance
+            creator.Ind([0.5, 1.5, 2.0 + 1e-9])]
+    a.evaluate_inds(inds, 0)
+    # within tolerance of an individual from a previous generation
+    later_ind = creator.Ind([0.5, 1.5008, 2.0])
+    a.evaluate_inds([later_ind], 1)
+    assert evaluated == [[0.5, 1.5, 2.0], [0.502, 1.5, 2.0],
+                         [0.5, 1.5, 2.0 + 1e-9]]
+    assert inds[1].output == inds[0].output
+    assert inds[1].fitness.values == (2.0, 5)
+    assert later_ind.output == (2.0, 5)
+
+
+def test_evaluate_inds_tolerance_not_reusable():
+    toolbox, test_constraints = init()
+    evaluated = []
+
+    def evaluator_fn(ind):
+        evaluated.append(list(ind))
+        # the 1st individual fails and is given penalty output values
+        return EvaluationOutput([float("-inf"), float("inf")],
+                                penalized=ind[0] == 0.5)
+
+    toolbox.register("evaluate", evaluator_fn)
+    toolbox.tolerance_list = [1e-3, 1e-3, 0]
+    a = Algorithm(
+        deap_toolbox=toolbox,
+        constraint_obj=test_constraints,
+        checkpoint_file=None,
+        deap_creator=creator,
+        control_dict=control_dict,
+        output_dict=output_dict,
+        input_dict={},
+        start_time=0,
+        parallel_method="none",
+        fidelity_levels=2,
+    )
+    failed_ind = creator.Ind([0.5, 1.5, 2.0])
+    # evaluated below the highest fidelity level
+    low_fidelity_ind = creator.Ind([0.7, 1.5, 2.0])
+    low_fidelity_ind.fidelity = 0
+    a.evaluate_inds([failed_ind, low_fidelity_ind], 0)
+    assert failed_ind.penalized
+    later_inds = [creator.Ind([0.5005, 1.5, 2.0]),
+                  creator.Ind([0.7005, 1.5, 2.0])]
+    a.evaluate_inds(later_inds, 1)
+    # neither is reused, so both later individuals are evaluated
+    assert evaluated == [[0.5, 1.5, 2.0], [0.7, 1.5, 2.0],
+                         [0.5005, 1.5, 2.0], [0.7005, 1.5, 2.0]]
+    assert [vals for vals, output in a.evaluated] == \
+        [[0.5005, 1.5, 2.0], [0.7005, 1.5, 2.0]]
+
+
+def test_rebuild_spatial_index():
+    toolbox, test_constraints = init()
+    toolbox.tolerance_list = [1e-3, 1e-3, 0]
+    a = Algorithm(
+        deap_toolbox=toolbox,
+        constraint_obj=test_constraints,
+        checkpoint_file=None,
+        deap_creator=creator,
+        control_dict=control_dict,
+        output_dict=output_dict,
+        input_dict={},
+        start_time=0,
+        parallel_method="none",
+    )
+    a.backend.initialize_new_backend()
+    inds = [creator.Ind([0.5, 1.5, 2.0]), creator.Ind([0.7, 1.5, 2.0])]
+    for i, ind in enumerate(inds):
+        ind.gen, ind.num = 0, i
+    a.evaluate_inds(inds, 0)
+    # only the 1st individual is selected, both were evaluated
+    a.update_backend(inds[:1], 0, inds)
+    assert a.evaluated == []
+    restarted = Algorithm(
+        deap_toolbox=toolbox,
+        constraint_obj=test_constraints,
+        checkpoint_file=None,
+        deap_creator=creator,
+        control_dict=control_dict,
+        output_dict=output_dict,
+        input_dict={},
+        start_time=0,
+        parallel_method="none",
+    )
+    restarted.backend.results = a.backend.results
+    restarted.rebuild_spatial_index()
+    os.remove("checkpoint.pkl")
+    assert len(restarted.spatial_index) == 2
+    assert restarted.spatial_index.query([0.7, 1.5005, 2.0]) == (2.2, 5)
+
+
+def test_apply_algorithm_ngen_overprovision():
+    toolbox, test_constraints = init()
+    calls = []
+
+    def evaluator_fn(pop, required=None):
+        # only the first required individuals finish
+        calls.append((len(pop), required))
+        return [tuple([ind[0] + ind[1], 5]) if i < required else None
+                for i, ind in enumerate(pop)]
+
+    toolbox.register("evaluate", evaluator_fn)
+    a = Algorithm(
+        deap_toolbox=toolbox,
+        constraint_obj=test_constraints,
+        checkpoint_file=None,
+        deap_creator=creator,
+        control_dict=control_dict,
+        output_dict=output_dict,
+        input_dict={},
+        start_time=0,
+        parallel_method="job_control",
+        overprovision=3,
+    )
+    a.backend.initialize_new_backend()
+    pop = toolbox.population(n=10)
+    for i, ind in enumerate(pop):
+        ind.gen, ind.num = 0, i
+        a.assign_output(ind, tuple([ind[0] + ind[1], 5]))
+    new_pop = a.apply_algorithm_ngen(pop, 1)
+    # 13 parents are rounded up to 14, so none is left without a mate, and
+    # every offspring is mutated, so 14 are evaluated and 10 must finish
+    assert calls == [(14, 10)]
+    assert len(new_pop) == toolbox.pop_size
+    for ind in new_pop:
+        assert ind.fitness.valid
+    assert a.backend.results["logbook"][-1]["evals"] == 10
+    os.remove("checkpoint.pkl")
+
+
+def test_apply_algorithm_ngen_overprovision_finish_order():
+    toolbox, test_constraints = init()
+
+    def evaluator_fn(pop, required=None):
+        # every individual finishes, the last created finishes first
+        return [EvaluationOutput([ind[0] + ind[1], 5],
+                                 finish_time=len(pop) - i)
+                for i, ind in enumerate(pop)]
+
+    toolbox.register("evaluate", evaluator_fn)
+    a = Algorithm(
+        deap_toolbox=toolbox,
+        constraint_obj=test_constraints,
+        checkpoint_file=None,
+        deap_creator=creator,
+        control_dict=control_dict,
+        output_dict=output_dict,
+        input_dict={},
+        start_time=0,
+        parallel_method="job_control",
+        overprovision=4,
+    )
+    a.backend.initialize_new_backend()
+    pop = toolbox.population(n=10)
+    for i, ind in enumerate(pop):
+        ind.gen, ind.num = 0, i
+        a.assign_output(ind, tuple([ind[0] + ind[1], 5]))
+    selected = []
+
+    def select(inds):
+        selected.extend(inds)
+        return inds[:toolbox.pop_size]
+
+    a.apply_selection_operator = select
+    a.apply_algorithm_ngen(pop, 1)
+    # the 10 offspring that finished first are kept, in finish order
+    assert [ind.num for ind in selected[10:]] == list(range(13, 3, -1))
+    os.remove("checkpoint.pkl")
+
+
+def test_promote_inds():
+    toolbox, test_constraints = init()
+    evaluated = []
+
+    def evaluator_fn(ind):
+        evaluated.append((ind.num, ind.fidelity))
+        # below the highest fidelity level the 4th individual's 1st output
+        # is overestimated
+        return tuple([ind[0] + ind[1] + 0.5 * (
+            ind.num == 3 and ind.fidelity < 2), 5])
+
+    toolbox.register("evaluate", evaluator_fn)
+    toolbox.pop_size = 2
+    a = Algorithm(
+        deap_toolbox=toolbox,
+        constraint_obj=test_constraints,
+        checkpoint_file=None,
+        deap_creator=creator,
+        control_dict=control_dict,
+        output_dict=output_dict,
+        input_dict={},
+        start_time=0,
+        parallel_method="none",
+        fidelity_levels=3,
+    )
+    inds = [creator.Ind([val, 1.5, 2.0]) for val in [0.1, 0.4, 0.3, 0.2]]
+    for i, ind in enumerate(inds):
+        ind.gen, ind.num, ind.fidelity = 1, i, 0
+    a.evaluate_inds(inds, 1)
+    pop = a.promote_inds(inds, 1)
+    # the 4th individual is no longer selected once it is at the highest
+    # level, so the 3rd individual is selected and promoted instead
+    assert evaluated == [(0, 0), (1, 0), (2, 0), (3, 0),
+                         (3, 1), (1, 1), (3, 2), (1, 2), (2, 1), (2, 2)]
+    assert [ind.num for ind in pop] == [1, 2]
+    assert [ind.fidelity for ind in inds] == [0, 2, 2, 2]
+    assert inds[3].fitness.values == (1.7, 5)
+    assert inds[0].fitness.values == (1.6, 5)
+
+
+def test_map_first_completed():
+    toolbox, test_constraints = init()
+
+    def evaluator_fn(ind):
+        time.sleep(ind[0])
+        return tuple([ind[0], 5])
+
+    toolbox.register("evaluate", evaluator_fn)
+    a = Algorithm(
+        deap_toolbox=toolbox,
+        constraint_obj=test_constraints,
+        checkpoint_file=None,
+        deap_creator=creator,
+        control_dict=control_dict,
+        output_dict=output_dict,
+        input_dict={},
+        start_time=0,
+        parallel_method="threads",
+    )
+    a.thread_pool = ThreadPoolExecutor(max_workers=3)
+    inds = [creator.Ind([delay, 1.5, 2.0]) for delay in [2.0, 0, 0]]
+    for i, ind in enumerate(inds):
+        ind.gen, ind.num = 1, i
+    start_time = time.time()
+    fitnesses = a.map_first_completed(inds, 2)
+    runtime = time.time() - start_time
+    a.thread_pool.shutdown()
+    assert fitnesses == [None, (0, 5), (0, 5)]
+    assert runtime < 1.5
+
+
 def test_apply_selection_operator():
     toolbox, test_constraints = init()
     a = Algorithm(
@@ -208,6 +527,30 @@ def test_apply_mating_operator():
             assert pop[i] == mated_pop[i + 1]
 
 
+def test_parent_info():
+    toolbox, test_constraints = init()
+    a = Algorithm(
+        deap_toolbox=toolbox,
+        constraint_obj=test_constraints,
+        checkpoint_file=None,
+        deap_creator=creator,
+        control_dict=control_dict,
+        output_dict=output_dict,
+        input_dict={},
+        start_time=0,
+        parallel_method="none",
+    )
+    ind = creator.Ind([0.5, 1.5, 2.0])
+    unevaluated_info = a.parent_info(ind)
+    ind.gen, ind.num, ind.output = 2, 3, (2.0, 5)
+    parent = a.parent_info(ind)
+    child = a.apply_mating_operator([ind, toolbox.clone(ind)])[0]
+    assert unevaluated_info is None
+    assert parent == {"path": "2_3", "vals": [0.5, 1.5, 2.0],
+                      "output": (2.0, 5)}
+    assert child.parent == parent
+
+
 def test_apply_mutation_operator():
     toolbox, test_constraints = init()
     a = Algorithm(
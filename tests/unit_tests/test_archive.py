@@ -0,0 +1,45 @@
+import os
+import shutil
+from rollo.archive import append_directory, extract_individual, read_index
+
+
+def test_append_extract():
+    os.chdir("./input_test_files")
+    os.makedirs("0_0/mesh")
+    os.mkdir("0_1")
+    with open("0_0/mesh/mesh.txt", "w") as f:
+        f.write("mesh")
+    with open("0_1/output.txt", "w") as f:
+        f.write("output")
+    with open("static.txt", "w") as f:
+        f.write("static")
+    # hard-linked static files are not archived, other hard links are
+    os.link("static.txt", "0_1/static.txt")
+    os.link("0_1/output.txt", "0_1/output_link.txt")
+    static_stat = os.stat("static.txt")
+    shared = {(static_stat.st_dev, static_stat.st_ino)}
+    append_directory("archive_0.tar.xz", "0_0", "0_0", shared)
+    append_directory("archive_0.tar.xz", "0_1", "0_1", shared)
+    index = read_index("archive_0.tar.xz")
+    shutil.rmtree("0_0")
+    shutil.rmtree("0_1")
+    os.mkdir("extracted")
+    path = extract_individual("archive_0.tar.xz", "0_1", "extracted")
+    extracted = sorted(os.listdir("extracted"))
+    with open(os.path.join(path, "output.txt")) as f:
+        output = f.read()
+    static_extracted = os.path.exists(os.path.join(path, "static.txt"))
+    with open(os.path.join(path, "output_link.txt")) as f:
+        output_link = f.read()
+    shutil.rmtree("extracted")
+    os.remove("archive_0.tar.xz")
+    os.remove("archive_0.index.json")
+    os.remove("static.txt")
+    os.chdir("../")
+    assert sorted(index) == ["0_0", "0_1"]
+    assert index["0_0"][0] == 0
+    assert index["0_1"][0] == sum(index["0_0"])
+    assert extracted == ["0_1"]
+    assert output == "output"
+    assert output_link == "output"
+    assert not static_extracted
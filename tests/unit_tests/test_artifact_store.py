@@ -0,0 +1,54 @@
+import os
+import shutil
+from rollo.artifact_store import ArtifactStore
+
+
+def test_key():
+    os.chdir("./input_test_files")
+    store = ArtifactStore("test_artifact_store")
+    key = store.key({"step": 0, "depends_on": {"radius": 1.0}},
+                    ["input_test_run_execute.py"])
+    same_key = store.key({"depends_on": {"radius": 1.0}, "step": 0},
+                         ["input_test_run_execute.py"])
+    other_key = store.key({"step": 0, "depends_on": {"radius": 2.0}},
+                          ["input_test_run_execute.py"])
+    other_file_key = store.key({"step": 0, "depends_on": {"radius": 1.0}},
+                               ["input_test_execute_mesh.py"])
+    shutil.rmtree("test_artifact_store")
+    os.chdir("../")
+    assert key == same_key
+    assert len(set([key, other_key, other_file_key])) == 3
+
+
+def test_save_restore():
+    os.chdir("./input_test_files")
+    store = ArtifactStore("test_artifact_store")
+    os.makedirs("0_0/mesh")
+    os.mkdir("0_1")
+    with open("0_0/mesh/mesh.txt", "w") as f:
+        f.write("mesh")
+    missing_restored = store.restore("abc", "0_1", ["mesh/mesh.txt"])
+    missing_saved = store.save("abc", "0_0", ["mesh/mesh.txt", "other.txt"])
+    saved = store.save("abc", "0_0", ["mesh/mesh.txt"])
+    with open("0_0/mesh/mesh.txt", "w") as f:
+        f.write("changed")
+    # an entry that exists is never overwritten
+    saved_again = store.save("abc", "0_0", ["mesh/mesh.txt"])
+    restored = store.restore("abc", "0_1", ["mesh/mesh.txt"])
+    with open("0_1/mesh/mesh.txt") as f:
+        restored_content = f.read()
+    restored_stat = os.stat("0_1/mesh/mesh.txt")
+    links = restored_stat.st_nlink
+    inodes = store.inodes()
+    leftovers = os.listdir("test_artifact_store")
+    shutil.rmtree("0_0")
+    shutil.rmtree("0_1")
+    shutil.rmtree("test_artifact_store")
+    os.chdir("../")
+    assert not missing_restored
+    assert not missing_saved
+    assert saved and saved_again and restored
+    assert restored_content == "mesh"
+    assert links == 2
+    assert inodes == {(restored_stat.st_dev, restored_stat.st_ino)}
+    assert leftovers == ["abc"]
@@ -0,0 +1,76 @@
+import os
+from collections import OrderedDict
+from rollo.cache import EvaluationCache
+
+input_evaluators = {
+    "evaluator_1": {
+        "input_script": [
+            "python", "input_test_eval_fn_generator_template.py"],
+        "output_script": [
+            "python", "input_test_eval_fn_generator_output.py"],
+        "execute": [["python", "input_test_run_execute.py"]],
+        "inputs": ["packing_fraction"],
+        "outputs": ["packing_fraction", "num_batches"],
+        "order": 0,
+    }
+}
+output_dict = OrderedDict(
+    {"packing_fraction": "evaluator_1", "num_batches": "evaluator_1"})
+
+
+def test_key():
+    os.chdir("./input_test_files")
+    cache = EvaluationCache(
+        "test_cache.db", input_evaluators, output_dict)
+    key = cache.key({"evaluator_1": {"packing_fraction": 0.03}})
+    rounded_key = cache.key(
+        {"evaluator_1": {"packing_fraction": 0.03 + 1e-17}})
+    other_key = cache.key({"evaluator_1": {"packing_fraction": 0.04}})
+    # the same design evaluated by a different execute command
+    other_evaluators = {"evaluator_1": dict(input_evaluators["evaluator_1"])}
+    other_evaluators["evaluator_1"]["execute"] = [["python", "other.py"]]
+    other_cache = EvaluationCache(
+        "test_cache.db", other_evaluators, output_dict)
+    other_cache_key = other_cache.key(
+        {"evaluator_1": {"packing_fraction": 0.03}})
+    os.remove("test_cache.db")
+    os.chdir("../")
+    assert key == rounded_key
+    assert key != other_key
+    assert key != other_cache_key
+
+
+def test_put_get():
+    os.chdir("./input_test_files")
+    cache = EvaluationCache(
+        "test_cache.db", input_evaluators, output_dict)
+    key = cache.key({"evaluator_1": {"packing_fraction": 0.03}})
+    missing = cache.get(key)
+    cache.put(key, (0.03, 10))
+    # the cache persists across EvaluationCache objects
+    reopened_cache = EvaluationCache(
+        "test_cache.db", input_evaluators, output_dict)
+    output_vals = reopened_cache.get(key)
+    os.remove("test_cache.db")
+    os.chdir("../")
+    assert missing is None
+    assert output_vals == (0.03, 10)
+
+
+def test_hits():
+    os.chdir("./input_test_files")
+    cache = EvaluationCache(
+        "test_cache.db", input_evaluators, output_dict)
+    cache.record_lookup(0, 0, False)
+    cache.record_lookup(1, 0, True)
+    cache.record_lookup(1, 1, False)
+    cache.record_lookup(1, 2, True)
+    # re-evaluating an individual after a restart replaces its lookup
+    cache.record_lookup(1, 2, True)
+    hits = [cache.hits(0), cache.hits(1), cache.hits(2)]
+    cache.clear_lookups()
+    cleared_hits = cache.hits(1)
+    os.remove("test_cache.db")
+    os.chdir("../")
+    assert hits == [0, 2, 0]
+    assert cleared_hits == 0
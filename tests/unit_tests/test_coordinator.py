@@ -0,0 +1,58 @@
+import threading
+from multiprocessing.connection import Client
+from rollo.coordinator import Coordinator
+from rollo.worker import run_task, run_worker
+
+
+def test_run_task():
+    task = {
+        "name": "0_0",
+        "files": {"run.sh": b"echo hi > hi_out.txt\necho no > no.txt\n"},
+        "static_files": [],
+        "command": "bash run.sh",
+        "return_files": ["hi_*.txt"]}
+    result = run_task(task)
+    assert result == {"returncode": 0, "files": {"hi_out.txt": b"hi\n"}}
+
+
+def test_submit():
+    coordinator = Coordinator(("127.0.0.1", 0), b"test")
+    futures = [coordinator.submit({
+        "name": "0_" + str(i),
+        "files": {},
+        "static_files": [],
+        "command": "echo " + str(i) + " > " + str(i) + "_out.txt",
+        "return_files": ["[0-9]_out.txt"]}) for i in range(4)]
+    workers = [threading.Thread(
+        target=run_worker, args=(coordinator.address, b"test"),
+        daemon=True) for _ in range(2)]
+    for worker in workers:
+        worker.start()
+    results = [future.result(timeout=30) for future in futures]
+    coordinator.close()
+    for i, result in enumerate(results):
+        assert result["files"] == {
+            str(i) + "_out.txt": (str(i) + "\n").encode()}
+
+
+def test_lost_worker():
+    coordinator = Coordinator(("127.0.0.1", 0), b"test", heartbeat_timeout=1)
+    future = coordinator.submit({
+        "name": "0_0",
+        "files": {},
+        "static_files": [],
+        "command": "echo done > done_out.txt",
+        "return_files": ["done_*"]})
+    # takes the task and hangs without sending heartbeats
+    silent_worker = Client(coordinator.address, authkey=b"test")
+    silent_worker.send(("ready",))
+    assert silent_worker.recv()[0] == "task"
+    worker = threading.Thread(
+        target=run_worker, args=(coordinator.address, b"test"),
+        daemon=True)
+    worker.start()
+    result = future.result(timeout=30)
+    coordinator.close()
+    silent_worker.close()
+    # the task was queued again and run by the other worker
+    assert result["files"] == {"done_out.txt": b"done\n"}
@@ -1,8 +1,22 @@
 import pytest
-import ast
+import json
 import os
 import shutil
-from rollo.evaluation import Evaluation
+import time
+import math
+import sys
+import subprocess
+import asyncio
+import signal
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing.connection import Client
+from rollo.evaluation import Evaluation, SolverError
+from rollo.cache import EvaluationCache
+from rollo.artifact_store import ArtifactStore
+from rollo.archive import archive_extension, extract_individual, \
+    index_path, read_index
 from collections import OrderedDict
 from deap import base, creator
 
@@ -23,9 +37,9 @@ def init():
     creator.create("Ind", list, fitness=creator.obj)
 
 
-def test_eval_fn_generator():
-    os.chdir("./input_test_files")
-    ev = Evaluation()
+def two_evaluator_fn(ev, parallel_method, gens=1, **kwargs):
+    """Adds evaluator_1 and evaluator_2 to ev and returns the evaluation
+    function that runs both of them on packing_fraction and variable2"""
     ev.add_evaluator(
         solver_name="evaluator_1",
         input_script=[
@@ -41,7 +55,7 @@ def test_eval_fn_generator():
             "python", "input_test_render_jinja_template_python.py"],
         output_script=[
             "python", "input_test_evaluation_get_output_vals_evaluator2.py"], )
-    eval_function = ev.eval_fn_generator(
+    return ev.eval_fn_generator(
         control_dict=OrderedDict(
             {"packing_fraction": ["evaluator_1"],
              "variable2": ["evaluator_1", "evaluator_2"]}
@@ -57,10 +71,17 @@ def test_eval_fn_generator():
             "evaluator_1": {"keep_files": True, "order": 0},
             "evaluator_2": {"keep_files": True, "order": 1},
         },
-        gens=2,
-        parallel_method="none",
-        keep_files="none"
+        gens=gens,
+        parallel_method=parallel_method,
+        keep_files="none",
+        **kwargs
     )
+
+
+def test_eval_fn_generator():
+    os.chdir("./input_test_files")
+    ev = Evaluation()
+    eval_function = two_evaluator_fn(ev, "none", gens=2)
     creator.create("obj", base.Fitness, weights=(-1.0,))
     creator.create("Ind", list, fitness=creator.obj)
     ind = creator.Ind([0.03, 1])
@@ -69,6 +90,7 @@ def test_eval_fn_generator():
     output_vals = eval_function(ind)
     expected_output_vals = tuple([0.03, 1000, 10])
 
+    ev.flush_file_operations()
     os.chdir("../")
     assert output_vals == expected_output_vals
 
@@ -76,14 +98,258 @@ def test_eval_fn_generator():
 def test_eval_fn_generator_job_control():
     os.chdir("./input_test_files")
     ev = Evaluation()
+    eval_function = two_evaluator_fn(ev, "job_control")
+    creator.create("obj", base.Fitness, weights=(-1.0,))
+    creator.create("Ind", list, fitness=creator.obj)
+    ind1, ind2 = creator.Ind(
+        [0.03, 1]), creator.Ind([0.03, 1])
+    ind1.gen, ind1.num = 0, 0
+    ind2.gen, ind2.num = 0, 1
+    pop = [ind1, ind2]
+    output_vals = eval_function(pop)
+    expected_output_vals = [tuple([0.03, 1000, 10]), tuple([
+        0.03, 1000, 10])]
+
+    ev.flush_file_operations()
+    os.chdir("../")
+    assert output_vals == expected_output_vals
+    return
+
+
+def test_eval_fn_generator_threads():
+    os.chdir("./input_test_files")
+    ev = Evaluation()
+    eval_function = two_evaluator_fn(ev, "threads")
+    creator.create("obj", base.Fitness, weights=(-1.0,))
+    creator.create("Ind", list, fitness=creator.obj)
+    pop = []
+    for i in range(4):
+        ind = creator.Ind([0.01 * (i + 1), 1])
+        ind.gen, ind.num = 0, i
+        pop.append(ind)
+    cwd = os.getcwd()
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        output_vals = list(pool.map(eval_function, pop))
+    expected_output_vals = [tuple([0.01 * (i + 1), 1000, 10])
+                            for i in range(4)]
+    assert os.getcwd() == cwd
+    ev.flush_file_operations()
+    os.chdir("../")
+    assert output_vals == expected_output_vals
+
+
+def test_eval_fn_generator_asyncio():
+    os.chdir("./input_test_files")
+    ev = Evaluation()
+    eval_function = two_evaluator_fn(
+        ev, "asyncio", max_concurrent_evaluations=2)
+    creator.create("obj", base.Fitness, weights=(-1.0,))
+    creator.create("Ind", list, fitness=creator.obj)
+    pop = []
+    for i in range(3):
+        ind = creator.Ind([0.03, 1])
+        ind.gen, ind.num = 0, i
+        pop.append(ind)
+    output_vals = eval_function(pop)
+    expected_output_vals = [tuple([0.03, 1000, 10])] * 3
+    ev.flush_file_operations()
+    assert not os.path.exists("0_0")
+    os.chdir("../")
+    assert output_vals == expected_output_vals
+
+
+def test_subprocess_exec_async():
+    os.chdir("./input_test_files")
+    path = "0_0"
+    os.mkdir(path)
+    ev = Evaluation()
+    asyncio.run(ev.subprocess_exec_async(
+        path, "execute_out.txt", ["python", "../input_test_run_execute.py"]))
+    asyncio.run(ev.subprocess_exec_async(
+        path, "missing_out.txt", ["rollo-non-existent-executable"]))
+    # commands run in bash, as in the other parallel methods
+    asyncio.run(ev.subprocess_exec_async(
+        path, "shell_out.txt", ["echo a | tr a b && echo c > shell.txt"]))
+    with open("./" + path + "/execute_out.txt") as fp:
+        Lines = fp.readlines()[0]
+    assert Lines == "[5, 6]\n"
+    with open("./" + path + "/shell_out.txt") as fp:
+        assert fp.read() == "b\n"
+    with open("./" + path + "/shell.txt") as fp:
+        assert fp.read() == "c\n"
+    with open("./" + path + "/missing_out.txt") as fp:
+        Lines = fp.readlines()[0]
+    assert "rollo-non-existent-executable" in Lines
+    shutil.rmtree(path)
+    os.chdir("../")
+    return
+
+
+def test_wait_process():
+    ev = Evaluation()
+    returncodes = []
+    for command, timeout in [("exit 3", None), ("kill -TERM $$", 5)]:
+        process = subprocess.Popen(command, shell=True)
+        returncodes.append(ev.wait_process(process, timeout)[0])
+    process = subprocess.Popen("sleep 5", shell=True)
+    with pytest.raises(subprocess.TimeoutExpired):
+        ev.wait_process(process, 0.1)
+    process.kill()
+    process.wait()
+    # a killed command's code is minus its signal number, as in subprocess
+    assert returncodes == [3, -signal.SIGTERM]
+    return
+
+
+def test_eval_fn_generator_callable():
+    os.chdir("./input_test_files")
+    sys_path = list(sys.path)
+    ev = Evaluation()
     ev.add_evaluator(
         solver_name="evaluator_1",
+        input_script=None,
+        output_script=None,
+        evaluator_callable="input_test_callable:evaluate",
+    )
+    # the module is imported from its file, sys.path is unchanged
+    assert sys.path == sys_path
+    ev.add_evaluator(
+        solver_name="evaluator_2",
         input_script=[
-            "python",
-            "input_test_eval_fn_generator_template.py"],
+            "python", "input_test_render_jinja_template_python.py"],
         output_script=[
-            "python",
-            "input_test_eval_fn_generator_output.py"],
+            "python", "input_test_evaluation_get_output_vals_evaluator2.py"], )
+    input_evaluators = {
+        "evaluator_1": {"order": 0},
+        "evaluator_2": {"order": 1},
+    }
+    control_dict = OrderedDict(
+        {"packing_fraction": ["evaluator_1"],
+         "variable2": ["evaluator_1", "evaluator_2"]})
+    output_dict = OrderedDict(
+        {
+            "packing_fraction": "evaluator_1",
+            "max_temp": "evaluator_2",
+            "double_pf": "evaluator_1",
+        }
+    )
+    creator.create("obj", base.Fitness, weights=(-1.0,))
+    creator.create("Ind", list, fitness=creator.obj)
+    ind = creator.Ind([0.03, 1])
+    ind.gen, ind.num = 0, 0
+    output_vals = {}
+    for parallel_method in ["none", "job_control", "asyncio"]:
+        eval_function = ev.eval_fn_generator(
+            control_dict=control_dict,
+            output_dict=output_dict,
+            input_evaluators=input_evaluators,
+            gens=1,
+            parallel_method=parallel_method,
+            keep_files="none",
+        )
+        if parallel_method == "none":
+            output_vals[parallel_method] = eval_function(ind)
+        else:
+            output_vals[parallel_method] = eval_function([ind])[0]
+    ev.flush_file_operations()
+    # without script evaluators no directory is created
+    ev_callable = Evaluation()
+    ev_callable.add_evaluator(
+        solver_name="evaluator_1",
+        input_script=None,
+        output_script=None,
+        evaluator_callable="input_test_callable:evaluate",
+    )
+    eval_function = ev_callable.eval_fn_generator(
+        control_dict=OrderedDict({"packing_fraction": ["evaluator_1"]}),
+        output_dict=OrderedDict({"num_batches": "evaluator_1"}),
+        input_evaluators={"evaluator_1": {"order": 0}},
+        gens=1,
+        parallel_method="none",
+        keep_files="all",
+    )
+    callable_output_vals = eval_function(ind)
+    assert not os.path.exists("0_0")
+    os.chdir("../")
+    for parallel_method in output_vals:
+        assert output_vals[parallel_method] == tuple([0.03, 1000, 0.06])
+    assert callable_output_vals == tuple([10])
+
+
+def test_eval_fn_generator_evaluation_cache():
+    os.chdir("./input_test_files")
+    input_evaluators = {
+        "evaluator_1": {
+            "input_script": [
+                "python", "input_test_eval_fn_generator_template.py"],
+            "output_script": [
+                "python", "input_test_eval_fn_generator_output.py"],
+            "inputs": ["packing_fraction", "variable2"],
+            "outputs": ["packing_fraction", "num_batches"],
+            "order": 0,
+        }
+    }
+    control_dict = OrderedDict(
+        {"packing_fraction": ["evaluator_1"], "variable2": ["evaluator_1"]})
+    output_dict = OrderedDict(
+        {"packing_fraction": "evaluator_1", "num_batches": "evaluator_1"})
+    creator.create("obj", base.Fitness, weights=(-1.0,))
+    creator.create("Ind", list, fitness=creator.obj)
+    output_vals = {}
+    made_dirs = {}
+    for parallel_method in ["none", "job_control", "asyncio"]:
+        cache = EvaluationCache(
+            "test_cache.db", input_evaluators, output_dict)
+        ev = Evaluation(evaluation_cache=cache)
+        ev.add_evaluator(
+            solver_name="evaluator_1",
+            input_script=input_evaluators["evaluator_1"]["input_script"],
+            output_script=input_evaluators["evaluator_1"]["output_script"])
+        eval_function = ev.eval_fn_generator(
+            control_dict=control_dict,
+            output_dict=output_dict,
+            input_evaluators=input_evaluators,
+            gens=2,
+            parallel_method=parallel_method,
+            keep_files="all",
+        )
+        # gen 0 evaluates 0.03 once, gen 1 finds 0.03 in the cache
+        pop0 = [creator.Ind([0.03, 1]), creator.Ind([0.03, 1])]
+        pop1 = [creator.Ind([0.03, 1]), creator.Ind([0.04, 1])]
+        for i, ind in enumerate(pop0):
+            ind.gen, ind.num = 0, i
+        for i, ind in enumerate(pop1):
+            ind.gen, ind.num = 1, i
+        if parallel_method == "none":
+            output_vals[parallel_method] = [eval_function(ind)
+                                            for ind in pop0 + pop1]
+        else:
+            output_vals[parallel_method] = eval_function(pop0) + \
+                eval_function(pop1)
+        made_dirs[parallel_method] = sorted(
+            d for d in ["0_0", "0_1", "1_0", "1_1"] if os.path.exists(d))
+        output_vals[parallel_method].append((cache.hits(0), cache.hits(1)))
+        for d in made_dirs[parallel_method]:
+            shutil.rmtree(d)
+        os.remove("test_cache.db")
+        ev.flush_file_operations()
+    os.chdir("../")
+    for parallel_method in output_vals:
+        # the clone in gen 0 and the revisited design in gen 1 are hits
+        assert output_vals[parallel_method] == [
+            (0.03, 10), (0.03, 10), (0.03, 10), (0.04, 10), (1, 1)]
+    assert made_dirs["none"] == ["0_0", "1_1"]
+    assert made_dirs["job_control"] == ["0_0", "1_1"]
+    assert made_dirs["asyncio"] == ["0_0", "1_1"]
+
+
+def test_eval_fn_generator_reuse_partial_results():
+    os.chdir("./input_test_files")
+    ev = Evaluation(reuse_partial_results=True)
+    ev.add_evaluator(
+        solver_name="evaluator_1",
+        input_script=["python", "input_test_eval_fn_generator_template.py"],
+        output_script=["python", "input_test_eval_fn_generator_output.py"],
     )
     ev.add_evaluator(
         solver_name="evaluator_2",
@@ -91,39 +357,778 @@ def test_eval_fn_generator_job_control():
             "python", "input_test_render_jinja_template_python.py"],
         output_script=[
             "python", "input_test_evaluation_get_output_vals_evaluator2.py"], )
+    creator.create("obj", base.Fitness, weights=(-1.0,))
+    creator.create("Ind", list, fitness=creator.obj)
+    output_vals = {}
+    copied_files = {}
+    for parallel_method in ["none", "job_control", "asyncio"]:
+        eval_function = ev.eval_fn_generator(
+            control_dict=OrderedDict(
+                {"packing_fraction": ["evaluator_1"],
+                 "variable2": ["evaluator_2"]}),
+            output_dict=OrderedDict(
+                {
+                    "packing_fraction": "evaluator_1",
+                    "max_temp": "evaluator_2",
+                    "num_batches": "evaluator_1",
+                }
+            ),
+            input_evaluators={
+                "evaluator_1": {"order": 0},
+                "evaluator_2": {"order": 1},
+            },
+            gens=2,
+            parallel_method=parallel_method,
+            keep_files="all",
+        )
+        # evaluator_1's results from the parent are marked with 99
+        os.mkdir("0_0")
+        with open("0_0/evaluator_1_marker.txt", "w") as fp:
+            fp.write("parent")
+        with open("0_0/evaluator_1_unrecorded.txt", "w") as fp:
+            fp.write("parent")
+        with open("0_0/rollo_solver_files.json", "w") as fp:
+            json.dump({"evaluator_1": ["evaluator_1_marker.txt"]}, fp)
+        # only evaluator_2's control variable changed
+        child = creator.Ind([0.03, 2])
+        child.gen, child.num = 1, 0
+        child.parent = {"path": "0_0", "vals": [0.03, 1],
+                        "output": (0.03, 500, 99)}
+        # evaluator_1's control variable changed
+        mutant = creator.Ind([0.04, 1])
+        mutant.gen, mutant.num = 1, 1
+        mutant.parent = {"path": "0_0", "vals": [0.03, 1],
+                         "output": (0.03, 500, 99)}
+        if parallel_method == "none":
+            output_vals[parallel_method] = [eval_function(child),
+                                            eval_function(mutant)]
+        else:
+            output_vals[parallel_method] = eval_function([child, mutant])
+        copied_files[parallel_method] = [
+            os.path.exists("1_0/evaluator_1_marker.txt"),
+            os.path.exists("1_1/evaluator_1_marker.txt"),
+            # only the files the reused solver produced are copied
+            os.path.exists("1_0/evaluator_1_unrecorded.txt")]
+        for path in ["0_0", "1_0", "1_1"]:
+            shutil.rmtree(path)
+    ev.flush_file_operations()
+    os.chdir("../")
+    for parallel_method in output_vals:
+        assert output_vals[parallel_method] == [
+            (0.03, 1000, 99), (0.04, 1000, 10)]
+        assert copied_files[parallel_method] == [True, False, False]
+
+
+def test_eval_fn_generator_reuse_partial_results_removed_parent():
+    init()
+    os.chdir("./input_test_files")
+    reused_files = {}
+    for keep_files in ["only_final", "archive"]:
+        artifact_store = None
+        if keep_files == "only_final":
+            artifact_store = ArtifactStore("test_partial_store")
+        ev = Evaluation(reuse_partial_results=True,
+                        artifact_store=artifact_store)
+        ev.add_evaluator(
+            solver_name="evaluator_1",
+            input_script=[
+                "python", "input_test_eval_fn_generator_template.py"],
+            output_script=["python", "input_test_eval_fn_generator_output.py"],
+        )
+        ev.add_evaluator(
+            solver_name="evaluator_2",
+            input_script=[
+                "python", "input_test_render_jinja_template_python.py"],
+            output_script=[
+                "python",
+                "input_test_evaluation_get_output_vals_evaluator2.py"])
+        eval_function = ev.eval_fn_generator(
+            control_dict=OrderedDict(
+                {"packing_fraction": ["evaluator_1"],
+                 "variable2": ["evaluator_2"]}),
+            output_dict=OrderedDict(
+                {"packing_fraction": "evaluator_1",
+                 "max_temp": "evaluator_2",
+                 "num_batches": "evaluator_1"}),
+            input_evaluators={
+                "evaluator_1": {"order": 0},
+                "evaluator_2": {"order": 1},
+            },
+            gens=2,
+            parallel_method="none",
+            keep_files=keep_files,
+        )
+        parent = creator.Ind([0.03, 1])
+        parent.gen, parent.num = 0, 0
+        assert eval_function(parent) == (0.03, 1000, 10)
+        ev.flush_file_operations()
+        # the parent's directory is removed or archived
+        assert not os.path.exists("0_0")
+        child = creator.Ind([0.03, 2])
+        child.gen, child.num = 1, 0
+        # evaluator_1's results from the parent are marked with 99
+        child.parent = {"path": "0_0", "vals": [0.03, 1],
+                        "output": (0.03, 500, 99)}
+        assert eval_function(child) == (0.03, 1000, 99)
+        ev.flush_file_operations()
+        path = "1_0"
+        if keep_files == "archive":
+            archive = "archive_1" + archive_extension()
+            path = extract_individual(archive, "1_0", "test_extracted")
+        with open(os.path.join(path, "rollo_solver_files.json")) as fp:
+            record = json.load(fp)
+        reused_files[keep_files] = [
+            os.path.exists(os.path.join(path, file))
+            for file in record["evaluator_1"]]
+        shutil.rmtree("test_extracted" if keep_files == "archive" else path)
+        if keep_files == "archive":
+            for gen in ["0", "1"]:
+                archive = "archive_" + gen + archive_extension()
+                os.remove(archive)
+                os.remove(index_path(archive))
+        else:
+            shutil.rmtree("test_partial_store")
+    os.chdir("../")
+    for files in reused_files.values():
+        assert len(files) > 0 and all(files)
+
+
+def test_eval_fn_generator_preload():
+    init()
+    os.chdir("./input_test_files")
+    ev = Evaluation()
+    ev.add_evaluator(
+        solver_name="evaluator_1",
+        input_script=["python", "input_test_run_input_script.py"],
+        output_script=["python", "input_test_evaluation_get_output_vals.py"],
+        preload=["colorsys"],
+    )
+    output_vals = {}
+    for parallel_method in ["none", "job_control"]:
+        eval_function = ev.eval_fn_generator(
+            control_dict=OrderedDict(
+                {"hi": ["evaluator_1"], "hi2": ["evaluator_1"]}),
+            output_dict=OrderedDict(
+                {"hi": "evaluator_1", "random": "evaluator_1"}),
+            input_evaluators={"evaluator_1": {"order": 0}},
+            gens=1,
+            parallel_method=parallel_method,
+            keep_files="all",
+            max_concurrent_evaluations=2,
+        )
+        ind = creator.Ind([1, 2])
+        ind.gen, ind.num = 0, 0
+        if parallel_method == "none":
+            output_vals[parallel_method] = eval_function(ind)
+        else:
+            output_vals[parallel_method] = eval_function([ind])[0]
+        with open("./0_0/evaluator_1_input_script_out.txt") as fp:
+            assert fp.readlines()[0] == "[1, 2]\n"
+        shutil.rmtree("0_0")
+    ev.warm_workers.shutdown()
+    ev.flush_file_operations()
+    os.chdir("../")
+    for parallel_method in output_vals:
+        assert output_vals[parallel_method] == tuple([1, 3])
+
+
+def test_eval_fn_generator_timeout():
+    init()
+    os.chdir("./input_test_files")
+    all_output_vals = {}
+    for parallel_method in ["none", "job_control", "asyncio"]:
+        ev = Evaluation(penalty_vals=[float("inf")])
+        ev.add_evaluator(
+            solver_name="evaluator_1",
+            input_script=["python", "input_test_pipeline_sleep.py"],
+            output_script=None,
+            timeout=1)
+        eval_function = ev.eval_fn_generator(
+            control_dict=OrderedDict({"delay": ["evaluator_1"]}),
+            output_dict=OrderedDict({"delay": "evaluator_1"}),
+            input_evaluators={"evaluator_1": {"order": 0}},
+            gens=1,
+            parallel_method=parallel_method,
+            keep_files="none",
+            max_concurrent_evaluations=2,
+        )
+        pop = []
+        for i, delay in enumerate([0, 30]):
+            ind = creator.Ind([delay])
+            ind.gen, ind.num = 0, i
+            pop.append(ind)
+        start_time = time.time()
+        if parallel_method == "none":
+            output_vals = [eval_function(ind) for ind in pop]
+        else:
+            output_vals = eval_function(pop)
+        runtime = time.time() - start_time
+        all_output_vals[parallel_method] = output_vals
+        assert runtime < 15
+        assert not ev.was_timed_out(pop[0])
+        assert ev.was_timed_out(pop[1])
+        ev.flush_file_operations()
+    os.chdir("../")
+    for output_vals in all_output_vals.values():
+        assert output_vals[1] == tuple([float("inf")])
+    return
+
+
+def test_eval_fn_generator_retries():
+    init()
+    os.chdir("./input_test_files")
+    all_output_vals = {}
+    for parallel_method in ["none", "job_control", "asyncio"]:
+        ev = Evaluation(penalty_vals=[float("inf"), float("inf")])
+        ev.add_evaluator(
+            solver_name="evaluator_0",
+            input_script=None,
+            output_script=None,
+            evaluator_callable="input_test_callable:evaluate")
+        ev.add_evaluator(
+            solver_name="evaluator_1",
+            input_script=["python", "input_test_flaky.py"],
+            output_script=["python", "input_test_resources_output.py"],
+            retries=2,
+            retry_backoff=0,
+            penalty={"variable": -1})
+        eval_function = ev.eval_fn_generator(
+            control_dict=OrderedDict({"variable": ["evaluator_1"],
+                                      "packing_fraction": ["evaluator_0"]}),
+            output_dict=OrderedDict({"num_batches": "evaluator_0",
+                                     "variable": "evaluator_1"}),
+            input_evaluators={"evaluator_0": {"order": 0},
+                              "evaluator_1": {"order": 1}},
+            gens=1,
+            parallel_method=parallel_method,
+            keep_files="none",
+        )
+        pop = []
+        for i in range(2):
+            ind = creator.Ind([i, 0.1])
+            ind.gen, ind.num = 0, i
+            pop.append(ind)
+        if parallel_method == "none":
+            output_vals = [eval_function(ind) for ind in pop]
+        else:
+            output_vals = eval_function(pop)
+        ev.flush_file_operations()
+        all_output_vals[parallel_method] = output_vals
+        assert not ev.was_failed(pop[0])
+        assert ev.was_failed(pop[1])
+        assert not output_vals[0].penalized
+        assert output_vals[1].penalized
+        # failures and timeouts are told apart
+        assert not ev.was_timed_out(pop[1])
+    os.chdir("../")
+    for output_vals in all_output_vals.values():
+        # only the failed solver's output is penalized, the earlier
+        # solver's valid output is kept
+        assert output_vals == [tuple([10, 0]), tuple([10, -1])]
+        assert [f["retried"] for f in output_vals[0].failures] == [True]
+        assert [f["retried"] for f in output_vals[1].failures] == \
+            [True, True, False]
+        assert "exited with code 1" in output_vals[1].failures[0]["reason"]
+    ev = Evaluation()
+    ev.add_evaluator(
+        solver_name="evaluator_1",
+        input_script=["python", "input_test_flaky.py"],
+        output_script=["python", "input_test_resources_output.py"])
+    with pytest.raises(Exception):
+        ev.failed("0_0", "evaluator_1", 0, SolverError("failed"))
+    return
+
+
+def test_eval_fn_generator_fidelity():
+    init()
+    os.chdir("./input_test_files")
+    all_output_vals = {}
+    for parallel_method in ["none", "job_control", "asyncio"]:
+        ev = Evaluation()
+        ev.add_evaluator(
+            solver_name="evaluator_1",
+            input_script=["python", "input_test_fidelity.py"],
+            output_script=["python", "input_test_resources_output.py"],
+            fidelity={"particles": [100, 1000, 10000]})
+        eval_function = ev.eval_fn_generator(
+            control_dict=OrderedDict({"variable": ["evaluator_1"]}),
+            output_dict=OrderedDict({"total": "evaluator_1"}),
+            input_evaluators={"evaluator_1": {"order": 0}},
+            gens=1,
+            parallel_method=parallel_method,
+            keep_files="none",
+        )
+        pop = []
+        for i, fidelity in enumerate([0, 1, 2, None]):
+            ind = creator.Ind([i])
+            ind.gen, ind.num = 0, i
+            if fidelity is not None:
+                ind.fidelity = fidelity
+            pop.append(ind)
+        if parallel_method == "none":
+            output_vals = [eval_function(ind) for ind in pop]
+        else:
+            output_vals = eval_function(pop)
+        ev.flush_file_operations()
+        all_output_vals[parallel_method] = output_vals
+        assert ev.fidelity_levels == 3
+        assert [ev.ind_path(ind) for ind in pop] == \
+            ["0_0_f0", "0_1_f1", "0_2", "0_3"]
+    os.chdir("../")
+    for output_vals in all_output_vals.values():
+        assert output_vals == [tuple([100]), tuple([1001]),
+                               tuple([10002]), tuple([10003])]
+    return
+
+
+def test_eval_fn_generator_scheduler():
+    init()
+    os.chdir("./input_test_files")
+    fake_sbatch = ["python", os.path.abspath("input_test_fake_sbatch.py")]
+    cancelled_file = os.path.abspath("test_scheduler_cancelled.txt")
+    all_output_vals = {}
+    # "true" accepts the job array but never runs it
+    for submit in ["fake_sbatch", "true"]:
+        ev = Evaluation(scheduler={
+            "submit": fake_sbatch if submit == "fake_sbatch" else
+            ["echo", "Submitted batch job 42", ";", "true"],
+            "cancel": ["echo", "cancelled", ">", cancelled_file],
+            "poll_interval": 0.1,
+            "timeout": 1 if submit == "true" else 60})
+        ev.add_evaluator(
+            solver_name="evaluator_1",
+            input_script=[
+                "python", "input_test_eval_fn_generator_template.py"],
+            output_script=[
+                "python", "input_test_eval_fn_generator_output.py"])
+        eval_function = ev.eval_fn_generator(
+            control_dict=OrderedDict(
+                {"packing_fraction": ["evaluator_1"],
+                 "variable2": ["evaluator_1"]}),
+            output_dict=OrderedDict(
+                {"packing_fraction": "evaluator_1",
+                 "num_batches": "evaluator_1"}),
+            input_evaluators={"evaluator_1": {"order": 0}},
+            gens=1,
+            parallel_method="scheduler",
+            keep_files="none",
+        )
+        pop = []
+        for i in range(3):
+            ind = creator.Ind([0.03, 1])
+            ind.gen, ind.num = 0, i
+            pop.append(ind)
+        all_output_vals[submit] = eval_function(pop)
+        ev.flush_file_operations()
+    left = [name for name in os.listdir(".") if name.startswith("0_")]
+    # only the job array that timed out was cancelled
+    with open(cancelled_file) as fp:
+        cancelled = fp.read()
+    os.remove(cancelled_file)
+    os.chdir("../")
+    assert cancelled == "cancelled 42\n"
+    assert all_output_vals["fake_sbatch"] == [tuple([0.03, 10])] * 3
+    assert all(math.isnan(val) for output_vals in all_output_vals["true"]
+               for val in output_vals)
+    assert left == []
+    return
+
+
+def test_eval_fn_generator_distributed():
+    init()
+    os.chdir("./input_test_files")
+    ev = Evaluation(distributed={
+        "address": "127.0.0.1:0", "authkey": "test"})
+    ev.add_evaluator(
+        solver_name="evaluator_1",
+        input_script=["python", "input_test_eval_fn_generator_template.py"],
+        output_script=["python", "input_test_eval_fn_generator_output.py"])
     eval_function = ev.eval_fn_generator(
         control_dict=OrderedDict(
             {"packing_fraction": ["evaluator_1"],
-             "variable2": ["evaluator_1", "evaluator_2"]}
-        ),
+             "variable2": ["evaluator_1"]}),
         output_dict=OrderedDict(
-            {
-                "packing_fraction": "evaluator_1",
-                "max_temp": "evaluator_2",
-                "num_batches": "evaluator_1",
-            }
-        ),
-        input_evaluators={
-            "evaluator_1": {"keep_files": True, "order": 0},
-            "evaluator_2": {"keep_files": True, "order": 1},
-        },
+            {"packing_fraction": "evaluator_1",
+             "num_batches": "evaluator_1"}),
+        input_evaluators={"evaluator_1": {"order": 0}},
         gens=1,
-        parallel_method="job_control",
-        keep_files="none"
+        parallel_method="distributed",
+        keep_files="none",
     )
-    creator.create("obj", base.Fitness, weights=(-1.0,))
-    creator.create("Ind", list, fitness=creator.obj)
-    ind1, ind2 = creator.Ind(
-        [0.03, 1]), creator.Ind([0.03, 1])
-    ind1.gen, ind1.num = 0, 0
-    ind2.gen, ind2.num = 0, 1
-    pop = [ind1, ind2]
-    output_vals = eval_function(pop)
-    expected_output_vals = [tuple([0.03, 1000, 10]), tuple([
-        0.03, 1000, 10])]
+    host, port = ev.coordinator.address
+    workers = [subprocess.Popen(
+        [sys.executable, "-m", "rollo.worker", "--connect",
+         host + ":" + str(port), "--authkey", "test"]) for _ in range(2)]
+    pop = []
+    for i in range(3):
+        ind = creator.Ind([0.03, 1])
+        ind.gen, ind.num = 0, i
+        pop.append(ind)
+    all_output_vals = eval_function(pop)
+    ev.flush_file_operations()
+    ev.coordinator.close()
+    returncodes = [worker.wait(timeout=30) for worker in workers]
+    left = [name for name in os.listdir(".") if name.startswith("0_")]
+    os.chdir("../")
+    assert all_output_vals == [tuple([0.03, 10])] * 3
+    assert returncodes == [0, 0]
+    assert left == []
+    return
+
 
+def test_run_distributed_tasks_timeout():
+    init()
+    os.chdir("./input_test_files")
+    ev = Evaluation(distributed={
+        "address": "127.0.0.1:0", "authkey": "test",
+        "heartbeat_timeout": 1, "timeout": 3})
+    ev.add_evaluator(
+        solver_name="evaluator_1",
+        input_script=["python", "input_test_eval_fn_generator_template.py"],
+        output_script=["python", "input_test_eval_fn_generator_output.py"])
+    eval_function = ev.eval_fn_generator(
+        control_dict=OrderedDict(
+            {"packing_fraction": ["evaluator_1"],
+             "variable2": ["evaluator_1"]}),
+        output_dict=OrderedDict(
+            {"packing_fraction": "evaluator_1",
+             "num_batches": "evaluator_1"}),
+        input_evaluators={"evaluator_1": {"order": 0}},
+        gens=1,
+        parallel_method="distributed",
+        keep_files="none",
+    )
+
+    def worker():
+        # runs one task, and also returns a file outside its directory
+        connection = Client(ev.coordinator.address, authkey=b"test")
+        connection.send(("ready",))
+        _, task_id, task = connection.recv()
+        connection.send(("result", task_id, {"returncode": 0, "files": {
+            "evaluator_1_output.json": b'{"num_batches": 7}',
+            "../0_escaped.txt": b"escaped"}}))
+        connection.close()
+
+    worker_thread = threading.Thread(target=worker)
+    worker_thread.start()
+    pop = []
+    for i in range(2):
+        ind = creator.Ind([0.03, 1])
+        ind.gen, ind.num = 0, i
+        pop.append(ind)
+    start_time = time.time()
+    all_output_vals = eval_function(pop)
+    runtime = time.time() - start_time
+    worker_thread.join()
+    ev.flush_file_operations()
+    ev.coordinator.close()
+    escaped = os.path.exists("0_escaped.txt")
     os.chdir("../")
-    assert output_vals == expected_output_vals
+    assert not escaped
+    assert all_output_vals[0] == tuple([0.03, 7])
+    # the second individual's task was never run
+    assert all(math.isnan(val) for val in all_output_vals[1])
+    assert runtime < 15
+    return
+
+
+def test_eval_fn_generator_resources():
+    init()
+    os.chdir("./input_test_files")
+    all_output_vals = {}
+    for parallel_method in ["threads", "job_control", "asyncio"]:
+        ev = Evaluation(node_cores=4, node_memory_gb=16)
+        ev.add_evaluator(
+            solver_name="evaluator_1",
+            input_script=["python", "input_test_resources.py"],
+            output_script=["python", "input_test_resources_output.py"],
+            cores=2,
+            memory_gb=4)
+        eval_function = ev.eval_fn_generator(
+            control_dict=OrderedDict({"variable": ["evaluator_1"]}),
+            output_dict=OrderedDict(
+                {"omp": "evaluator_1", "cores": "evaluator_1",
+                 "start": "evaluator_1", "end": "evaluator_1"}),
+            input_evaluators={"evaluator_1": {"order": 0}},
+            gens=1,
+            parallel_method=parallel_method,
+            keep_files="none",
+            max_concurrent_evaluations=4,
+        )
+        pop = []
+        for i in range(4):
+            ind = creator.Ind([i])
+            ind.gen, ind.num = 0, i
+            pop.append(ind)
+        if parallel_method == "threads":
+            with ThreadPoolExecutor(max_workers=4) as pool:
+                output_vals = list(pool.map(eval_function, pop))
+        else:
+            output_vals = eval_function(pop)
+        ev.flush_file_operations()
+        all_output_vals[parallel_method] = output_vals
+    os.chdir("../")
+    assert ev.max_concurrent_runs() == 2
+    for parallel_method, output_vals in all_output_vals.items():
+        assert [vals[:2] for vals in output_vals] == [tuple([2, 2])] * 4
+        # 4 cores fit two runs of 2 cores at a time
+        for vals in output_vals:
+            running = [other for other in output_vals
+                       if other[2] <= vals[2] < other[3]]
+            assert len(running) <= 2
+    return
+
+
+def test_eval_fn_generator_cpu_affinity():
+    init()
+    os.chdir("./input_test_files")
+    all_output_vals, all_records = {}, {}
+    for parallel_method in ["none", "job_control", "asyncio"]:
+        ev = Evaluation(cpu_affinity=True)
+        ev.add_evaluator(
+            solver_name="evaluator_1",
+            input_script=["python", "input_test_cpu_affinity.py"],
+            output_script=["python", "input_test_resources_output.py"],
+            cores=1)
+        eval_function = ev.eval_fn_generator(
+            control_dict=OrderedDict({"variable": ["evaluator_1"]}),
+            output_dict=OrderedDict(
+                {"num_cpus": "evaluator_1", "cpu": "evaluator_1"}),
+            input_evaluators={"evaluator_1": {"order": 0}},
+            gens=1,
+            parallel_method=parallel_method,
+            keep_files="none",
+        )
+        pop = []
+        for i in range(2):
+            ind = creator.Ind([i])
+            ind.gen, ind.num = 0, i
+            pop.append(ind)
+        if parallel_method == "none":
+            output_vals = [eval_function(ind) for ind in pop]
+        else:
+            output_vals = eval_function(pop)
+        ev.flush_file_operations()
+        all_output_vals[parallel_method] = output_vals
+        all_records[parallel_method] = sorted(
+            ev.affinity_records, key=lambda record: record["path"])
+    os.chdir("../")
+    for parallel_method, output_vals in all_output_vals.items():
+        records = all_records[parallel_method]
+        assert [record["path"] for record in records] == ["0_0", "0_1"]
+        for vals, record in zip(output_vals, records):
+            # each run's processes only ran on the CPU it was handed
+            assert vals == tuple([1, record["cpus"][0]])
+            assert record["solver"] == "evaluator_1"
+            assert record["runtime"] > 0
+    # the evaluation's own thread is not left pinned
+    assert os.sched_getaffinity(0) == set(ev.resource_pool.cpus)
+    return
+
+
+def test_eval_fn_generator_resource_usage():
+    init()
+    os.chdir("./input_test_files")
+    all_output_vals = {}
+    for parallel_method in ["none", "job_control", "asyncio"]:
+        ev = Evaluation()
+        ev.add_evaluator(
+            solver_name="evaluator_1",
+            input_script=["python", "input_test_usage.py"],
+            output_script=["python", "input_test_resources_output.py"])
+        eval_function = ev.eval_fn_generator(
+            control_dict=OrderedDict({"variable": ["evaluator_1"]}),
+            output_dict=OrderedDict({"variable": "evaluator_1"}),
+            input_evaluators={"evaluator_1": {"order": 0}},
+            gens=1,
+            parallel_method=parallel_method,
+            keep_files="none",
+        )
+        pop = []
+        for i in range(2):
+            ind = creator.Ind([i])
+            ind.gen, ind.num = 0, i
+            pop.append(ind)
+        if parallel_method == "none":
+            output_vals = [eval_function(ind) for ind in pop]
+        else:
+            output_vals = eval_function(pop)
+        ev.flush_file_operations()
+        all_output_vals[parallel_method] = output_vals
+        assert ev.usage_records == {}
+    os.chdir("../")
+    for parallel_method, output_vals in all_output_vals.items():
+        assert output_vals == [tuple([0]), tuple([1])]
+        for vals in output_vals:
+            input_usage, output_usage = vals.resources
+            assert input_usage["solver"] == "evaluator_1"
+            assert "input_test_usage.py" in input_usage["command"]
+            assert "input_test_resources_output.py" in output_usage["command"]
+            assert input_usage["wall_time"] > 0
+            if parallel_method == "asyncio":
+                # the event loop reaps the processes
+                assert input_usage["user_time"] is None
+                assert input_usage["bytes_written"] is None
+            else:
+                assert input_usage["user_time"] > 0
+                assert input_usage["max_rss"] > 1000000
+                assert input_usage["bytes_written"] >= 100000
+    return
+
+
+def test_eval_fn_generator_scratch_dir():
+    init()
+    os.chdir("./input_test_files")
+    kept, scratch_left = {}, {}
+    # the scratch directory is made once an individual needs it
+    Evaluation(scratch_dir="test_scratch")
+    assert not os.path.exists("test_scratch")
+    for parallel_method in ["none", "job_control"]:
+        ev = Evaluation(scratch_dir="test_scratch")
+        ev.add_evaluator(
+            solver_name="evaluator_1",
+            input_script=[
+                "python", "input_test_eval_fn_generator_template.py"],
+            output_script=[
+                "python", "input_test_eval_fn_generator_output.py"])
+        eval_function = ev.eval_fn_generator(
+            control_dict=OrderedDict(
+                {"packing_fraction": ["evaluator_1"],
+                 "variable2": ["evaluator_1"]}),
+            output_dict=OrderedDict(
+                {"packing_fraction": "evaluator_1",
+                 "num_batches": "evaluator_1"}),
+            input_evaluators={"evaluator_1": {"order": 0}},
+            gens=2,
+            parallel_method=parallel_method,
+            keep_files="only_final",
+        )
+        inds = []
+        for gen in range(2):
+            ind = creator.Ind([0.03, 1])
+            ind.gen, ind.num = gen, 0
+            inds.append(ind)
+        assert ev.ind_path(inds[0]).startswith(
+            os.path.join("test_scratch", "rollo_"))
+        if parallel_method == "none":
+            output_vals = [eval_function(ind) for ind in inds]
+        else:
+            output_vals = [eval_function([ind])[0] for ind in inds]
+        assert output_vals == [tuple([0.03, 10])] * 2
+        ev.flush_file_operations()
+        # only the final generation is kept, in the directory ROLLO runs in
+        kept[parallel_method] = [os.path.exists("0_0"), os.path.exists("1_0")]
+        scratch_left[parallel_method] = os.listdir("test_scratch")
+        shutil.rmtree("1_0")
+    shutil.rmtree("test_scratch")
+    os.chdir("../")
+    for parallel_method in kept:
+        assert kept[parallel_method] == [False, True]
+        assert scratch_left[parallel_method] == []
+    return
+
+
+def test_eval_fn_generator_archive():
+    init()
+    os.chdir("./input_test_files")
+    indexes, extracted = {}, {}
+    for parallel_method in ["none", "job_control", "asyncio"]:
+        ev = Evaluation()
+        ev.add_evaluator(
+            solver_name="evaluator_1",
+            input_script=["python", "input_test_usage.py"],
+            output_script=["python", "input_test_resources_output.py"])
+        eval_function = ev.eval_fn_generator(
+            control_dict=OrderedDict({"variable": ["evaluator_1"]}),
+            output_dict=OrderedDict({"variable": "evaluator_1"}),
+            input_evaluators={"evaluator_1": {"order": 0}},
+            gens=2,
+            parallel_method=parallel_method,
+            keep_files="archive",
+        )
+        pop = []
+        for i in range(2):
+            ind = creator.Ind([i])
+            ind.gen, ind.num = 1, i
+            pop.append(ind)
+        if parallel_method == "none":
+            output_vals = [eval_function(ind) for ind in pop]
+        else:
+            output_vals = eval_function(pop)
+        ev.flush_file_operations()
+        assert output_vals == [tuple([0]), tuple([1])]
+        # the directories are packed into the generation's archive
+        assert not os.path.exists("1_0") and not os.path.exists("1_1")
+        archive = "archive_1" + archive_extension()
+        indexes[parallel_method] = sorted(read_index(archive))
+        path = extract_individual(archive, "1_1", "test_extracted")
+        extracted[parallel_method] = os.path.getsize(
+            os.path.join(path, "usage_data.bin"))
+        shutil.rmtree("test_extracted")
+        os.remove(archive)
+        os.remove(index_path(archive))
+    os.chdir("../")
+    for parallel_method in indexes:
+        assert indexes[parallel_method] == ["1_0", "1_1"]
+        assert extracted[parallel_method] == 100000
+    return
+
+
+def test_link_static_files():
+    init()
+    os.chdir("./input_test_files")
+    with open("test_static.txt", "w") as file:
+        file.write("static")
+    os.mkdir("test_static_dir")
+    with open("test_static_dir/data.txt", "w") as file:
+        file.write("static")
+    inodes, kept = {}, {}
+    for scratch_dir, other_file_system in [
+            (None, False), ("test_scratch", False), (None, True)]:
+        ev = Evaluation(scratch_dir=scratch_dir)
+        if other_file_system:
+            ev.same_file_system = lambda file: False
+        ev.add_evaluator(
+            solver_name="evaluator_1",
+            input_script=["python", "input_test_run_input_script.py"],
+            output_script=[
+                "python", "input_test_evaluation_get_output_vals.py"],
+            static_files=["test_static.txt", "test_static_dir"])
+        ev.stage_files({"evaluator_1": {"order": 0}})
+        key = scratch_dir, other_file_system
+        inodes[key] = []
+        for path in ["test_0_0", "test_0_1"]:
+            os.mkdir(path)
+            ev.link_static_files(path)
+            ev.generate_output_script(path, "evaluator_1")
+            inodes[key].append(
+                os.stat(os.path.join(path, "test_static.txt")).st_ino)
+            with open(os.path.join(path, "test_static.txt")) as file:
+                assert file.read() == "static"
+            assert os.path.exists(os.path.join(
+                path, "input_test_evaluation_get_output_vals.py"))
+        ev.flush_file_operations()
+        # test_0_1 is kept, its links still work once the run is over
+        shutil.rmtree("test_0_0")
+        kept[key] = [
+            os.path.exists("test_0_1/test_static.txt"),
+            os.path.exists("test_0_1/test_static_dir/data.txt")]
+        shutil.rmtree("test_0_1")
+    inodes["source"] = os.stat("test_static.txt").st_ino
+    static_left = [name for name in os.listdir(".")
+                   if name.startswith("rollo_static_")]
+    os.remove("test_static.txt")
+    shutil.rmtree("test_static_dir")
+    os.chdir("../")
+    # on the same file system every individual links the file itself,
+    # otherwise one read-only copy of it
+    for key in [(None, False), ("test_scratch", False)]:
+        assert set(inodes[key]) == {inodes["source"]}
+    assert len(set(inodes[None, True])) == 1
+    assert inodes[None, True][0] != inodes["source"]
+    for key in kept:
+        assert kept[key] == [True, True]
+    assert static_left == []
     return
 
 
@@ -177,131 +1182,324 @@ def test_create_input_execute_output_scripts():
     return
 
 
-def test_run_input_and_execute_and_output_scripts():
+def test_job_control_commands():
+    ev = Evaluation()
+    ev.add_evaluator(
+        solver_name="evaluator_1", input_script=[
+            "python", "input_test_run_input_script.py"], output_script=[
+            "python", "input_test_evaluation_get_output_vals.py"], )
+    ev.add_evaluator(
+        solver_name="evaluator_2", input_script=[
+            "python", "input_test_run_input_script.py"], output_script=None)
+    commands = ev.job_control_commands(
+        "evaluator_1",
+        {"execute": [["python", "input_test_run_execute.py"],
+                     ["rollo-non-existent-executable"]]})
+    assert commands == [
+        "python input_test_run_input_script.py > " +
+        "evaluator_1_input_script_out.txt 2>&1",
+        "python input_test_run_execute.py > " +
+        "evaluator_1_execute_0_out.txt 2>&1",
+        "rollo-non-existent-executable > " +
+        "evaluator_1_execute_1_out.txt 2>&1",
+        "python input_test_evaluation_get_output_vals.py > " +
+        "evaluator_1_output_script_out.txt 2>&1"]
+    commands = ev.job_control_commands("evaluator_2", {})
+    assert commands == [
+        "python input_test_run_input_script.py > " +
+        "evaluator_2_input_script_out.txt 2>&1"]
+    return
+
+
+def test_run_ind_job_control():
     init()
     os.chdir("./input_test_files")
     os.mkdir("0_0")
-    os.mkdir("0_1")
-    control_vars_dict = {
-        "0_0": {"evaluator_1": {"hi": 1, "hi2": 2}},
-        "0_1": {"evaluator_1": {"hi": 3, "hi2": 4}}
-    }
-    ind1, ind2 = creator.Ind([1]), creator.Ind([2])
-    ind1.gen, ind1.num = 0, 0
-    ind2.gen, ind2.num = 0, 1
-    pop = [ind1, ind2]
+    ind = creator.Ind([1])
+    ind.gen, ind.num = 0, 0
     ev = Evaluation()
     ev.add_evaluator(
         solver_name="evaluator_1", input_script=[
             "python", "input_test_run_input_script.py"], output_script=[
             "python", "input_test_evaluation_get_output_vals.py"], )
-    input_evaluators_solver = {"execute": [
+    control_vars_dict = {"0_0": {"evaluator_1": {"hi": 1, "hi2": 2}}}
+    input_evaluators = {"evaluator_1": {"order": 0, "execute": [
         ["python", "input_test_run_execute.py"],
-        ["rollo-non-existent-executable"]]}
-    ev.create_input_execute_output_scripts(
-        pop=pop,
-        solver="evaluator_1",
-        control_vars_dict=control_vars_dict,
-        input_evaluators_solver=input_evaluators_solver)
-    ev.run_input_and_execute_and_output_scripts(
-        pop=pop,
-        solver="evaluator_1",
-        input_evaluators_solver=input_evaluators_solver
-    )
-
+        ["rollo-non-existent-executable"]]}}
+    output_vals = ev.run_ind_job_control(
+        ind,
+        ["evaluator_1"],
+        control_vars_dict,
+        OrderedDict({"hi": "evaluator_1", "random": "evaluator_1"}),
+        input_evaluators)
     with open("./0_0/evaluator_1_input_script_out.txt") as fp:
         Lines = fp.readlines()[0]
     assert Lines == "[1, 2]\n"
-    with open("./0_1/evaluator_1_input_script_out.txt") as fp:
-        Lines = fp.readlines()[0]
-    assert Lines == "[3, 4]\n"
     with open("./0_0/evaluator_1_execute_0_out.txt") as fp:
         Lines = fp.readlines()[0]
     assert Lines == "[5, 6]\n"
-    with open("./0_1/evaluator_1_execute_0_out.txt") as fp:
-        Lines = fp.readlines()[0]
-    assert Lines == "[5, 6]\n"
     with open("./0_0/evaluator_1_execute_1_out.txt") as fp:
         Lines = fp.readlines()[0]
     assert "not found" and "rollo-non-existent-executable" in Lines
-    with open("./0_1/evaluator_1_execute_1_out.txt") as fp:
-        Lines = fp.readlines()[0]
-    assert "not found" and "rollo-non-existent-executable" in Lines
-    with open("./0_0/evaluator_1_output_script_out.txt") as fp:
-        Lines = fp.readline()
-    assert Lines == "{'random': 3}\n"
-    with open("./0_1/evaluator_1_output_script_out.txt") as fp:
-        Lines = fp.readline()
-    assert Lines == "{'random': 3}\n"
     shutil.rmtree("./0_0")
-    shutil.rmtree("./0_1")
     os.chdir("../")
+    assert output_vals == tuple([1, 3])
+    assert [r["returncode"] for r in ev.job_control_records] == \
+        [0, 0, 127, 0]
+    assert ev.job_control_records[0]["path"] == "0_0"
+    assert ev.job_control_records[0]["runtime"] > 0
+    return
+
+
+def test_log_job_control_records(caplog):
+    ev = Evaluation()
+    ev.job_control_records = [
+        {"path": "0_" + str(i), "solver": "evaluator_1",
+         "command": "python input.py", "returncode": 0, "runtime": runtime}
+        for i, runtime in enumerate([1.0, 3.0])]
+    with caplog.at_level(logging.INFO):
+        ev.log_job_control_records(0)
+    assert "Solver: evaluator_1, 'python input.py' Runs: 2, " + \
+        "Mean Runtime: 2.0 seconds, Max Runtime: 3.0 seconds" in caplog.text
+    # records are cleared each generation
+    assert ev.job_control_records == []
     return
 
 
-def test_generate_run_command_job_control():
+def test_run_job_control_queue():
     init()
-    ind1, ind2 = creator.Ind([1]), creator.Ind([2])
-    ind1.gen, ind1.num = 0, 0
-    ind2.gen, ind2.num = 0, 1
-    pop = [ind1, ind2]
+    os.chdir("./input_test_files")
     ev = Evaluation()
-    command = ev.generate_run_command_job_control(
-        pop, "openmc", "python hello.py")
-    expected_command = "cd 0_0\npython hello.py & \nsleep 1 \n" + \
-        "cd ../0_1\npython hello.py & \nsleep 1 \nwait"
-    assert command == expected_command
+    ev.add_evaluator(
+        solver_name="evaluator_1", input_script=[
+            "python", "input_test_pipeline_sleep.py"], output_script=None)
+    ev.add_evaluator(
+        solver_name="evaluator_2", input_script=[
+            "python", "input_test_pipeline_sleep.py"], output_script=None)
+    delays = [0.1, 1.5]
+    pop, control_vars_dict = [], {}
+    for i, delay in enumerate(delays):
+        ind = creator.Ind([delay])
+        ind.gen, ind.num = 0, i
+        pop.append(ind)
+        control_vars_dict["0_" + str(i)] = {
+            "evaluator_1": {"delay": delay},
+            "evaluator_2": {"delay": 0}}
+        os.mkdir("0_" + str(i))
+    all_output_vals = ev.run_job_control_queue(
+        pop,
+        ["evaluator_1", "evaluator_2"],
+        control_vars_dict,
+        OrderedDict({"delay": "evaluator_1"}),
+        {"evaluator_1": {"order": 0}, "evaluator_2": {"order": 1}},
+        2)
+    times = {}
+    for path in ["0_0", "0_1"]:
+        for solver in ["evaluator_1", "evaluator_2"]:
+            with open(path + "/" + solver + "_input_script_out.txt") as fp:
+                times[path, solver] = [float(t) for t in fp.read().split()]
+        shutil.rmtree(path)
+    os.chdir("../")
+    assert all_output_vals == [tuple([0.1]), tuple([1.5])]
+    # the fast individual starts its second solver while the slow individual
+    # is still running its first solver
+    assert times["0_0", "evaluator_2"][0] < times["0_1", "evaluator_1"][1]
     return
 
 
-def test_get_output_vals_job_control():
+def test_run_job_control_queue_speculative():
     init()
-    ind1, ind2 = creator.Ind([1]), creator.Ind([2])
-    ind1.gen, ind1.num = 0, 0
-    ind2.gen, ind2.num = 0, 1
-    pop = [ind1, ind2]
+    os.chdir("./input_test_files")
+    ev = Evaluation(speculative_fraction=0.5)
+    ev.add_evaluator(
+        solver_name="evaluator_1", input_script=[
+            "python", "input_test_speculative_sleep.py"], output_script=None)
+    pop, control_vars_dict = [], {}
+    for i, delay in enumerate([0, 30]):
+        ind = creator.Ind([delay])
+        ind.gen, ind.num = 0, i
+        pop.append(ind)
+        control_vars_dict["0_" + str(i)] = {"evaluator_1": {"delay": delay}}
+        os.mkdir("0_" + str(i))
+    start_time = time.time()
+    all_output_vals = ev.run_job_control_queue(
+        pop,
+        ["evaluator_1"],
+        control_vars_dict,
+        OrderedDict({"delay": "evaluator_1"}),
+        {"evaluator_1": {"order": 0}},
+        2)
+    runtime = time.time() - start_time
+    with open("0_1/evaluator_1_input_script_out.txt") as fp:
+        winner = fp.read().strip()
+    duplicate_exists = os.path.exists("0_1_s")
+    shutil.rmtree("0_0")
+    shutil.rmtree("0_1")
+    os.chdir("../")
+    assert all_output_vals == [tuple([0]), tuple([30])]
+    assert runtime < 15
+    # the duplicate finished first and its directory replaced the original's
+    assert winner == "0_1_s"
+    assert not duplicate_exists
+    assert pop[1].num == 1
+    # the duplicate's resource usage replaced the cancelled original's
+    assert set(ev.usage_records) == {"0_0", "0_1"}
+    assert len(ev.usage_records["0_1"]) == 1
+    assert ev.usage_records["0_1"][0]["wall_time"] < 15
+    # the cancelled copy is forgotten once the next generation starts
+    assert ev.cancelled_paths != set()
+    ev.start_generation(1)
+    assert ev.cancelled_paths == set()
+    return
+
+
+def test_run_job_control_queue_required():
+    init()
+    os.chdir("./input_test_files")
     ev = Evaluation()
+    ev.add_evaluator(
+        solver_name="evaluator_1", input_script=[
+            "python", "input_test_pipeline_sleep.py"], output_script=None)
+    pop, control_vars_dict = [], {}
+    for i, delay in enumerate([0, 30]):
+        ind = creator.Ind([delay])
+        ind.gen, ind.num = 0, i
+        pop.append(ind)
+        control_vars_dict["0_" + str(i)] = {"evaluator_1": {"delay": delay}}
+        os.mkdir("0_" + str(i))
+    start_time = time.time()
+    all_output_vals = ev.run_job_control_queue(
+        pop,
+        ["evaluator_1"],
+        control_vars_dict,
+        OrderedDict({"delay": "evaluator_1"}),
+        {"evaluator_1": {"order": 0}},
+        2,
+        required=1)
+    runtime = time.time() - start_time
+    ev.flush_file_operations()
+    cancelled_exists = os.path.exists("0_1")
+    shutil.rmtree("0_0")
+    os.chdir("../")
+    assert all_output_vals == [tuple([0]), None]
+    assert runtime < 15
+    assert not cancelled_exists
+    return
+
+
+def test_eval_fn_generator_batch_script():
+    init()
     os.chdir("./input_test_files")
-    os.mkdir("0_0")
-    os.mkdir("0_1")
+    all_output_vals = {}
+    for parallel_method in ["none", "job_control", "asyncio"]:
+        for row_format in ["dict", "list"]:
+            ev = Evaluation()
+            ev.add_evaluator(
+                solver_name="evaluator_1",
+                input_script=None,
+                output_script=None,
+                batch_script=[
+                    "python", "input_test_batch_script.py", row_format])
+            eval_function = ev.eval_fn_generator(
+                control_dict=OrderedDict(
+                    {"packing_fraction": ["evaluator_1"]}),
+                output_dict=OrderedDict(
+                    {"packing_fraction": "evaluator_1",
+                     "doubled": "evaluator_1",
+                     "batch_size": "evaluator_1"}),
+                input_evaluators={"evaluator_1": {"order": 0}},
+                gens=1,
+                parallel_method=parallel_method,
+                keep_files="none",
+            )
+            pop = []
+            for i, packing_fraction in enumerate([0.1, 0.2, 0.3]):
+                ind = creator.Ind([packing_fraction])
+                ind.gen, ind.num = 0, i
+                pop.append(ind)
+            if parallel_method == "none":
+                output_vals = [eval_function(ind) for ind in pop]
+            else:
+                output_vals = eval_function(pop)
+            ev.flush_file_operations()
+            all_output_vals[parallel_method, row_format] = output_vals
+    batch_dirs = [name for name in os.listdir(".")
+                  if name.startswith("0_evaluator_1_batch_")]
+    os.chdir("../")
+    for (parallel_method, row_format) in all_output_vals:
+        output_vals = all_output_vals[parallel_method, row_format]
+        # one batch per population, or per individual for parallel none
+        batch_size = 1 if parallel_method == "none" else 3
+        assert output_vals == [
+            tuple([0.1, 0.2, batch_size]),
+            tuple([0.2, 0.4, batch_size]),
+            tuple([0.3, 0.6, batch_size])]
+    assert batch_dirs == []
+    return
+
+
+def test_run_batch_solvers_failed():
+    init()
+    os.chdir("./input_test_files")
+    ev = Evaluation(penalty_vals=[0.0, 0.0])
+    ev.add_evaluator(
+        solver_name="evaluator_1",
+        input_script=None,
+        output_script=None,
+        batch_script=["python", "input_test_batch_script.py", "fail"],
+        retries=1,
+        retry_backoff=0,
+        penalty={"doubled": -1})
+    ev.output_names = ["doubled", "batch_size"]
+    pop = []
+    for i in range(2):
+        ind = creator.Ind([0.1])
+        ind.gen, ind.num = 0, i
+        pop.append(ind)
+    batch_output_vals = ev.run_batch_solvers(
+        pop,
+        {"0_0": {"evaluator_1": {"packing_fraction": 0.1}},
+         "0_1": {"evaluator_1": {"packing_fraction": 0.1}}},
+        OrderedDict({"doubled": "evaluator_1", "batch_size": "evaluator_1"}),
+        False)
+    ev.flush_file_operations()
+    os.chdir("../")
+    # the failed run is retried once, then every individual is penalized
+    assert batch_output_vals == {"0_0": [-1, 0.0], "0_1": [-1, 0.0]}
+    assert [record["retried"] for record in ev.failure_records["0_0"]] == \
+        [True, False]
+    assert ev.was_failed(pop[1])
+    return
+
+
+def test_evaluate_pop_async_required():
+    init()
+    os.chdir("./input_test_files")
+    ev = Evaluation()
     ev.add_evaluator(
         solver_name="evaluator_1", input_script=[
-            "python", "input_test_run_input_script.py"], output_script=[
-            "python", "input_test_evaluation_get_output_vals.py"], )
-    output_vals_dict = OrderedDict()
-    control_vars_dict = {
-        "0_0": {"evaluator_1": {"hi": 1, "hi2": 2}},
-        "0_1": {"evaluator_1": {"hi": 3, "hi2": 4}}
-    }
-    output_vals_dict["0_0"] = [None] * 2
-    output_vals_dict["0_1"] = [None] * 2
-    input_evaluators_solver = {}
-    ev.create_input_execute_output_scripts(
-        pop=pop,
-        solver="evaluator_1",
-        control_vars_dict=control_vars_dict,
-        input_evaluators_solver=input_evaluators_solver)
-    ev.run_input_and_execute_and_output_scripts(
-        pop=pop,
-        solver="evaluator_1",
-        input_evaluators_solver=input_evaluators_solver
-    )
-    all_output_vals = ev.get_output_vals_job_control(
-        output_vals_dict=output_vals_dict,
-        pop=pop,
-        solver="evaluator_1",
-        output_dict=OrderedDict(
-            {
-                "hi": "evaluator_1",
-                "random": "evaluator_1",
-            }
-        ),
-        control_vars_dict=control_vars_dict)
-    expected_output_vals = [tuple([1, 3]), tuple([3, 3])]
-    assert all_output_vals == expected_output_vals
-    shutil.rmtree("./0_0")
-    shutil.rmtree("./0_1")
+            "python", "input_test_pipeline_sleep.py"], output_script=None)
+    pop = []
+    for i, delay in enumerate([30, 0]):
+        ind = creator.Ind([delay])
+        ind.gen, ind.num = 0, i
+        pop.append(ind)
+    start_time = time.time()
+    all_output_vals = asyncio.run(ev.evaluate_pop_async(
+        pop,
+        OrderedDict({"delay": ["evaluator_1"]}),
+        OrderedDict({"delay": "evaluator_1"}),
+        {"evaluator_1": {"order": 0}},
+        2,
+        required=1))
+    runtime = time.time() - start_time
+    ev.flush_file_operations()
+    cancelled_exists = os.path.exists("0_0")
+    shutil.rmtree("0_1")
     os.chdir("../")
+    assert all_output_vals == [None, tuple([0])]
+    assert runtime < 15
+    assert not cancelled_exists
     return
 
 
@@ -348,6 +1546,66 @@ def test_run_execute_serial():
     return
 
 
+def test_run_execute_memoize():
+    os.chdir("./input_test_files")
+    ev = Evaluation(artifact_store=ArtifactStore("test_artifact_store"))
+    ev.add_evaluator(
+        solver_name="evaluator_1",
+        input_script=["python", "input_test_eval_fn_generator_template.py"],
+        output_script=["python", "input_test_eval_fn_generator_output.py"],
+    )
+    input_evaluators = {
+        "evaluator_1": {
+            "order": 0,
+            "execute": [["python", "input_test_execute_mesh.py"],
+                        ["python", "input_test_run_execute.py"]],
+            "execute_memoize": {
+                "0": {"depends_on": ["packing_fraction"],
+                      "produces": ["mesh.txt"]}
+            },
+        }
+    }
+    creator.create("obj", base.Fitness, weights=(-1.0,))
+    creator.create("Ind", list, fitness=creator.obj)
+    runs = {}
+    for parallel_method in ["none", "job_control", "asyncio"]:
+        eval_function = ev.eval_fn_generator(
+            control_dict=OrderedDict(
+                {"packing_fraction": ["evaluator_1"],
+                 "variable2": ["evaluator_1"]}),
+            output_dict=OrderedDict({"num_batches": "evaluator_1"}),
+            input_evaluators=input_evaluators,
+            gens=1,
+            parallel_method=parallel_method,
+            keep_files="all",
+        )
+        # the mesh only depends on packing_fraction
+        inds = [creator.Ind([0.03, 1]), creator.Ind([0.04, 1]),
+                creator.Ind([0.03, 2])]
+        for i, ind in enumerate(inds):
+            ind.gen, ind.num = 0, i
+        if parallel_method == "none":
+            eval_function(inds[0])
+            eval_function(inds[1])
+            eval_function(inds[2])
+        else:
+            eval_function(inds[:2])
+            eval_function(inds[2:])
+        with open("input_test_execute_mesh_runs.txt") as fp:
+            runs[parallel_method] = [len(fp.readlines()),
+                                     os.path.exists("0_2/mesh.txt")]
+        os.remove("input_test_execute_mesh_runs.txt")
+        for path in ["0_0", "0_1", "0_2"]:
+            shutil.rmtree(path)
+        shutil.rmtree("test_artifact_store")
+        ev.artifact_store = ArtifactStore("test_artifact_store")
+    shutil.rmtree("test_artifact_store")
+    ev.flush_file_operations()
+    os.chdir("../")
+    for parallel_method in runs:
+        assert runs[parallel_method] == [2, True]
+
+
 def test_solver_order():
     input_evaluators = {
         "evaluator_1": {
@@ -389,6 +1647,42 @@ def test_run_output_script_serial():
     assert output_vals == expected_output_vals
 
 
+def test_read_output_script_results():
+    os.chdir("./input_test_files")
+    os.mkdir("./test_evaluation/")
+    ev = Evaluation()
+    ev.add_evaluator(
+        solver_name="evaluator_1",
+        input_script=["python", "placeholder.py"],
+        output_script=["python", "input_test_evaluation_get_output_vals.py"],
+    )
+    with open("./test_evaluation/evaluator_1_output_script_out.txt",
+              "w") as fp:
+        fp.write("progress {1: 2\n" + "x" * 10000 + "\n{'random': 3}\n")
+    printed_results = ev.read_output_script_results(
+        "./test_evaluation/", "evaluator_1")
+    with open("./test_evaluation/evaluator_1_output.json", "w") as fp:
+        fp.write('{"random": 4}')
+    json_results = ev.read_output_script_results(
+        "./test_evaluation/", "evaluator_1")
+    with open("./test_evaluation/evaluator_1_output.json", "w") as fp:
+        fp.write("")
+    with open("./test_evaluation/evaluator_1_output_script_out.txt",
+              "w") as fp:
+        fp.write("no results\n")
+    with pytest.raises(Exception, match="random"):
+        ev.get_output_vals(
+            output_vals=[None],
+            solver="evaluator_1",
+            path="./test_evaluation/",
+            output_dict=OrderedDict({"random": "evaluator_1"}),
+            control_vars={"evaluator_1": {}})
+    shutil.rmtree("./test_evaluation/")
+    os.chdir("../")
+    assert printed_results == {"random": 3}
+    assert json_results == {"random": 4}
+
+
 def test_name_ind():
     ev = Evaluation()
     control_vars = ev.name_ind(
@@ -423,4 +1717,30 @@ def test_render_jinja_template():
     assert rendered_template == expected_rendered_template
 
 
+
+def test_render_jinja_template_compiled_once():
+    os.chdir("./input_test_files")
+    ev = Evaluation(template_cache_dir="template_cache")
+    ev.add_evaluator(
+        solver_name="evaluator_1",
+        input_script=["python", "input_test_template_numeric.py"],
+        output_script=None)
+    template = ev.templates["input_test_template_numeric.py"]
+    rendered_templates = []
+    for radius in [1, 2.5]:
+        rendered_templates.append(ev.render_jinja_template(
+            script="input_test_template_numeric.py",
+            control_vars_solver={"radius": radius, "batches": 10},
+            ind=1,
+            solver="evaluator_1"))
+    assert ev.templates["input_test_template_numeric.py"] is template
+    cached_files = os.listdir("template_cache")
+    shutil.rmtree("template_cache")
+    os.chdir("../")
+    # numeric values are passed to the template unchanged
+    assert rendered_templates == ["radius = 2\nbatches = 10",
+                                  "radius = 5.0\nbatches = 10"]
+    assert len(cached_files) > 0
+
+
 test_render_jinja_template()
@@ -100,11 +100,41 @@ def test_load_evaluator():
     ind.num = 0
     output_vals = eval_function(ind)
     expected_output_vals = tuple([0.03, 1000, 10])
+    e.evaluator.flush_file_operations()
 
     os.chdir("../")
     assert output_vals == expected_output_vals
 
 
+def test_load_evaluation_cache():
+    os.chdir("./input_test_files")
+    e = Executor("input_file_placeholder")
+    test_control_dict, test_output_dict = e.organize_input_output(
+        test_input_dict)
+    no_cache = e.load_evaluation_cache(test_output_dict, test_input_dict)
+    cache_input_dict = dict(test_input_dict)
+    cache_input_dict["algorithm"] = dict(
+        test_input_dict["algorithm"], evaluation_cache="test_cache.db")
+    cache = e.load_evaluation_cache(test_output_dict, cache_input_dict)
+    made_cache_file = os.path.exists("test_cache.db")
+    os.remove("test_cache.db")
+    os.chdir("../")
+    assert no_cache is None
+    assert cache.cache_file == "test_cache.db"
+    assert made_cache_file
+
+
+def test_penalty_output_vals():
+    e = Executor("input_file_placeholder")
+    test_control_dict, test_output_dict = e.organize_input_output(
+        test_input_dict)
+    penalty_vals = e.penalty_output_vals(
+        test_output_dict, test_input_dict["algorithm"])
+    # packing_fraction is maximized, max_temp is minimized
+    assert penalty_vals[:2] == [-float("inf"), float("inf")]
+    assert penalty_vals[2] != penalty_vals[2]
+
+
 def test_load_toolbox():
     e = Executor("input_file_placeholder")
     ctrl_dict = OrderedDict(
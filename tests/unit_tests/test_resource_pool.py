@@ -0,0 +1,69 @@
+import time
+import threading
+from rollo.resource_pool import ResourcePool, parse_cpu_list, \
+    format_cpu_list
+
+
+def test_try_acquire():
+    pool = ResourcePool(4, 16)
+    assert pool.try_acquire(2, 10) == []
+    # enough cores but not enough memory
+    assert pool.try_acquire(2, 10) is None
+    assert pool.try_acquire(2, 6) == []
+    assert pool.try_acquire(1, 0) is None
+    pool.release(2, 10)
+    assert (pool.free_cores, pool.free_memory_gb) == (2, 10)
+
+
+def test_fit():
+    pool = ResourcePool(4, 16)
+    # a request larger than the node runs alone instead of waiting forever
+    assert pool.fit(8, 32) == (4, 16)
+    assert pool.try_acquire(8, 32) == []
+    assert pool.try_acquire(1, 0) is None
+    pool.release(8, 32)
+    assert (pool.free_cores, pool.free_memory_gb) == (4, 16)
+
+
+def test_reserve():
+    pool = ResourcePool(4, 16)
+    running = []
+    max_running = []
+    lock = threading.Lock()
+
+    def run():
+        with pool.reserve(2, 1):
+            with lock:
+                running.append(1)
+                max_running.append(len(running))
+            time.sleep(0.1)
+            with lock:
+                running.pop()
+
+    threads = [threading.Thread(target=run) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert max(max_running) == 2
+    assert (pool.free_cores, pool.free_memory_gb) == (4, 16)
+
+
+def test_cpus():
+    pool = ResourcePool(
+        4, 16, cpus=[0, 1, 2, 3], numa_nodes={0: 0, 1: 0, 2: 1, 3: 1})
+    assert pool.try_acquire(2, 0) == [0, 1]
+    assert pool.acquire(1, 0) == [2]
+    assert pool.try_acquire(2, 0) is None
+    pool.release(2, 0, [0, 1])
+    # the run fits in NUMA node 0, node 1's last free CPU stays free
+    assert pool.try_acquire(2, 0) == [0, 1]
+    assert pool.try_acquire(1, 0) == [3]
+    assert pool.numa_node([2, 3]) == 1
+    assert pool.numa_node([1, 2]) is None
+    assert pool.slots(2) == [[0, 1], [2, 3]]
+
+
+def test_cpu_list():
+    assert parse_cpu_list("0-3,8,10-11\n") == [0, 1, 2, 3, 8, 10, 11]
+    assert format_cpu_list([11, 0, 1, 2, 3, 8, 10]) == "0-3,8,10-11"
@@ -0,0 +1,46 @@
+from rollo import spatial_index
+from rollo.spatial_index import SpatialIndex
+
+
+def test_query():
+    index = SpatialIndex([0.1, 0.01, 0])
+    missing = index.query([1.0, 1.0, 1.0])
+    index.add([1.0, 1.0, 1.0], "a")
+    index.add([2.0, 1.0, 1.0], "b")
+    index.add([1.0, 1.0, 2.0], "c")
+    assert missing is None
+    assert len(index) == 3
+    assert index.query([1.05, 0.995, 1.0]) == "a"
+    assert index.query([1.95, 1.0, 1.0]) == "b"
+    assert index.query([1.0, 1.0, 2.0]) == "c"
+    # every variable must be within its own tolerance
+    assert index.query([1.05, 1.02, 1.0]) is None
+    # variables without a tolerance must match exactly
+    assert index.query([1.0, 1.0, 1.5]) is None
+
+
+def test_query_nearest():
+    index = SpatialIndex([1.0])
+    index.add([0.0], "a")
+    index.add([1.5], "b")
+    assert index.query([0.6]) == "a"
+    assert index.query([0.9]) == "b"
+
+
+def test_query_without_scipy():
+    cKDTree = spatial_index.cKDTree
+    spatial_index.cKDTree = None
+    index = SpatialIndex([0.1, 0.01, 0])
+    index.add([1.0, 1.0, 1.0], "a")
+    index.add([2.0, 1.0, 1.0], "b")
+    found = [index.query([1.05, 0.995, 1.0]), index.query([1.95, 1.0, 1.0]),
+             index.query([1.05, 1.02, 1.0])]
+    spatial_index.cKDTree = cKDTree
+    assert found == ["a", "b", None]
+
+
+def test_query_exact_only():
+    index = SpatialIndex([0, 0])
+    index.add([1.0, 2.0], "a")
+    assert index.query([1.0, 2.0]) == "a"
+    assert index.query([1.0, 2.1]) is None
@@ -109,6 +109,17 @@ def test_min_max_list():
     assert max_list == expected_max_list
 
 
+def test_tolerance_list():
+    tg = ToolboxGenerator()
+    ctrl_dict = OrderedDict({"packing_fraction": ["evaluator_1"],
+                             "variable2": ["evaluator_1", "evaluator_2"]})
+    tolerance_list = tg.tolerance_list(
+        ctrl_dict,
+        {"packing_fraction": {"min": 0.005, "max": 0.1, "tolerance": 1e-4},
+         "variable2": {"min": 1, "max": 2}})
+    assert tolerance_list == [1e-4, 0]
+
+
 def test_add_selection_operators():
     tg = ToolboxGenerator()
     selection_dict_list = [
@@ -0,0 +1,91 @@
+import os
+import time
+import shutil
+import subprocess
+import pytest
+from rollo.warm_workers import WarmWorkerPool, exec_script
+
+
+def test_run():
+    os.chdir("./input_test_files")
+    os.mkdir("0_0")
+    shutil.copyfile("input_test_warm_worker.py",
+                    "0_0/input_test_warm_worker.py")
+    pool = WarmWorkerPool(["colorsys"], 2)
+    returncode = pool.run("0_0", "out.txt", "input_test_warm_worker.py")
+    pool.shutdown()
+    with open("./0_0/out.txt") as fp:
+        Lines = fp.readlines()
+    shutil.rmtree("0_0")
+    os.chdir("../")
+    # the script sees the module its worker preloaded
+    assert Lines == ["True\n"]
+    assert returncode == 3
+
+
+def test_run_timeout():
+    os.chdir("./input_test_files")
+    os.mkdir("0_0")
+    with open("0_0/script.py", "w") as f:
+        f.write("import time\ntime.sleep(30)\n")
+    pool = WarmWorkerPool([], 1)
+    start_time = time.time()
+    with pytest.raises(subprocess.TimeoutExpired):
+        pool.run("0_0", "out.txt", "script.py", timeout=0.5)
+    runtime = time.time() - start_time
+    # the worker is still usable after the script was killed
+    with open("0_0/script.py", "w") as f:
+        f.write("raise SystemExit(2)\n")
+    returncode = pool.run("0_0", "out.txt", "script.py", timeout=10)
+    pool.shutdown()
+    shutil.rmtree("0_0")
+    os.chdir("../")
+    assert runtime < 10
+    assert returncode == 2
+
+
+def test_run_cpus_env():
+    os.chdir("./input_test_files")
+    os.mkdir("0_0")
+    with open("0_0/script.py", "w") as f:
+        f.write("import os\nprint(sorted(os.sched_getaffinity(0)))\n" +
+                "print(os.environ['OMP_NUM_THREADS'])\n")
+    cpu = min(os.sched_getaffinity(0))
+    pool = WarmWorkerPool([], 1)
+    returncode = pool.run(
+        "0_0", "out.txt", "script.py", cpus=[cpu],
+        env=dict(os.environ, OMP_NUM_THREADS="2"))
+    pool.shutdown()
+    with open("./0_0/out.txt") as fp:
+        Lines = fp.readlines()
+    shutil.rmtree("0_0")
+    os.chdir("../")
+    # the script is pinned and sees the solver's environment
+    assert Lines == [str([cpu]) + "\n", "2\n"]
+    assert returncode == 0
+
+
+def test_exec_script():
+    os.chdir("./input_test_files")
+    os.mkdir("0_0")
+    with open("0_0/script.py", "w") as f:
+        f.write("import os\nprint(os.listdir('.'))\nraise ValueError('x')\n")
+    cwd = os.getcwd()
+    returncode = exec_script(os.path.abspath("0_0"), "out.txt", "script.py")
+    assert os.getcwd() == cwd
+    with open("./0_0/out.txt") as fp:
+        contents = fp.read()
+    shutil.rmtree("0_0")
+    os.chdir("../")
+    assert "script.py" in contents
+    assert "ValueError: x" in contents
+    assert returncode == 1
+
+
+def test_getstate():
+    pool = WarmWorkerPool(["colorsys"], 1)
+    pool.start()
+    state = pool.__getstate__()
+    pool.shutdown()
+    assert state["executor"] is None
+    assert state["modules"] == ["colorsys"]